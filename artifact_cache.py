@@ -0,0 +1,269 @@
+# ==============================================================================
+#      Content-Addressed Cache for Generated Artifacts
+# ==============================================================================
+#
+# Rerunning a study rewrites identical .comm and Salome scripts, and the
+# expensive steps downstream (mesh compute, solver) cannot tell that nothing
+# changed. This cache wraps the generators:
+#
+#   1. The key of a generator run is a SHA-256 over everything it depends on:
+#      the generator's source, the source of the local modules it imports
+#      (comm_stream.py, material_library.py, ...), the overridden constants,
+#      the CONTENT of every input file named by its constants (STL, BREP,
+#      lumping tables...) and the working directory (generated scripts embed
+#      absolute paths of their outputs). Generators that read the results of
+#      a run (colormap ranges, field names, through RESULT_READERS) also
+#      depend on the .rmed files in their results directory, by size and
+#      modification time.
+#   2. A run whose key is already in the cache is skipped. Missing or edited
+#      outputs are restored from the cached copy, so files stay unchanged
+#      (same content and mtime) when nothing changed.
+#   3. Downstream stages record the files they produced from an artifact
+#      (e.g. Mesh_1.med from a Salome script, .rmed files from a .comm) and
+#      can later check that these products are still current for the
+#      artifact's key, so a mesh compute or solver run can be skipped safely.
+#
+# Layout: <CACHE_DIR>/<key>/ holds the cached outputs and record.json. Every
+# working directory gets an artifact_keys.json mapping its outputs to their
+# key and generator.
+#
+# --- HOW TO USE ---
+#   python artifact_cache.py generate <generator> [CONSTANT=value ...]
+#   python artifact_cache.py record <artifact> <stage> <product files ...>
+#   python artifact_cache.py check <artifact> <stage>   (exit code 0: up to date)
+#
+#   e.g.  python artifact_cache.py check lpbf_n_layer_cooling.comm solver || run_aster lpbf.export
+#   In a sweep file, 'cache: <dir>' makes parameter_sweep.py use this cache.
+#
+# ==============================================================================
+
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from field_index import file_signature, result_files
+from parameter_sweep import run_generator
+
+# --- CONFIGURATION ---
+
+# Directory holding the cached artifacts and their records
+CACHE_DIR = ".artifact_cache"
+
+# File written in every working directory: output file name -> cache key and generator
+KEYS_FILENAME = "artifact_keys.json"
+
+# Local modules through which a generator reads the .rmed result files of a run
+RESULT_READERS = ['colormap_range.py', 'field_index.py']
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+def file_digest(path):
+    """SHA-256 of a file's content, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _local_modules(path, seen=None):
+    """Sources of the modules next to `path` that it imports (recursively)."""
+    seen = {} if seen is None else seen
+    directory = os.path.dirname(os.path.abspath(path))
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module_path = os.path.join(directory, name.split('.')[0] + '.py')
+            if module_path not in seen and os.path.isfile(module_path):
+                seen[module_path] = file_digest(module_path)
+                _local_modules(module_path, seen)
+    return seen
+
+
+def _constants(source, overrides):
+    """Literal top-level constants of a generator (first assignment), with `overrides` applied."""
+    constants = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                constants.setdefault(node.targets[0].id, ast.literal_eval(node.value))
+            except (ValueError, SyntaxError):
+                pass
+    constants.update(overrides)
+    return constants
+
+
+def input_key(generator, overrides, workdir='.'):
+    """
+    Returns (key, inputs): the cache key of running `generator` with
+    `overrides` in `workdir`, and the description of what was hashed.
+    """
+    with open(generator) as f:
+        source = f.read()
+
+    # Files this generator wrote here earlier are its outputs, not its inputs
+    previous_outputs = {os.path.abspath(os.path.join(workdir, name))
+                        for name, entry in _load_json(os.path.join(workdir, KEYS_FILENAME), {}).items()
+                        if entry['generator'] == os.path.abspath(generator)}
+
+    modules = {os.path.basename(p): digest for p, digest in sorted(_local_modules(generator).items())}
+    reads_results = any(name in modules for name in RESULT_READERS)
+
+    input_files, results = {}, {}
+    for name, value in _constants(source, overrides).items():
+        if isinstance(value, str) and value:
+            path = value if os.path.isabs(value) else os.path.join(workdir, value)
+            if os.path.isfile(path) and os.path.abspath(path) not in previous_outputs:
+                input_files[name] = {'path': os.path.abspath(path), 'sha256': file_digest(path)}
+            elif reads_results and os.path.isdir(path):
+                # The output embeds data read from the results (colormap ranges, field names)
+                results[name] = {'path': os.path.abspath(path), 'files': file_signature(result_files(path))}
+
+    inputs = {
+        'generator': {'path': os.path.abspath(generator), 'sha256': file_digest(generator)},
+        'modules': modules,
+        'overrides': {name: repr(value) for name, value in sorted(overrides.items())},
+        'input_files': input_files,
+        'workdir': os.path.abspath(workdir),
+    }
+    # Input files are keyed on their content only, so moving an unchanged STL keeps the key
+    hashed = {
+        'generator': inputs['generator']['sha256'],
+        'modules': inputs['modules'],
+        'overrides': inputs['overrides'],
+        'input_files': {name: entry['sha256'] for name, entry in input_files.items()},
+        'workdir': inputs['workdir'],
+    }
+    if results:
+        inputs['results'] = results
+        hashed['results'] = {name: entry['files'] for name, entry in results.items()}
+    return hashlib.sha256(json.dumps(hashed, sort_keys=True).encode()).hexdigest(), inputs
+
+
+def _load_json(path, default):
+    if not os.path.isfile(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    temporary = path + ".tmp"
+    with open(temporary, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temporary, path)
+
+
+def _record_path(key, cache_dir):
+    return os.path.join(cache_dir, key, "record.json")
+
+
+def cached_generate(generator, overrides, workdir='.', cache_dir=CACHE_DIR, log=sys.stdout):
+    """
+    Runs `generator` in `workdir` unless its key is cached. Returns
+    (key, outputs, status) with status 'hit' (outputs already current),
+    'restored' (outputs copied back from the cache) or 'generated'.
+    """
+    key, inputs = input_key(generator, overrides, workdir)
+    entry_dir = os.path.join(cache_dir, key)
+    record = _load_json(_record_path(key, cache_dir), None)
+
+    if record is not None:
+        status = 'hit'
+        for name, digest in record['outputs'].items():
+            target = os.path.join(workdir, name)
+            if not (os.path.isfile(target) and file_digest(target) == digest):
+                shutil.copy2(os.path.join(entry_dir, name), target)
+                status = 'restored'
+        outputs = sorted(record['outputs'])
+    else:
+        outputs = run_generator(os.path.abspath(generator), overrides, workdir, log)
+        os.makedirs(entry_dir, exist_ok=True)
+        for name in outputs:
+            shutil.copy2(os.path.join(workdir, name), os.path.join(entry_dir, name))
+        record = {
+            'key': key,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'inputs': inputs,
+            'outputs': {name: file_digest(os.path.join(workdir, name)) for name in outputs},
+            'products': {},
+        }
+        _save_json(_record_path(key, cache_dir), record)
+        status = 'generated'
+
+    keys_path = os.path.join(workdir, KEYS_FILENAME)
+    keys = _load_json(keys_path, {})
+    keys.update({name: {'key': key, 'generator': os.path.abspath(generator)} for name in outputs})
+    _save_json(keys_path, keys)
+    return key, outputs, status
+
+
+def artifact_key(artifact):
+    """Cache key of a generated file, from the artifact_keys.json next to it."""
+    keys = _load_json(os.path.join(os.path.dirname(os.path.abspath(artifact)), KEYS_FILENAME), {})
+    if os.path.basename(artifact) not in keys:
+        raise KeyError(f"'{artifact}' was not generated through the artifact cache.")
+    return keys[os.path.basename(artifact)]['key']
+
+
+def record_products(artifact, stage, products, cache_dir=CACHE_DIR):
+    """Records the files a downstream `stage` produced from `artifact` (e.g. 'mesh', 'solver')."""
+    key = artifact_key(artifact)
+    record_path = _record_path(key, cache_dir)
+    record = _load_json(record_path, None)
+    if record is None:
+        raise KeyError(f"No cache record for key {key}.")
+    record['products'][stage] = {os.path.abspath(p): file_digest(p) for p in products}
+    _save_json(record_path, record)
+    return key
+
+
+def products_current(artifact, stage, cache_dir=CACHE_DIR):
+    """True if `stage` already produced its files from this exact artifact and they are unchanged."""
+    try:
+        key = artifact_key(artifact)
+    except KeyError:
+        return False
+    record = _load_json(_record_path(key, cache_dir), None)
+    if record is None or stage not in record['products'] or file_digest(artifact) != record['outputs'].get(os.path.basename(artifact)):
+        return False
+    return all(os.path.isfile(p) and file_digest(p) == digest for p, digest in record['products'][stage].items())
+
+
+def _parse_assignment(text):
+    """'NAME=value' -> (NAME, value); the value is a Python literal or a plain string."""
+    name, _, value = text.partition('=')
+    try:
+        return name.strip(), ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name.strip(), value
+
+
+if __name__ == "__main__":
+    command, arguments = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else (None, [])
+    if command == 'generate' and arguments:
+        key, outputs, status = cached_generate(arguments[0], dict(map(_parse_assignment, arguments[1:])))
+        print(f"{status}: {', '.join(outputs)} (key {key[:12]})")
+    elif command == 'record' and len(arguments) >= 3:
+        key = record_products(arguments[0], arguments[1], arguments[2:])
+        print(f"Recorded {len(arguments) - 2} '{arguments[1]}' products of {arguments[0]} (key {key[:12]})")
+    elif command == 'check' and len(arguments) == 2:
+        current = products_current(arguments[0], arguments[1])
+        print(f"'{arguments[1]}' products of {arguments[0]} are {'up to date' if current else 'missing or stale'}.")
+        sys.exit(0 if current else 1)
+    else:
+        print("Usage: python artifact_cache.py generate <generator> [CONSTANT=value ...]\n"
+              "       python artifact_cache.py record <artifact> <stage> <product files ...>\n"
+              "       python artifact_cache.py check <artifact> <stage>")
+        sys.exit(2)
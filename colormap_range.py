@@ -0,0 +1,112 @@
+# ==============================================================================
+#      Colormap Ranges Computed from the Results (Pre-Pass)
+# ==============================================================================
+#
+# The fixed colormap ranges of the animation scripts (fixed_colormap_min/max,
+# view1_colormap_min/max...) are guessed by hand, and a wrong guess means
+# rendering everything again. This pre-pass reads all ther{i}.rmed /
+# mec{i}.rmed files of a run with rmed_reader.py (in parallel, through
+# layer_summary.summarize_file) and returns the range of a result over ALL
+# layers and time steps:
+#   - the global min/max, or
+#   - a percentile-clipped range, e.g. CLIP_PERCENTILES = (1, 99): the lowest
+#     1st and highest 99th percentile of any time step, so a few hot spots do
+#     not wash out the colors.
+#
+# The ranges are cached in COLORMAP_CACHE_FILE next to the results, with the
+# size and modification time of the files they come from: a second call (or
+# another generator) gets them instantly until the results change.
+#
+# The generators use it when their auto_colormap_range setting is True
+# (result_animation_save_3.py, results_animation_save_two_view_2) and pass
+# their own RESULT_CONFIG entry, so the range always comes from the field and
+# component they render.
+#
+# --- HOW TO USE ---
+#   python colormap_range.py [results_path]    prints the ranges of RESULT_KEYS
+#
+# ==============================================================================
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from field_index import file_signature
+from layer_summary import layer_tasks, result_specs, summarize_file
+
+# --- CONFIGURATION ---
+
+# Directory containing the ther{i}.rmed / mec{i}.rmed files
+RESULTS_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run"
+
+# Number of layer files (layers 1..NUM_FILES)
+NUM_FILES = 20
+
+# Results to print (keys of RESULT_CONFIG in result_animation_save_3.py)
+RESULT_KEYS = ['TEMP', 'DEPL', 'VMIS']
+
+# None: global min/max. (low, high): percentile-clipped range, e.g. (1, 99)
+CLIP_PERCENTILES = None
+
+# Cache file written into the results directory
+COLORMAP_CACHE_FILE = "colormap_ranges.json"
+
+# Number of worker processes (None: one per CPU)
+MAX_WORKERS = None
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+def _load_cache(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def result_label(result):
+    """Short description of a result (a RESULT_CONFIG entry), e.g. 'mec{}.rmed stress{} SIEQ_NOEU VMIS'."""
+    return f"{result['file_basename']}{{}}.rmed {result['result_name']} {result['field_name']} {result['component']}"
+
+
+def data_range(results_path, result, num_files, clip=CLIP_PERCENTILES, max_workers=MAX_WORKERS):
+    """
+    (min, max) of a result (a RESULT_CONFIG entry) over all layer files and
+    time steps, clipped to the `clip` = (low, high) percentiles of the time
+    steps when given.
+    """
+    result_key = result_label(result)
+    tasks, missing = layer_tasks(results_path, num_files, {result_key: result})
+    if missing:
+        raise FileNotFoundError(f"Missing result file(s) for '{result_key}': "
+                                f"{', '.join(os.path.basename(path) for path, _, _ in missing)}")
+
+    cache_path = os.path.join(results_path, COLORMAP_CACHE_FILE)
+    cache = _load_cache(cache_path)
+    entry_name = f"{result_key} layers=1-{num_files} clip={list(clip) if clip else None}"
+    signature = file_signature([path for path, _, _ in tasks])
+    entry = cache.get(entry_name)
+    if entry and entry['files'] == signature:
+        print(f"Colormap range of {result_key}: [{entry['min']:.6g}, {entry['max']:.6g}] (cached)")
+        return entry['min'], entry['max']
+
+    percentiles = list(clip) if clip else []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        rows = [row for file_rows in pool.map(summarize_file, *zip(*tasks), [percentiles] * len(tasks))
+                for row in file_rows]
+    # Row columns: ..., min, max, mean, [low percentile, high percentile] (see layer_summary.py)
+    low = min(row[10] if clip else row[7] for row in rows)
+    high = max(row[11] if clip else row[8] for row in rows)
+
+    cache[entry_name] = {'min': float(low), 'max': float(high), 'files': signature}
+    with open(cache_path + ".tmp", 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(cache_path + ".tmp", cache_path)
+    print(f"Colormap range of {result_key} from {len(tasks)} files: [{low:.6g}, {high:.6g}]")
+    return float(low), float(high)
+
+
+if __name__ == "__main__":
+    results_path = sys.argv[1] if len(sys.argv) > 1 else RESULTS_PATH
+    for result in result_specs(RESULT_KEYS).values():
+        data_range(results_path, result, NUM_FILES)
@@ -0,0 +1,146 @@
+# ==============================================================================
+#      Restart / Checkpoint Chunks for the Code_Aster Command File Generators
+# ==============================================================================
+#
+# A long N-layer build written as ONE .comm file is one monolithic job: if it
+# crashes at layer 180 of 200, everything is rerun from layer 1.
+#
+# write_comm_chunks() takes the (layer, text) block stream of a generator (see
+# comm_stream.py) and splits it into chunks of K layers:
+#
+#   <name>_chunk1.comm : DEBUT + preamble + layers 1..K        + FIN()
+#   <name>_chunk2.comm : POURSUITE() + layers K+1..2K          + FIN()
+#   ...
+#   <name>_chunkM.comm : POURSUITE() + last layers + final block (FIN())
+#
+# FIN() saves the Code_Aster base at the end of every chunk, and POURSUITE()
+# restores it at the start of the next one, so layer K+1 picks up resther{K}
+# and resmec{K} exactly as it would in the monolithic file.
+#
+# write_chunk_manifest() then writes one .export file per chunk (chaining the
+# bases: chunk c reads base_chunk{c-1} and writes base_chunk{c}) and a JSON
+# manifest listing the chunks. run_comm_chunks.py runs the manifest and marks
+# each chunk as done, so a crashed run resumes from the last finished chunk.
+#
+# ==============================================================================
+
+import json
+import os
+
+
+def chunk_filename(output_filename, chunk, extension=None):
+    """Returns '<stem>_chunk<chunk><extension>' for the given output file."""
+    stem, ext = os.path.splitext(output_filename)
+    return f"{stem}_chunk{chunk}{ext if extension is None else extension}"
+
+
+def write_comm_chunks(blocks, output_filename, layers_per_chunk, progress_interval=50):
+    """
+    Writes (layer, text) blocks into chunk files of `layers_per_chunk` layers.
+
+    Blocks before the first layer go to chunk 1, blocks after the last layer
+    go to the last chunk. Returns a list of chunk dicts with the keys
+    'chunk', 'comm', 'first_layer' and 'last_layer'. File names in the
+    dicts are relative to the directory of output_filename.
+    """
+    chunks = []
+    f = None
+    bytes_written = 0
+    layers_written = 0
+
+    def open_chunk(first_layer):
+        """Closes the current chunk with FIN() and starts the next one."""
+        nonlocal f
+        if f is not None:
+            f.write("\nFIN()\n")
+            f.close()
+        chunk = len(chunks) + 1
+        comm_path = chunk_filename(output_filename, chunk)
+        chunks.append({'chunk': chunk, 'comm': os.path.basename(comm_path),
+                       'first_layer': first_layer, 'last_layer': first_layer})
+        f = open(comm_path, 'w')
+        if chunk > 1:
+            f.write("POURSUITE()\n")
+
+    try:
+        for layer, text in blocks:
+            if f is None:
+                open_chunk(layer if layer is not None else 1)
+            elif layer is not None and layer > chunks[-1]['first_layer'] + layers_per_chunk - 1:
+                open_chunk(layer)
+
+            f.write(text)
+            bytes_written += len(text.encode('utf-8'))
+            if layer is None:
+                continue
+            chunks[-1]['last_layer'] = layer
+            layers_written += 1
+            if progress_interval and layers_written % progress_interval == 0:
+                f.flush()
+                print(f"  ... {layers_written} layers written in {len(chunks)} chunks ({bytes_written / 1e6:.2f} MB)")
+    finally:
+        if f is not None:
+            f.close()
+
+    return chunks
+
+
+def write_export(export_filename, comm_filename, mess_filename, memory_limit=8192, time_limit=86400, ncpus=1,
+                 base_in=None, base_out=None):
+    """Writes a run_aster .export file for one .comm (optionally reading and saving a base)."""
+    export_lines = [
+        f"P time_limit {time_limit}",
+        f"P memory_limit {memory_limit}",
+        f"P ncpus {ncpus}",
+        f"F comm {comm_filename} D 1",
+        f"F mess {mess_filename} R 6",
+    ]
+    if base_in:
+        export_lines.append(f"R base {base_in} D 0")
+    if base_out:
+        export_lines.append(f"R base {base_out} R 0")
+    with open(export_filename, 'w') as f:
+        f.write("\n".join(export_lines) + "\n")
+
+
+def write_chunk_manifest(chunks, output_filename, memory_limit=8192, time_limit=86400, ncpus=1):
+    """
+    Writes one .export file per chunk and the JSON manifest listing them.
+
+    Chunk c reads the base saved by chunk c-1 and saves its own base, so every
+    finished chunk is a restart point. Returns the manifest filename.
+    """
+    manifest_filename = os.path.splitext(output_filename)[0] + "_chunks.json"
+
+    directory = os.path.dirname(os.path.abspath(output_filename))
+
+    for chunk in chunks:
+        c = chunk['chunk']
+        chunk['export'] = os.path.basename(chunk_filename(output_filename, c, '.export'))
+        chunk['mess'] = os.path.basename(chunk_filename(output_filename, c, '.mess'))
+        chunk['base_in'] = os.path.basename(chunk_filename(output_filename, c - 1, '_base')) if c > 1 else None
+        chunk['base_out'] = os.path.basename(chunk_filename(output_filename, c, '_base'))
+        chunk['status'] = 'pending'
+
+        write_export(os.path.join(directory, chunk['export']),
+                     os.path.join(directory, chunk['comm']), os.path.join(directory, chunk['mess']),
+                     memory_limit, time_limit, ncpus,
+                     base_in=chunk['base_in'] and os.path.join(directory, chunk['base_in']),
+                     base_out=os.path.join(directory, chunk['base_out']))
+
+    save_manifest(manifest_filename, {'output_filename': os.path.basename(output_filename), 'chunks': chunks})
+    return manifest_filename
+
+
+def load_manifest(manifest_filename):
+    """Reads a chunk manifest written by write_chunk_manifest()."""
+    with open(manifest_filename) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_filename, manifest):
+    """Writes the manifest atomically, so a crash never leaves it half-written."""
+    tmp_filename = manifest_filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_filename, manifest_filename)
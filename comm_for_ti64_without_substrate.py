@@ -9,9 +9,15 @@
 #   'bottom' group of the build geometry.
 # - Implemented efficient file I/O using DEFI_FICHIER with 'LIBERER' action.
 # - Switched result file output to 'BINARY' format for better performance.
+# - The command file is streamed to disk one layer block at a time
+#   (see comm_stream.py) instead of being collected in memory first.
 #
 # ==============================================================================
 
+from comm_groups import built_group_command
+from comm_stream import write_comm_stream
+from material_library import render_material
+
 # ------------------------------------------------------------------------------
 # USER-DEFINED PARAMETERS
 # ------------------------------------------------------------------------------
@@ -37,17 +43,44 @@ baseplate_temp = 373.15   # Constant temperature of the bottom of the build (K)
 ther_output_unit = 61
 meca_output_unit = 21
 
+# --- Group Lists ---
+# True: reference one cumulative group built{i} (layers 1..i) per step
+#       instead of listing every active layer (see comm_groups.py).
+use_cumulative_groups = False
+
+# --- Material ---
+# Material from material_library.py written to the preamble. With a resample
+# tolerance > 0 its tables are reduced to the fewest points that stay within
+# tolerance * max|value| of the full tables (0 keeps every point).
+material_name = 'TI64'
+material_resample_tolerance = 0.0
+
+# --- Progress Reporting ---
+# While streaming, print the bytes and layers written every N layers (0 = quiet).
+progress_interval = 50
+
 # ------------------------------------------------------------------------------
 
-def generate_comm_file():
-    """Main function to generate the .comm file."""
+def generate_comm_blocks():
+    """
+    Yields the .comm file one block at a time as (layer, text) pairs.
+
+    `layer` is the layer number for a per-layer block and None for the
+    preamble and finalization. Only the current block is held in memory.
+    """
 
-    # Use a list to build the file content as strings
-    comm_file_content = []
+    # Lines of the block currently being built
+    block = []
 
     def add_line(text):
-        """Helper to add a line to the content list."""
-        comm_file_content.append(text)
+        """Helper to add a line to the current block."""
+        block.append(text)
+
+    def take_block():
+        """Returns the current block as text and starts a new one."""
+        text = "".join(line + '\n' for line in block)
+        block.clear()
+        return text
 
     # ==========================================================================
     # 1. Preamble and One-Time Definitions
@@ -57,36 +90,9 @@ def generate_comm_file():
     add_line("mesh = LIRE_MAILLAGE(FORMAT='MED', UNITE=7)\n")
 
     add_line("# --- Material and Function Definitions ---")
-    add_line("youngmo1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 107000.0, 293.15, 107000.0, 373.15, 103400.0, 473.15, 99510.0, 573.15, 93710.0, 673.15, 85500.0, 773.15, 74710.0, 873.15, 61840.0, 973.15, 48160.0, 1073.15, 35290.0, 1173.15, 24500.0, 1273.15, 16290.0, 1373.15, 10490.0, 1473.15, 6610.0, 1573.15, 4106.0, 1673.15, 2528.0, 1773.15, 1547.0, 1873.15, 943.5, 1878.15, 1.0))")
-    add_line("poiss1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 0.323, 293.15, 0.323, 373.15, 0.328, 473.15, 0.334, 573.15, 0.339, 673.15, 0.345, 773.15, 0.351, 873.15, 0.357, 973.15, 0.363, 1073.15, 0.369, 1173.15, 0.374, 1273.15, 0.380, 1373.15, 0.386, 1473.15, 0.392, 1573.15, 0.398, 1673.15, 0.403, 1773.15, 0.409, 1873.15, 0.415))")
-    add_line("alpha1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 6.5e-06, 40.0, 6.5e-06, 100.0, 7.1e-06, 293.0, 8.9e-06, 400.0, 9.7e-06, 600.0, 1.08e-05, 800.0, 1.14e-05, 900.0, 1.16e-05, 1100.0, 1.16e-05))")
-    add_line("rho1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 4.405e-09, 293.15, 4.405e-09, 1500.15, 4.243e-09, 2050.15, 4.189e-09, 2150.15, 3.865e-09, 2400.15, 3.730e-09, 2773.15, 3.730e-09))")
-    add_line("kappa_X = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 8.11, 293.15, 8.11, 373.15, 7.74, 473.15, 7.52, 573.15, 7.55, 673.15, 7.81, 773.15, 8.29, 873.15, 8.96, 973.15, 9.81, 1073.15, 10.82, 1173.15, 11.98, 1273.15, 13.26, 1373.15, 14.65, 1473.15, 16.13, 1573.15, 17.69, 1673.15, 19.29, 1773.15, 20.93, 1873.15, 22.6, 1923.15, 28.53, 1973.15, 29.45, 2073.15, 31.28, 2173.15, 33.11, 2223.15, 34.02))")
-    add_line("kappa_Y = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 8.11, 293.15, 8.11, 373.15, 7.74, 473.15, 7.52, 573.15, 7.55, 673.15, 7.81, 773.15, 8.29, 873.15, 8.96, 973.15, 9.81, 1073.15, 10.82, 1173.15, 11.98, 1273.15, 13.26, 1373.15, 14.65, 1473.15, 16.13, 1573.15, 17.69, 1673.15, 19.29, 1773.15, 20.93, 1873.15, 22.6, 1923.15, 28.53, 1973.15, 29.45, 2073.15, 31.28, 2173.15, 33.11, 2223.15, 34.02))")
-    add_line("kappa_Z = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 7.01, 293.15, 7.01, 373.15, 7.34, 473.15, 8.02, 573.15, 8.95, 673.15, 10.07, 773.15, 11.36, 873.15, 12.75, 973.15, 14.21, 1073.15, 15.68, 1173.15, 17.14, 1273.15, 18.52, 1373.15, 19.78, 1473.15, 20.88, 1573.15, 21.77, 1673.15, 22.42, 1773.15, 22.76, 1873.15, 22.76, 1923.15, 28.53, 1973.15, 29.45, 2073.15, 31.28, 2173.15, 33.11, 2223.15, 34.02))")
-    add_line("rhocp1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 2.56e-03, 300.0, 2.56e-03, 400.0, 2.64e-03, 500.0, 2.72e-03, 600.0, 2.81e-03, 700.0, 2.91e-03, 800.0, 3.01e-03, 900.0, 3.11e-03, 1000.0, 3.22e-03, 1100.0, 3.32e-03, 1200.0, 3.42e-03, 1300.0, 3.50e-03, 1400.0, 3.57e-03, 1500.0, 3.63e-03, 1600.0, 3.67e-03, 1700.0, 3.70e-03, 1800.0, 3.70e-03, 1900.0, 3.70e-03, 1950.0, 3.70e-03))")
-    add_line("sy_vs_temp = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 1098.0, 293.15, 1098.0, 477.15, 844.0, 700.15, 663.0, 811.15, 527.0, 1088.15, 60.0, 1217.15, 21.0, 1878.15, 0.1))")
-    add_line("harden_mod = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(1.0, 1332.0, 293.15, 1332.0, 477.15, 1207.0, 700.15, 1033.0, 811.15, 943.0, 1088.15, 708.0, 1217.15, 596.0, 1878.15, 0.1))")
-    
-    add_line("""mater1 = DEFI_MATERIAU(
-    ELAS_FO=_F(
-        E=youngmo1,
-        NU=poiss1,
-        RHO=rho1,
-        ALPHA=alpha1,
-        TEMP_DEF_ALPHA=293.0,
-    ),
-    THER_NL_ORTH=_F(
-        RHO_CP=rhocp1,
-        LAMBDA_L=kappa_X,
-        LAMBDA_T=kappa_Y,
-        LAMBDA_N=kappa_Z,
-    ),
-    ECRO_LINE_FO=_F(
-        SY=sy_vs_temp,
-        D_SIGM_EPSI=harden_mod,
-    ),
-)\n""")
+    add_line(render_material(material_name, material_resample_tolerance))
+
+    yield None, take_block()
 
     # ==========================================================================
     # 2. Loop to Generate Commands for Each Layer
@@ -107,7 +113,13 @@ def generate_comm_file():
     
         # --- Define active groups for the current step ---
         # 1. Physical groups (with material): all deposited layers.
-        physical_groups_list = [f"'layer{j}'" for j in range(1, i + 1)]
+        if use_cumulative_groups:
+            add_line(built_group_command(i))
+            physical_groups_list = [f"'built{i}'"]
+            prev_physical_groups_str = f"('built{i-1}', )"
+        else:
+            physical_groups_list = [f"'layer{j}'" for j in range(1, i + 1)]
+            prev_physical_groups_str = f"({', '.join(physical_groups_list[:-1])}, )"
         physical_groups_str = f"({', '.join(physical_groups_list)}, )"
     
         # 2. Model groups: physical groups + boundary condition groups.
@@ -143,10 +155,6 @@ def generate_comm_file():
             etat_init_meca_str = ""
         else:
             add_line(f"# --- State Transfer from Layer {i-1} to Layer {i} ---")
-            # Groups from the previous step (all layers except the current one)
-            prev_physical_groups_list = [f"'layer{j}'" for j in range(1, i)]
-            prev_physical_groups_str = f"({', '.join(prev_physical_groups_list)}, )"
-            
             # --- Thermal State Transfer ---
             temp_ext = f"tmpext{i-1}"
             temp_init_combined = f"fieldini{i}"
@@ -215,17 +223,22 @@ def generate_comm_file():
         add_line(f"IMPR_RESU(UNITE={meca_output_unit}, RESU=(_F(LIST_INST={list_res}, NOM_CHAM=('DEPL',), RESULTAT={res_meca}), _F(LIST_INST={list_res}, {impr_meca_options})))")
         add_line(f"DEFI_FICHIER(ACTION='LIBERER', UNITE={meca_output_unit})")
 
+        yield i, take_block()
+
     # ==========================================================================
     # 3. Finalization
     # ==========================================================================
     add_line("\nFIN()")
+    yield None, take_block()
 
-    # --- Write the collected content to the output file ---
-    with open(output_filename, 'w') as f:
-        for line in comm_file_content:
-            f.write(line + '\n')
-    
-    print(f"Successfully generated command file: {output_filename}")
+
+def generate_comm_file():
+    """Main function to generate the .comm file."""
+
+    # --- Stream the blocks straight to the output file ---
+    bytes_written, layers_written = write_comm_stream(generate_comm_blocks(), output_filename, progress_interval)
+
+    print(f"Successfully generated command file: {output_filename} ({layers_written} layers, {bytes_written} bytes)")
 
 
 # --- Main execution block ---
@@ -0,0 +1,32 @@
+# ==============================================================================
+#      Cumulative Layer Groups for the Code_Aster Command File Generators
+# ==============================================================================
+#
+# Every layer step of an unrolled .comm file lists the groups of all layers
+# activated so far ('layer1', ..., 'layer{i}') in its models, material fields
+# and results, so the file (and its parse time) grows as O(N^2) with the layer
+# count.
+#
+# With use_cumulative_groups = True the generators instead create one group
+# per step on the mesh with DEFI_GROUP,
+#
+#   built1 = layer1                     (or substrate + layer1)
+#   built{i} = built{i-1} + layer{i}
+#
+# and reference it by name, so the file grows linearly.
+#
+# ==============================================================================
+
+
+def built_group_command(i, first_groups=('layer1', )):
+    """
+    Returns the DEFI_GROUP command creating built{i}. built1 is made of
+    `first_groups`: a plain copy of a single group, or their UNION.
+    """
+    if i > 1:
+        definition = f"UNION=('built{i-1}', 'layer{i}')"
+    elif len(first_groups) == 1:
+        definition = f"GROUP_MA='{first_groups[0]}'"
+    else:
+        definition = f"UNION=({', '.join(repr(group) for group in first_groups)})"
+    return f"mesh = DEFI_GROUP(reuse=mesh, MAILLAGE=mesh, CREA_GROUP_MA=_F(NOM='built{i}', {definition}))\n"
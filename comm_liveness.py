@@ -0,0 +1,148 @@
+# ==============================================================================
+#      Concept Lifetime Management for the Code_Aster Command File Generators
+# ==============================================================================
+#
+# An unrolled N-layer .comm file defines a fresh set of concepts for every
+# layer (model{i}, resther{i}, resmec{i}, stress{i}, fieldini{i}, field{i}_*,
+# strfield{i}_*, ...). Left alone they all stay alive until FIN(), so the
+# Code_Aster memory and the JEVEUX base grow with every layer.
+#
+# insert_detruire() wraps the (layer, text) block stream of a generator (see
+# comm_stream.py) and performs a liveness analysis on the concepts it emits:
+#
+#   - A concept is "used" by every later command that references its name.
+#   - A block is held back until the next block has been produced. Every
+#     concept that is live in the held block but NOT referenced by the next
+#     block is dead, and a DETRUIRE is inserted right after its last use.
+#   - Concepts that ARE referenced by the next block (e.g. resther{i-1} in the
+#     state transfer of layer i) are carried over and released there instead.
+#
+# This relies on the structure of the layer-by-layer generators: a layer only
+# reads the state of the layer directly before it. Concepts defined in the
+# preamble (mesh, material functions, mater1) and any names in `keep` are
+# never destroyed. Nothing is inserted in the final block, FIN() frees it.
+#
+# ==============================================================================
+
+import re
+
+# A command starts in column 0; indented lines and closing brackets continue it.
+_STATEMENT_START = re.compile(r"^[A-Za-z_]")
+_DEFINITION = re.compile(r"^([A-Za-z_]\w*)\s*=\s*[A-Za-z_]")
+_STRING_LITERAL = re.compile(r"""[rR]?'[^']*'|[rR]?"[^"]*\"""")
+_COMMENT = re.compile(r"#.*$", re.MULTILINE)
+_IDENTIFIER = re.compile(r"\b[A-Za-z_]\w*\b")
+# Keywords through which a new concept keeps a reference to an existing one
+# (a result to its model, material field and loads, a material field to the
+# thermal result in AFFE_VARC, an extracted field to its result). Fields passed
+# as ETAT_INIT or to CREA_CHAMP ASSE are copied and create no such reference.
+_REFERENCE = re.compile(r"\b(?:MODELE|CHAM_MATER|CHARGE|EVOL|RESULTAT)\s*=\s*(?:\(([^()]*)\)|(\w+))")
+
+
+def _split_statements(text):
+    """Splits a block of .comm text into a list of statement strings."""
+    statements = []
+    for line in text.splitlines(keepends=True):
+        if statements and not _STATEMENT_START.match(line):
+            statements[-1] += line
+        else:
+            statements.append(line)
+    return statements
+
+
+def _analyse(statement):
+    """
+    Returns (defined_name or None, referenced identifiers, identifiers the
+    defined concept keeps a reference to).
+    """
+    if statement.lstrip().startswith('#'):
+        return None, set(), set()
+    match = _DEFINITION.match(statement)
+    defined = match.group(1) if match else None
+    code = _COMMENT.sub('', _STRING_LITERAL.sub('', statement))
+    if match:
+        code = code[match.end(1):]
+    kept = set()
+    for in_brackets, single in _REFERENCE.findall(code):
+        kept.update(_IDENTIFIER.findall(in_brackets or single))
+    return defined, set(_IDENTIFIER.findall(code)), kept
+
+
+def _detruire_line(names):
+    """Renders the DETRUIRE command releasing `names`."""
+    return f"DETRUIRE(NOM=({', '.join(names)}, ))\n"
+
+
+def insert_detruire(blocks, keep=()):
+    """
+    Yields the (layer, text) blocks of `blocks` with DETRUIRE commands added
+    as soon as a concept is no longer needed by the block that follows it.
+
+    A concept is also kept for as long as anything that refers to it is alive
+    (e.g. modmeca{i} while resmec{i} is still needed), so a result never
+    outlives the model or material field it was computed on. Only one block is held
+    back at a time, so the generators keep streaming.
+    """
+    pinned = set(keep)
+    # Live concepts in definition order -> index of their last use in the
+    # held block (-1 when carried over but not used there yet)
+    last_use = {}
+    # Live concept -> live concepts referenced by its definition
+    depends_on = {}
+    held = None
+
+    for layer, text in blocks:
+        statements = _split_statements(text)
+        analysed = [_analyse(statement) for statement in statements]
+
+        if held is None:
+            # The first block is the preamble: everything it defines is pinned.
+            pinned.update(name for name, _, _ in analysed if name)
+            held = (layer, statements)
+            continue
+
+        # --- Which live concepts does the new block still need? ---
+        used_next = set()
+        for _, refs, _ in analysed:
+            used_next |= refs
+        survivors = {name for name in last_use if name in used_next}
+        pending = list(survivors)
+        while pending:
+            for dep in depends_on[pending.pop()]:
+                if dep not in survivors:
+                    survivors.add(dep)
+                    pending.append(dep)
+
+        # --- Release the others after their last use (and their dependents') ---
+        release_at = {name: index for name, index in last_use.items() if name not in survivors}
+        for name in reversed(list(release_at)):
+            for dep in depends_on[name]:
+                if dep in release_at:
+                    release_at[dep] = max(release_at[dep], release_at[name])
+        released = {}
+        for name, index in release_at.items():
+            released.setdefault(max(index, 0), []).append(name)
+
+        held_layer, held_statements = held
+        out = []
+        for index, statement in enumerate(held_statements):
+            out.append(statement)
+            if index in released:
+                out.append(_detruire_line(released[index]))
+        yield held_layer, "".join(out)
+
+        # --- Carry the survivors into the new block and record its concepts ---
+        last_use = {name: -1 for name in last_use if name in survivors}
+        depends_on = {name: depends_on[name] for name in last_use}
+        for index, (name, refs, kept) in enumerate(analysed):
+            for ref in refs:
+                if ref in last_use:
+                    last_use[ref] = index
+            if name and name not in pinned:
+                last_use.pop(name, None)
+                last_use[name] = index
+                depends_on[name] = {ref for ref in kept if ref in last_use and ref != name}
+        held = (layer, statements)
+
+    if held is not None:
+        yield held[0], "".join(held[1])
@@ -0,0 +1,46 @@
+# ==============================================================================
+#      Streaming Writer for the Code_Aster Command File Generators
+# ==============================================================================
+#
+# The .comm generators used to collect every line of the command file in a
+# list and write it at the very end. For builds with hundreds or thousands of
+# layers that list grows until the whole file is held in memory.
+#
+# Instead, a generator now YIELDS the file one block at a time as
+# (layer, text) pairs, where `layer` is the layer number for a per-layer block
+# and None for the preamble / finalization. This module writes each block to
+# disk as soon as it is produced, so peak memory is one layer's worth of text,
+# and reports how many bytes and layers have been written so far.
+#
+# --- HOW TO USE ---
+#   from comm_stream import write_comm_stream
+#   bytes_written, layers_written = write_comm_stream(generate_comm_blocks(),
+#                                                     "my_file.comm")
+#
+# ==============================================================================
+
+
+def write_comm_stream(blocks, output_filename, progress_interval=50):
+    """
+    Writes (layer, text) blocks to output_filename as they are produced.
+
+    A progress line is printed every `progress_interval` layers (set it to 0
+    to disable). Returns a (bytes_written, layers_written) tuple.
+    """
+    bytes_written = 0
+    layers_written = 0
+
+    with open(output_filename, 'w') as f:
+        for layer, text in blocks:
+            f.write(text)
+            bytes_written += len(text.encode('utf-8'))
+
+            if layer is None:
+                continue
+            layers_written += 1
+            if progress_interval and layers_written % progress_interval == 0:
+                # Flush so the file on disk matches the progress we report.
+                f.flush()
+                print(f"  ... {layers_written} layers written ({bytes_written / 1e6:.2f} MB)")
+
+    return bytes_written, layers_written
@@ -0,0 +1,126 @@
+# ==============================================================================
+#      Adaptive Per-Layer Time Lists from a Lumped Cooling Estimate
+# ==============================================================================
+#
+# A freshly activated layer cools very fast at first and then slowly creeps
+# towards the baseplate temperature. A fixed time step is therefore too
+# coarse at the start of a layer or wasteful at the end of it (usually both).
+#
+# This module estimates the cooling of a new layer with a cheap 1D lumped
+# model, using the same temperature-dependent RHO_CP and LAMBDA tables as the
+# Code_Aster material:
+#
+#     dT/dt = -(T - T_sink) / tau(T),     tau(T) = rho_cp(T) * L^2 / lambda(T)
+#
+# where L is the conduction length (about one layer thickness). From that
+# estimate it builds a geometrically graded time list: the step starts at
+# max_step / 2^k, small enough that no step changes the temperature by more
+# than max_temp_step, and doubles as soon as the estimated cooling rate
+# allows it, until it reaches max_step.
+#
+# Every interval ends on a multiple of the next (coarser) step, so every
+# multiple of max_step after the layer start is an instant of the list. Result
+# lists with PAS = max_step (e.g. the IMPR_RESU list) therefore stay valid.
+#
+# ==============================================================================
+
+import math
+
+
+def table_from_vale(vale):
+    """
+    Converts a DEFI_FONCTION VALE string ("x1, y1, x2, y2, ...") into a
+    sorted list of (x, y) pairs.
+    """
+    values = [float(v) for v in vale.replace('(', ' ').replace(')', ' ').split(',') if v.strip()]
+    return sorted(zip(values[0::2], values[1::2]))
+
+
+def interpolate(table, x):
+    """Linear interpolation in a (x, y) table, constant outside (PROL 'CONSTANT')."""
+    if x <= table[0][0]:
+        return table[0][1]
+    if x >= table[-1][0]:
+        return table[-1][1]
+    for (x0, y0), (x1, y1) in zip(table, table[1:]):
+        if x <= x1:
+            return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+    return table[-1][1]
+
+
+def graded_time_intervals(duration, max_step, max_temp_step, melt_temp, sink_temp,
+                          rhocp_table, kappa_table, cooling_length, max_levels=12):
+    """
+    Returns the time list of one layer as [(end_offset, step), ...].
+
+    Offsets are measured from the start of the layer; the last interval ends
+    at `duration`. The number of increments is sum((end - start) / step).
+    """
+
+    def tau(temp):
+        """Lumped cooling time constant at temperature `temp`."""
+        return interpolate(rhocp_table, temp) * cooling_length ** 2 / interpolate(kappa_table, temp)
+
+    def rate(temp):
+        """Estimated cooling rate |dT/dt| at temperature `temp`."""
+        return abs(temp - sink_temp) / tau(temp)
+
+    def advance(temp, step, substeps=10):
+        """Advances the lumped model by `step` (exact for frozen properties)."""
+        for _ in range(substeps):
+            temp = sink_temp + (temp - sink_temp) * math.exp(-step / substeps / tau(temp))
+        return temp
+
+    eps = max_step * 1e-9
+    temp = melt_temp
+    t = 0.0
+
+    # Finest level needed at the start of the layer
+    level = 0
+    while level < max_levels and max_step / 2 ** level * rate(temp) > max_temp_step:
+        level += 1
+
+    intervals = []
+    while t < duration - eps:
+        step = max_step / 2 ** level
+        start = t
+        n = 0
+        while True:
+            if start + (n + 1) * step > duration + eps:
+                break
+            n += 1
+            t = start + n * step
+            temp = advance(temp, step)
+            if t >= duration - eps:
+                break
+            # Switch to the coarser step once it is accurate enough and the
+            # current time lies on its grid.
+            coarser = 2 * step
+            if level > 0 and coarser * rate(temp) <= max_temp_step and abs(t / coarser - round(t / coarser)) < 1e-9:
+                break
+
+        if n == 0:
+            # duration is not a multiple of the step: close with one short step
+            intervals.append((duration, duration - start))
+            break
+        intervals.append((t, step))
+        if level > 0:
+            level -= 1
+
+    return intervals
+
+
+def count_increments(intervals):
+    """Number of time increments in a list built by graded_time_intervals()."""
+    count = 0
+    start = 0.0
+    for end, step in intervals:
+        count += int(round((end - start) / step))
+        start = end
+    return count
+
+
+def intervalle_string(time_start, intervals):
+    """Renders the intervals as a DEFI_LIST_REEL INTERVALLE=(...) tuple."""
+    items = [f"_F(JUSQU_A={time_start + end}, PAS={step})" for end, step in intervals]
+    return f"({', '.join(items)}, )"
@@ -0,0 +1,142 @@
+# ==============================================================================
+#      Field Names of the .rmed Files, Read from the Files (Cached Index)
+# ==============================================================================
+#
+# The animation generators used to guess MED field names with rules such as
+# "the underscore disappears for layers >= 10" or "the number rolls over every
+# 10 files". A guess that does not match the file only shows up as an empty
+# render. Instead, this module reads the names actually stored in the files:
+#
+#   field_index(results_path)   {file name: [field names]} for every .rmed file
+#                               of the directory, from their /CHA group (h5py)
+#   resolve_field(results_path, file_name, concept, field)
+#                               the exact name of a field, e.g.
+#                               ('mec12.rmed', 'resmec12', 'DEPL') -> 'resmec12DEPL'
+#
+# The index is cached in FIELD_INDEX_FILE in the results directory and only
+# the files that are new or changed (size, modification time) are scanned
+# again, so it is built once per run and reused by every generator.
+#
+# When a file does not exist yet (script generated before the run), cannot be
+# read (still being written, truncated) or h5py is not installed, the name follows the Code_Aster rule: the result (concept)
+# name cut and padded with '_' to 8 characters, followed by the NOM_CHAM.
+#
+# --- HOW TO USE ---
+#   python field_index.py [results_path]   builds the index and prints it
+#
+# ==============================================================================
+
+import json
+import os
+import sys
+
+# --- CONFIGURATION ---
+
+# Directory containing the .rmed files
+RESULTS_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run"
+
+# Index file written into the results directory
+FIELD_INDEX_FILE = "rmed_field_index.json"
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+_INDEXES = {}
+
+
+def file_signature(paths):
+    """{file name: [size, modification time]} of the files: cached data is valid while they match."""
+    return {os.path.basename(path): [os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in paths}
+
+
+def result_files(results_path):
+    """Paths of the .rmed files in `results_path` (none if it is not a directory)."""
+    if not os.path.isdir(results_path):
+        return []
+    return [os.path.join(results_path, name) for name in sorted(os.listdir(results_path))
+            if name.lower().endswith('.rmed')]
+
+
+def med_field_name(concept, field):
+    """Name Code_Aster gives a field in MED: concept name cut/padded with '_' to 8 characters + NOM_CHAM."""
+    return concept[:8].ljust(8, '_') + field
+
+
+def match_field(names, concept, field, where):
+    """The name among `names` of the field `field` of the result `concept`; KeyError if there is none."""
+    expected = med_field_name(concept, field)
+    if expected in names:
+        return expected
+    candidates = [name for name in names
+                  if name.endswith(field) and name[:-len(field)].rstrip('_') == concept[:8].rstrip('_')]
+    if len(candidates) == 1:
+        return candidates[0]
+    raise KeyError(f"No field '{expected}' in {where} (fields: {', '.join(names) or 'none'}).")
+
+
+def scan_fields(path):
+    """Field names stored in one .rmed file."""
+    import h5py
+    with h5py.File(path, 'r') as med:
+        return sorted(med['CHA']) if 'CHA' in med else []
+
+
+def field_index(results_path):
+    """
+    {file name: [field names]} of the readable .rmed files in `results_path`
+    (empty if the directory does not exist), updated from and saved to
+    FIELD_INDEX_FILE.
+    """
+    if not os.path.isdir(results_path):
+        return {}
+    paths = result_files(results_path)
+    index_path = os.path.join(results_path, FIELD_INDEX_FILE)
+    cached = {}
+    if os.path.isfile(index_path):
+        with open(index_path) as f:
+            cached = json.load(f)
+
+    index, changed = {}, False
+    for name, (size, mtime_ns) in file_signature(paths).items():
+        entry = cached.get(name)
+        if not entry or entry['size'] != size or entry['mtime_ns'] != mtime_ns:
+            try:
+                fields = scan_fields(os.path.join(results_path, name))
+            except OSError as e:  # still being written, truncated or not a MED file
+                print(f"WARNING: Could not read the fields of '{name}' ({e}); it is not indexed.")
+                continue
+            entry = {'size': size, 'mtime_ns': mtime_ns, 'fields': fields}
+            changed = True
+        index[name] = entry
+    changed = changed or set(index) != set(cached)
+
+    if changed:
+        try:
+            with open(index_path + ".tmp", 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(index_path + ".tmp", index_path)
+        except OSError as e:  # read-only results: the index is simply not cached
+            print(f"WARNING: Could not write the field index '{index_path}': {e}")
+    return {name: entry['fields'] for name, entry in index.items()}
+
+
+def resolve_field(results_path, file_name, concept, field):
+    """
+    Exact name of the field `field` (NOM_CHAM, e.g. 'DEPL') of the result
+    `concept` (e.g. 'resmec12') in results_path/file_name.
+    """
+    key = os.path.abspath(results_path)
+    if key not in _INDEXES:
+        try:
+            _INDEXES[key] = field_index(results_path)
+        except ImportError:
+            print("WARNING: h5py is not installed; field names follow the Code_Aster naming rule.")
+            _INDEXES[key] = {}
+    names = _INDEXES[key].get(file_name)
+    if names is None:
+        return med_field_name(concept, field)
+    return match_field(names, concept, field, os.path.join(results_path, file_name))
+
+
+if __name__ == "__main__":
+    for file_name, fields in field_index(sys.argv[1] if len(sys.argv) > 1 else RESULTS_PATH).items():
+        print(f"{file_name}: {', '.join(fields)}")
@@ -10,6 +10,12 @@
 # layer, including the necessary state transfer (temperature and displacement)
 # from the previous step.
 #
+# Alternatively, with comm_output_mode = 'LOOP', it writes ONE Python `for`
+# loop into the .comm file. The loop is driven by a layer table, holds the
+# per-layer concepts in arrays and destroys them with DETRUIRE as it goes, so
+# the file size does not depend on the number of layers. It issues exactly the
+# same commands with the same values as the unrolled file.
+#
 # --- HOW TO USE ---
 # 1. Set the parameters in the "USER-DEFINED PARAMETERS" section below.
 # 2. Run the script: python generate_cooling_comm.py
@@ -23,6 +29,10 @@
 #
 # ==============================================================================
 
+from comm_groups import built_group_command
+from comm_stream import write_comm_stream
+from material_library import render_material
+
 # ------------------------------------------------------------------------------
 # USER-DEFINED PARAMETERS
 # ------------------------------------------------------------------------------
@@ -44,17 +54,159 @@ baseplate_temp = 300.0   # Constant temperature of the bottom plate (K)
 base_ther_unit = 80
 base_meca_unit = 90
 
+# --- Group Lists ---
+# True: reference one cumulative group built{i} (layers 1..i) per step
+#       instead of listing every active layer (see comm_groups.py).
+use_cumulative_groups = False
+
+# --- Output Mode ---
+# 'UNROLLED': one block of commands per layer (file grows with num_layers).
+# 'LOOP':     one compact loop inside the .comm file (constant size).
+comm_output_mode = 'UNROLLED'  # Options: 'UNROLLED', 'LOOP'
+
+# --- Material ---
+# Material from material_library.py written to the preamble. With a resample
+# tolerance > 0 its tables are reduced to the fewest points that stay within
+# tolerance * max|value| of the full tables (0 keeps every point).
+material_name = 'TI64_ISOTROPIC'
+material_resample_tolerance = 0.0
+
+# --- Progress Reporting ---
+# While streaming, print the bytes and layers written every N layers (0 = quiet).
+progress_interval = 50
+
 # ------------------------------------------------------------------------------
 
-def generate_comm_file():
-    """Main function to generate the .comm file."""
+def generate_loop_block():
+    """
+    Returns the layer loop for comm_output_mode = 'LOOP'.
+
+    The loop reproduces the unrolled per-layer block command for command:
+    the times are computed with the same arithmetic and the first layer keeps
+    its special cases (no mechanical ETAT_INIT, TOUT_CHAM='OUI' on output).
+    """
+
+    if use_cumulative_groups:
+        groups_code = """    if i == 1:
+        built_group = _F(NOM='built1', GROUP_MA='layer1')
+    else:
+        built_group = _F(NOM='built%d' % i, UNION=('built%d' % (i - 1), 'layer%d' % i))
+    mesh = DEFI_GROUP(reuse=mesh, MAILLAGE=mesh, CREA_GROUP_MA=built_group)
+    active_groups = ('built%d' % i, )
+    prev_active_groups = ('built%d' % (i - 1), )"""
+    else:
+        groups_code = """    active_groups = tuple('layer%d' % j for j in range(1, i + 1))
+    prev_active_groups = active_groups[:-1]"""
+
+    return f"""
+# ==============================================================================
+# Layer loop: one iteration per layer, driven by the layer table below
+# ==============================================================================
+num_layers = {num_layers}
+time_per_layer = {time_per_layer}
+initial_melt_temp = {initial_melt_temp}
+baseplate_temp = {baseplate_temp}
+base_ther_unit = {base_ther_unit}
+base_meca_unit = {base_meca_unit}
+
+# (layer, time_start, time_end) for every layer
+layer_table = [(i, (i - 1) * time_per_layer, i * time_per_layer) for i in range(1, num_layers + 1)]
+
+# Concepts of each layer, indexed by layer number
+(model, modmeca, assth, assmec, listr, bottemp, fixmec, tmp, tmpext, fieldini,
+ field_1, field_2, field_3, resther, resmec, stress) = [[None] * (num_layers + 1) for _ in range(16)]
+
+for i, time_start, time_end in layer_table:
+{groups_code}
+    new_layer = ('layer%d' % i, )
+
+    model[i] = AFFE_MODELE(MAILLAGE=mesh, AFFE=_F(GROUP_MA=active_groups, PHENOMENE='THERMIQUE', MODELISATION='3D'))
+    modmeca[i] = AFFE_MODELE(MAILLAGE=mesh, AFFE=_F(GROUP_MA=active_groups, PHENOMENE='MECANIQUE', MODELISATION='3D'))
+    assth[i] = AFFE_MATERIAU(MAILLAGE=mesh, AFFE=_F(GROUP_MA=active_groups, MATER=mater1))
+
+    listr[i] = DEFI_LIST_REEL(DEBUT=time_start, INTERVALLE=_F(JUSQU_A=time_end, PAS=1e-5))
+    bottemp[i] = AFFE_CHAR_THER(MODELE=model[i], TEMP_IMPO=_F(GROUP_MA=('bottom', ), TEMP=baseplate_temp))
+    fixmec[i] = AFFE_CHAR_MECA(MODELE=modmeca[i], DDL_IMPO=_F(BLOCAGE=('DEPLACEMENT', ), GROUP_MA=('bottom', )))
+
+    # Initial temperature field for the new layer
+    tmp[i] = CREA_CHAMP(MAILLAGE=mesh, OPERATION='AFFE', TYPE_CHAM='NOEU_TEMP_R', AFFE=_F(GROUP_MA=new_layer, NOM_CMP=('TEMP', ), VALE=(initial_melt_temp, )))
 
-    # Use a list to build the file content as strings
-    comm_file_content = []
+    if i == 1:
+        etat_init_ther = _F(CHAM_NO=tmp[i])
+        etat_init_meca = {{}}
+    else:
+        # State transfer from layer i-1
+        tmpext[i] = CREA_CHAMP(OPERATION='EXTR', TYPE_CHAM='NOEU_TEMP_R', RESULTAT=resther[i - 1], INST=time_start, NOM_CHAM='TEMP')
+        fieldini[i] = CREA_CHAMP(MAILLAGE=mesh, OPERATION='ASSE', TYPE_CHAM='NOEU_TEMP_R', ASSE=(_F(CHAM_GD=tmpext[i], GROUP_MA=prev_active_groups), _F(CHAM_GD=tmp[i], GROUP_MA=new_layer)))
+        field_1[i] = CREA_CHAMP(MAILLAGE=mesh, OPERATION='AFFE', TYPE_CHAM='NOEU_DEPL_R', AFFE=_F(GROUP_MA=new_layer, NOM_CMP=('DX', 'DY', 'DZ'), VALE=(0.0, 0.0, 0.0)))
+        field_2[i] = CREA_CHAMP(OPERATION='EXTR', TYPE_CHAM='NOEU_DEPL_R', RESULTAT=resmec[i - 1], INST=time_start, NOM_CHAM='DEPL')
+        field_3[i] = CREA_CHAMP(MAILLAGE=mesh, OPERATION='ASSE', TYPE_CHAM='NOEU_DEPL_R', ASSE=(_F(CHAM_GD=field_1[i], GROUP_MA=new_layer), _F(CHAM_GD=field_2[i], GROUP_MA=prev_active_groups)))
+        etat_init_ther = _F(CHAM_NO=fieldini[i])
+        etat_init_meca = {{'ETAT_INIT': _F(DEPL=field_3[i])}}
+
+    resther[i] = THER_NON_LINE(MODELE=model[i],
+                               CHAM_MATER=assth[i],
+                               ETAT_INIT=etat_init_ther,
+                               EXCIT=_F(CHARGE=bottemp[i]),
+                               INCREMENT=_F(LIST_INST=listr[i]),
+                               CONVERGENCE=_F(ITER_GLOB_MAXI=50, RESI_GLOB_RELA=0.0001),
+                               NEWTON=_F(REAC_ITER=1),
+                               RECH_LINEAIRE=_F(ITER_LINE_MAXI=50),
+                               SOLVEUR=_F(MATR_DISTRIBUEE='OUI', METHODE='MUMPS'))
+
+    assmec[i] = AFFE_MATERIAU(MAILLAGE=mesh,
+                              MODELE=modmeca[i],
+                              AFFE=_F(GROUP_MA=active_groups, MATER=(mater1, )),
+                              AFFE_VARC=_F(EVOL=resther[i], NOM_VARC='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE_REF=300.0))
+
+    resmec[i] = STAT_NON_LINE(MODELE=modmeca[i],
+                              CHAM_MATER=assmec[i],
+                              EXCIT=_F(CHARGE=fixmec[i]),
+                              COMPORTEMENT=_F(DEFORMATION='PETIT', RELATION='VMIS_ISOT_LINE', TOUT='OUI'),
+                              CONVERGENCE=_F(ITER_GLOB_MAXI=50, RESI_GLOB_RELA=0.0001),
+                              INCREMENT=_F(LIST_INST=listr[i]),
+                              NEWTON=_F(REAC_ITER=3),
+                              RECH_LINEAIRE=_F(ITER_LINE_MAXI=50),
+                              SOLVEUR=_F(MATR_DISTRIBUEE='OUI', METHODE='MUMPS'),
+                              **etat_init_meca)
+
+    stress[i] = CALC_CHAMP(RESULTAT=resmec[i], CONTRAINTE=('SIGM_NOEU', ), CRITERES=('SIEQ_NOEU', ))
+
+    # The first layer output includes TOUT_CHAM, subsequent layers do not.
+    tout_cham = {{'TOUT_CHAM': 'OUI'}} if i == 1 else {{}}
+    IMPR_RESU(UNITE=base_ther_unit + i, RESU=_F(LIST_INST=listr[i], RESULTAT=resther[i], **tout_cham))
+    IMPR_RESU(UNITE=base_meca_unit + i, RESU=(_F(LIST_INST=listr[i], NOM_CHAM=('DEPL',), RESULTAT=resmec[i]), _F(LIST_INST=listr[i], RESULTAT=stress[i], **tout_cham)))
+
+    # Layer i-1 is no longer needed once layer i has extracted its state,
+    # and the transfer fields of layer i are no longer needed after the solve.
+    if i > 1:
+        DETRUIRE(NOM=(resther[i - 1], resmec[i - 1], assmec[i - 1], assth[i - 1], bottemp[i - 1], fixmec[i - 1],
+                      listr[i - 1], model[i - 1], modmeca[i - 1]))
+        DETRUIRE(NOM=(tmpext[i], fieldini[i], field_1[i], field_2[i], field_3[i]))
+    DETRUIRE(NOM=(stress[i], tmp[i]))
+"""
+
+
+def generate_comm_blocks():
+    """
+    Yields the .comm file one block at a time as (layer, text) pairs.
+
+    `layer` is the layer number for a per-layer block and None for the
+    preamble and finalization. Only the current block is held in memory.
+    """
+
+    # Lines of the block currently being built
+    block = []
 
     def add_line(text):
-        """Helper to add a line to the content list."""
-        comm_file_content.append(text)
+        """Helper to add a line to the current block."""
+        block.append(text)
+
+    def take_block():
+        """Returns the current block as text and starts a new one."""
+        text = "".join(line + '\n' for line in block)
+        block.clear()
+        return text
 
     # ==========================================================================
     # 1. Preamble and One-Time Definitions
@@ -62,25 +214,33 @@ def generate_comm_file():
     add_line("DEBUT(LANG='FR')\n")
     add_line("mesh = LIRE_MAILLAGE(FORMAT='MED', UNITE=7)\n")
 
-    # --- Material Properties (copied exactly from the original) ---
+    # --- Material Properties (from material_library.py) ---
     add_line("# --- Material and Function Definitions ---")
-    add_line("kappa1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(430.0, 5.957, 1270.0, 17.0, 1383.0, 19.87, 1799.0, 21.9, 1801.0, 28.8, 2666.0, 42.2))")
-    add_line("rhocp1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(293.0, 2.435, 873.0, 2.958, 1799.0, 3.149, 1801.0, 4.616, 2073.0, 4.532, 2573.0, 4.278))")
-    add_line("youngmo1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(300.0, 107000.0, 600.0, 99000.0, 800.0, 90000.0, 1000.0, 80000.0, 1200.0, 70000.0))")
-    add_line("poiss1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(300.0, 0.32, 600.0, 0.31, 800.0, 0.3, 1000.0, 0.29, 1200.0, 0.28))")
-    add_line("rho1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(293.0, 4.15e-06, 973.0, 4.35e-06, 1799.0, 4.15e-06, 1801.0, 4.1e-06, 2073.0, 4e-06, 2573.0, 3.8e-06))")
-    add_line("alpha1 = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=(300.0, 8.9e-06, 600.0, 9.2e-06, 800.0, 9.5e-06, 1000.0, 9.8e-06, 1200.0, 1e-05))")
-    add_line("mater1 = DEFI_MATERIAU(ECRO_LINE=_F(D_SIGM_EPSI=3000.0, EPSI_LIM=0.01, SY=950.0), ELAS_FO=_F(ALPHA=alpha1, E=youngmo1, NU=poiss1, RHO=rho1, TEMP_DEF_ALPHA=300.0), THER_NL=_F(LAMBDA=kappa1, RHO_CP=rhocp1))\n")
+    add_line(render_material(material_name, material_resample_tolerance))
+
+    yield None, take_block()
 
     # ==========================================================================
     # 2. Loop to Generate Commands for Each Layer
     # ==========================================================================
+    if comm_output_mode == 'LOOP':
+        yield None, generate_loop_block()
+        add_line("\nFIN()")
+        yield None, take_block()
+        return
+
     for i in range(1, num_layers + 1):
         add_line(f"\n# --- Layer {i} --- #\n")
 
         # --- Dynamic variable names ---
-        active_groups_list = [f"'layer{j}'" for j in range(1, i + 1)]
-        active_groups_str = f"({', '.join(active_groups_list)}, )"
+        if use_cumulative_groups:
+            add_line(built_group_command(i))
+            active_groups_str = f"('built{i}', )"
+            prev_active_groups_str = f"('built{i-1}', )"
+        else:
+            active_groups_list = [f"'layer{j}'" for j in range(1, i + 1)]
+            active_groups_str = f"({', '.join(active_groups_list)}, )"
+            prev_active_groups_str = f"({', '.join(active_groups_list[:-1])}, )"
         
         # Names for current step
         model_ther = f"model{i}"
@@ -130,8 +290,6 @@ def generate_comm_file():
             # 2. Assemble with the new hot layer to create the initial thermal state
             temp_ext = f"tmpext{i-1}"
             temp_init_combined = f"fieldini{i}"
-            prev_active_groups_list = [f"'layer{j}'" for j in range(1, i)]
-            prev_active_groups_str = f"({', '.join(prev_active_groups_list)}, )"
             add_line(f"{temp_ext} = CREA_CHAMP(OPERATION='EXTR', TYPE_CHAM='NOEU_TEMP_R', RESULTAT={prev_res_ther}, INST={time_start}, NOM_CHAM='TEMP')")
             add_line(f"{temp_init_combined} = CREA_CHAMP(MAILLAGE=mesh, OPERATION='ASSE', TYPE_CHAM='NOEU_TEMP_R', ASSE=(_F(CHAM_GD={temp_ext}, GROUP_MA={prev_active_groups_str}), _F(CHAM_GD={temp_init_new_layer}, GROUP_MA=('layer{i}', ))))")
             etat_init_ther_str = f"ETAT_INIT=_F(CHAM_NO={temp_init_combined}),"
@@ -193,17 +351,25 @@ def generate_comm_file():
         add_line(f"IMPR_RESU(UNITE={ther_unit}, RESU=_F(LIST_INST={list_inst}, {impr_ther_options}))")
         add_line(f"IMPR_RESU(UNITE={meca_unit}, RESU=(_F(LIST_INST={list_inst}, NOM_CHAM=('DEPL',), RESULTAT={res_meca}), _F(LIST_INST={list_inst}, {impr_meca_options})))")
 
+        yield i, take_block()
+
     # ==========================================================================
     # 3. Finalization
     # ==========================================================================
     add_line("\nFIN()")
+    yield None, take_block()
+
+
+def generate_comm_file():
+    """Main function to generate the .comm file."""
+
+    # --- Stream the blocks straight to the output file ---
+    bytes_written, layers_written = write_comm_stream(generate_comm_blocks(), output_filename, progress_interval)
 
-    # --- Write the collected content to the output file ---
-    with open(output_filename, 'w') as f:
-        for line in comm_file_content:
-            f.write(line + '\n')
-    
-    print(f"Successfully generated command file: {output_filename}")
+    if comm_output_mode == 'LOOP':
+        print(f"Successfully generated command file: {output_filename} (loop over {num_layers} layers, {bytes_written} bytes)")
+    else:
+        print(f"Successfully generated command file: {output_filename} ({layers_written} layers, {bytes_written} bytes)")
 
 
 # --- Main execution block ---
@@ -0,0 +1,112 @@
+# ==============================================================================
+#      Library API for the Generators (In-Process, No Module Globals)
+# ==============================================================================
+#
+# Each generator is a standalone script configured by its module-level
+# constants (num_layers, output_filename, NUMBER_OF_DIVISIONS...) and run as
+# __main__ to write its file. That stays the command-line interface. This
+# module lets the same generators be called as pure functions from other
+# Python code (sweeps, pipelines, tests), many times in one process:
+#
+#   from generator_api import load_generator, default_config, render, stream
+#
+#   comm = load_generator("comm_for_ti64_without_substrate.py")
+#   config = default_config(comm)           # dict of its literal constants
+#   config['num_layers'] = 50
+#   text = render(comm, config)             # whole file as a string
+#   for layer, block in stream(comm, config):   # or block by block
+#       ...
+#
+# A generator supports the API when it defines one of:
+#   generate_comm_blocks()   yields the (layer, text) blocks (comm_stream.py)
+#   build_script()           returns the text of a Salome/ParaView script
+#
+# How it works: load_generator() imports the script once (without running
+# its __main__ block). configured() copies its namespace, applies the config
+# and rebinds every function of the script to that copy, so the functions
+# read the config instead of the module globals. The loaded module itself is
+# never modified: calls with different configs are independent and can run
+# concurrently. Nothing is written to disk.
+#
+# ==============================================================================
+
+import ast
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import types
+
+_LOADED = {}
+
+
+def load_generator(path):
+    """Imports a generator script (with or without .py extension) once and returns the module."""
+    path = os.path.abspath(path)
+    if path not in _LOADED:
+        name = "generator_" + os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+        loader = importlib.machinery.SourceFileLoader(name, path)
+        spec = importlib.util.spec_from_file_location(name, path, loader=loader)
+        module = importlib.util.module_from_spec(spec)
+        # The generators import their helper modules from their own folder
+        if os.path.dirname(path) not in sys.path:
+            sys.path.insert(0, os.path.dirname(path))
+        loader.exec_module(module)
+        _LOADED[path] = module
+    return _LOADED[path]
+
+
+def default_config(generator):
+    """The literal top-level constants of a generator, as a dict (first assignment wins)."""
+    with open(generator.__file__) as f:
+        tree = ast.parse(f.read())
+    config = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in config or not hasattr(generator, name):
+                continue
+            try:
+                ast.literal_eval(node.value)
+            except (ValueError, SyntaxError):
+                continue
+            config[name] = getattr(generator, name)
+    return config
+
+
+def configured(generator, config):
+    """
+    Returns a copy of the generator module whose functions read `config`
+    (a dict of constant overrides) instead of the module globals.
+    """
+    unknown = sorted(name for name in config if not hasattr(generator, name))
+    if unknown:
+        raise KeyError(f"'{os.path.basename(generator.__file__)}' has no constant(s) {unknown}.")
+
+    copy = types.ModuleType(generator.__name__)
+    namespace = copy.__dict__
+    namespace.update(generator.__dict__)
+    namespace.update(config)
+    for name, value in generator.__dict__.items():
+        if isinstance(value, types.FunctionType) and value.__globals__ is generator.__dict__:
+            function = types.FunctionType(value.__code__, namespace, value.__name__, value.__defaults__, value.__closure__)
+            function.__kwdefaults__ = value.__kwdefaults__
+            function.__doc__ = value.__doc__
+            namespace[name] = function
+    return copy
+
+
+def stream(generator, config=None):
+    """Yields the generated file as (layer, text) blocks; scripts come as one (None, text) block."""
+    module = configured(generator, config or {})
+    if hasattr(module, 'generate_comm_blocks'):
+        yield from module.generate_comm_blocks()
+    elif hasattr(module, 'build_script'):
+        yield None, module.build_script()
+    else:
+        raise TypeError(f"'{os.path.basename(generator.__file__)}' defines neither generate_comm_blocks() nor build_script().")
+
+
+def render(generator, config=None):
+    """Returns the whole generated file as a string."""
+    return "".join(text for _, text in stream(generator, config))
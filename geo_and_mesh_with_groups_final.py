@@ -4,6 +4,10 @@
 # =============================================================================
 import os
 
+from layer_lumping import load_lumping_table
+from salome_batch import batch_requested, finalize_code, publish_code, result_filename
+from salome_face_groups import face_classification_code
+
 # --- 1. CHOOSE GEOMETRY SOURCE ---
 GEOMETRY_TYPE = 'IMPORT'  # Options: 'IMPORT', 'BOX'
 
@@ -21,15 +25,44 @@ NUMBER_OF_DIVISIONS = 4
 MESH_MAX_SIZE = 10.0
 MESH_MIN_SIZE = 0.0
 MESH_SIZE_FACTOR = 3.0
+# Optional lumping table written by layer_lumping.py. When set, the part is cut
+# at the boundaries of its groups of physical layers (one layer_i per simulated
+# layer) and NUMBER_OF_DIVISIONS is ignored. Use the same table for the .comm.
+LUMPING_TABLE_FILE = None
+# Tolerance (relative to the part height) used to find horizontal faces and
+# the faces on the bottom plane when building the face groups.
+FACE_TOLERANCE = 1e-5
+# Local mesh sizing: when True, every layer group gets its own GMSH sub-mesh
+# whose max size is graded geometrically from LAYER_MESH_SIZE_BOTTOM (layer 1)
+# to LAYER_MESH_SIZE_TOP (last layer, the current build height). Pick a top
+# size at or below the layer thickness to get elements through the thickness.
+# MESH_MAX_SIZE still applies to anything outside the layer groups.
+LAYER_MESH_GRADING = False
+LAYER_MESH_SIZE_BOTTOM = 10.0
+LAYER_MESH_SIZE_TOP = 1.0
 
 # --- 4. OUTPUT FILE ---
 OUTPUT_FILENAME = "salome_workflow_final.py"
 
+# --- BATCH MODE ---
+# True (or run with --batch): headless run without study publishing or GUI
+# refresh; the final mesh is exported to MED next to the generated script.
+BATCH_MODE = False
+
 # --- MAIN SCRIPT (No need to edit below this line) ---
 
-def generate_script():
-    """Generates the full, simplified, and corrected Salome script."""
-    print("--- Salome Universal Workflow Script Generator (Final Working Version) ---")
+def graded_layer_sizes(number_of_layers, bottom_size, top_size):
+    """Max mesh sizes from the bottom to the top layer, in geometric progression."""
+    if number_of_layers == 1:
+        return [top_size]
+    ratio = (top_size / bottom_size) ** (1.0 / (number_of_layers - 1))
+    return [round(bottom_size * ratio ** i, 6) for i in range(number_of_layers)]
+
+
+def build_script():
+    """Returns the text of the full Salome script (raises ValueError on a bad configuration)."""
+    batch_mode = BATCH_MODE or batch_requested()
+    med_file = result_filename(OUTPUT_FILENAME, ".med")
     
     # --- Generate geometry creation code ---
     geom_creation_code = ""
@@ -43,13 +76,64 @@ def generate_script():
         elif file_ext == '.brep':
             geom_creation_code = f'initial_solid = geompy.ImportBREP(r"{file_path_for_salome}")'
         else:
-            print(f"ERROR: Unsupported file type '{file_ext}'.")
-            return
+            raise ValueError(f"Unsupported file type '{file_ext}'.")
     elif GEOMETRY_TYPE == 'BOX':
         geom_creation_code = f'initial_solid = geompy.MakeBoxDXDYDZ({BOX_LENGTH}, {BOX_WIDTH}, {BOX_HEIGHT})'
     else:
-        print(f"ERROR: Invalid GEOMETRY_TYPE '{GEOMETRY_TYPE}'.")
-        return
+        raise ValueError(f"Invalid GEOMETRY_TYPE '{GEOMETRY_TYPE}'.")
+
+    # --- Generate partitioning code ---
+    if LUMPING_TABLE_FILE:
+        lumped_layers = load_lumping_table(LUMPING_TABLE_FILE)['layers']
+        cut_fractions = [layer['z_top'] for layer in lumped_layers[:-1]]
+        partition_code = f"""print("Partitioning solid into {len(lumped_layers)} lumped layers...")
+b_box = geompy.BoundingBox(initial_solid)
+z_min, z_max = b_box[4], b_box[5]
+cutting_tools = []
+plane_heights = []
+for fraction in {cut_fractions}:
+    plane = geompy.MakePlaneLCS(None, 2000, 1)
+    translated_plane = geompy.MakeTranslation(plane, 0, 0, z_min + fraction * (z_max - z_min))
+    cutting_tools.append(translated_plane)
+    plane_heights.append(z_min + fraction * (z_max - z_min))"""
+    else:
+        partition_code = f"""print("Partitioning solid into {NUMBER_OF_DIVISIONS} layers...")
+b_box = geompy.BoundingBox(initial_solid)
+z_min, z_max = b_box[4], b_box[5]
+layer_thickness = (z_max - z_min) / {NUMBER_OF_DIVISIONS}
+cutting_tools = []
+plane_heights = []
+for i in range(1, {NUMBER_OF_DIVISIONS}):
+    plane = geompy.MakePlaneLCS(None, 2000, 1)
+    translated_plane = geompy.MakeTranslation(plane, 0, 0, z_min + (i * layer_thickness))
+    cutting_tools.append(translated_plane)
+    plane_heights.append(z_min + (i * layer_thickness))"""
+
+    number_of_layers = len(lumped_layers) if LUMPING_TABLE_FILE else NUMBER_OF_DIVISIONS
+    if LAYER_MESH_GRADING:
+        layer_sizes = graded_layer_sizes(number_of_layers, LAYER_MESH_SIZE_BOTTOM, LAYER_MESH_SIZE_TOP)
+        print(f"Layer mesh sizes (bottom to top): {layer_sizes}")
+        layer_sizing_code = f"""
+# 1b. Local sizing: one GMSH sub-mesh per layer group, graded to the top
+layer_mesh_sizes = {layer_sizes}
+layer_sub_meshes = []
+for geom_group, size in zip(volume_geom_groups, layer_mesh_sizes):
+    layer_algo = Mesh_1.Tetrahedron(algo=smeshBuilder.GMSH, geom=geom_group)
+    layer_params = layer_algo.Parameters()
+    layer_params.SetMaxSize(size)
+    layer_params.SetMinSize({MESH_MIN_SIZE})
+    layer_params.SetSizeFactor({MESH_SIZE_FACTOR})
+    layer_sub_meshes.append(layer_algo.GetSubMesh())
+# Compute the finest (top) layers first so the shared faces get their size
+Mesh_1.SetMeshOrder([layer_sub_meshes[::-1]])
+print(f"Assigned {{len(layer_sub_meshes)}} layer sub-meshes.")
+"""
+    else:
+        layer_sizing_code = ""
+
+    face_groups_code = face_classification_code(
+        'Partition_1', 'all_solids_in_part', FACE_TOLERANCE,
+        {'bottom': 'bottom_surface', 'sides': 'sides', 'tops': 'tops'})
 
     # --- Assemble the final script ---
     script_content = f"""#!/usr/bin/env python
@@ -61,6 +145,7 @@ import salome
 salome.salome_init()
 import salome_notebook
 notebook = salome_notebook.NoteBook()
+import numpy as np
 
 ###
 ### GEOM component
@@ -69,45 +154,38 @@ import GEOM
 from salome.geom import geomBuilder
 geompy = geomBuilder.New()
 
+{publish_code(batch_mode)}
+
 print("--- Starting GEOM component ---")
 
 # 1. Create initial geometry
 print("Creating initial solid...")
 {geom_creation_code}
-geompy.addToStudy(initial_solid, 'initial_solid')
+publish(initial_solid, 'initial_solid')
 
 # 2. Partition the geometry
-print("Partitioning solid into {NUMBER_OF_DIVISIONS} layers...")
-b_box = geompy.BoundingBox(initial_solid)
-z_min, z_max = b_box[2], b_box[5]
-layer_thickness = (z_max - z_min) / {NUMBER_OF_DIVISIONS}
-cutting_tools = []
-for i in range(1, {NUMBER_OF_DIVISIONS}):
-    plane = geompy.MakePlaneLCS(None, 2000, 1)
-    translated_plane = geompy.MakeTranslation(plane, 0, 0, z_min + (i * layer_thickness))
-    cutting_tools.append(translated_plane)
+{partition_code}
 
 Partition_1 = geompy.MakePartition([initial_solid], cutting_tools, [], [], geompy.ShapeType["SOLID"], 0, [], 0)
-geompy.addToStudy(Partition_1, 'Partition_1')
+publish(Partition_1, 'Partition_1')
 print("Partition complete.")
 
 # 3. Create GEOM groups
 print("--- Creating GEOM groups ---")
-all_faces_in_part = geompy.SubShapeAll(Partition_1, geompy.ShapeType["FACE"])
-bottom_face_ids = [geompy.GetSubShapeID(Partition_1, face) for face in all_faces_in_part if abs(geompy.PointCoordinates(geompy.MakeCDG(face))[2] - z_min) < 1e-5]
-bottom_surface_group = geompy.CreateGroup(Partition_1, geompy.ShapeType["FACE"])
-geompy.UnionIDs(bottom_surface_group, bottom_face_ids)
-geompy.addToStudy(bottom_surface_group, "bottom_surface")
-print("Created GEOM group 'bottom_surface'")
-
 all_solids_in_part = geompy.SubShapeAll(Partition_1, geompy.ShapeType["SOLID"])
-layers_with_z = sorted([(geompy.PointCoordinates(geompy.MakeCDG(s))[2], s) for s in all_solids_in_part])
+{face_groups_code}
+
+# Bucket the solids into layers against the cutting planes, by the
+# mid-height of their bounding box (a layer may hold several solids)
+solid_ids = np.array(geompy.GetSubShapesIDs(Partition_1, all_solids_in_part))
+solid_z = np.array([sum(geompy.BoundingBox(s)[4:6]) / 2.0 for s in all_solids_in_part])
+layer_index = np.searchsorted(plane_heights, solid_z)
 volume_geom_groups = []
-for i, (z, shape) in enumerate(layers_with_z):
+for i in range(len(plane_heights) + 1):
     group_name = f"layer_{{i + 1}}"
     layer_group = geompy.CreateGroup(Partition_1, geompy.ShapeType["SOLID"])
-    geompy.UnionIDs(layer_group, [geompy.GetSubShapeID(Partition_1, shape)])
-    geompy.addToStudy(layer_group, group_name)
+    geompy.UnionIDs(layer_group, solid_ids[layer_index == i].tolist())
+    publish(layer_group, group_name)
     volume_geom_groups.append(layer_group)
     print(f"Created GEOM group: {{group_name}}")
 
@@ -118,6 +196,8 @@ print("\\n--- Starting SMESH component ---")
 import SMESH
 from salome.smesh import smeshBuilder
 smesh = smeshBuilder.New()
+if BATCH_MODE:
+    smesh.SetEnablePublish(False)
 
 # 1. Create Mesh and define parameters
 Mesh_1 = smesh.Mesh(Partition_1)
@@ -126,11 +206,12 @@ Gmsh_Params = GMSH_algo.Parameters()
 Gmsh_Params.SetMaxSize({MESH_MAX_SIZE})
 Gmsh_Params.SetMinSize({MESH_MIN_SIZE})
 Gmsh_Params.SetSizeFactor({MESH_SIZE_FACTOR})
-
+{layer_sizing_code}
 # 2. Create Mesh Groups from GEOM Groups
 print("Creating mesh groups...")
-Mesh_1.GroupOnGeom(bottom_surface_group, 'bottom_surface', SMESH.FACE)
-print("  - Created mesh group 'bottom_surface'")
+for group_name, geom_group in face_groups.items():
+    Mesh_1.GroupOnGeom(geom_group, group_name, SMESH.FACE)
+    print(f"  - Created mesh group '{{group_name}}'")
 for i, geom_group in enumerate(volume_geom_groups):
     group_name = f"layer_{{i + 1}}"
     Mesh_1.GroupOnGeom(geom_group, group_name, SMESH.VOLUME)
@@ -146,11 +227,22 @@ else:
     print("ERROR: Mesh computation failed.")
 
 # --- Finalize ---
-if salome.sg.hasDesktop():
-    salome.sg.updateObjBrowser()
+{finalize_code(med_file, 'Mesh_1')}
 
 print("\\nFull workflow script finished execution.")
 """
+    return script_content
+
+
+def generate_script():
+    """Generates the full, simplified, and corrected Salome script."""
+    print("--- Salome Universal Workflow Script Generator (Final Working Version) ---")
+    try:
+        script_content = build_script()
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+
     # Write the final script to a file
     try:
         with open(OUTPUT_FILENAME, "w") as f:
@@ -1,6 +1,8 @@
 # make_salome_script.py
 # This script generates a Salome Meca python script to create and mesh a cuboid.
 
+from salome_batch import batch_requested, finalize_code, publish_code, result_filename
+
 # --- USER INPUTS ---
 # --- You can change these values to define your cuboid ---
 
@@ -17,6 +19,10 @@ nz = 50  # Number of divisions in Z (this will also be the number of layers)
 # 3. Output file name
 output_filename = "generated_cuboid_script.py"
 
+# 4. Batch mode: True (or run with --batch) for a headless run without study
+#    publishing or GUI refresh; the mesh is exported to MED next to the script.
+batch_mode = False
+
 # --- END OF USER INPUTS ---
 
 
@@ -31,6 +37,9 @@ element_size_z = height_z / nz
 # Calculate the number of volume elements per layer
 elements_per_layer = nx * ny
 
+batch_mode = batch_mode or batch_requested()
+med_file = result_filename(output_filename, ".med")
+
 # --- Build the Layer Creation Code ---
 # We will create a loop in Python to generate the text for each layer group.
 layer_creation_code = ""
@@ -56,7 +65,7 @@ nbAdd = {layer_name}.Add( {element_ids} )"""
 all_group_names_str = ", ".join(all_layer_names)
 set_name_for_layers_code = ""
 for name in all_layer_names:
-    set_name_for_layers_code += f"smesh.SetName({name}, '{name}')\n"
+    set_name_for_layers_code += f"    smesh.SetName({name}, '{name}')\n"
 
 
 # --- Assemble the final Salome script using an f-string ---
@@ -87,16 +96,18 @@ import SALOMEDS
 
 geompy = geomBuilder.New()
 
+{publish_code(batch_mode)}
+
 O = geompy.MakeVertex(0, 0, 0)
 OX = geompy.MakeVectorDXDYDZ(1, 0, 0)
 OY = geompy.MakeVectorDXDYDZ(0, 1, 0)
 OZ = geompy.MakeVectorDXDYDZ(0, 0, 1)
 Box_1 = geompy.MakeBoxDXDYDZ({length_x}, {width_y}, {height_z})
-geompy.addToStudy( O, 'O' )
-geompy.addToStudy( OX, 'OX' )
-geompy.addToStudy( OY, 'OY' )
-geompy.addToStudy( OZ, 'OZ' )
-geompy.addToStudy( Box_1, 'Box_1' )
+publish( O, 'O' )
+publish( OX, 'OX' )
+publish( OY, 'OY' )
+publish( OZ, 'OZ' )
+publish( Box_1, 'Box_1' )
 
 ###
 ### SMESH component
@@ -106,6 +117,8 @@ import SMESH, SALOMEDS
 from salome.smesh import smeshBuilder
 
 smesh = smeshBuilder.New()
+if BATCH_MODE:
+    smesh.SetEnablePublish(False)
 Mesh_1 = smesh.Mesh(Box_1, 'Mesh_1')
 Cartesian_3D = Mesh_1.BodyFitted()
 
@@ -128,14 +141,14 @@ bottom = Mesh_1.CreateEmptyGroup( SMESH.NODE, 'bottom' )
 [ {all_group_names_str}, bottom ] = Mesh_1.GetGroups()
 
 ## Set names of Mesh objects
-smesh.SetName(Cartesian_3D.GetAlgorithm(), 'Cartesian_3D')
-smesh.SetName(Body_Fitting_Parameters_1, 'Body Fitting Parameters_1')
-smesh.SetName(Mesh_1.GetMesh(), 'Mesh_1')
-{set_name_for_layers_code.strip()}
-smesh.SetName(bottom, 'bottom')
-
-if salome.sg.hasDesktop():
-  salome.sg.updateObjBrowser()
+if not BATCH_MODE:
+    smesh.SetName(Cartesian_3D.GetAlgorithm(), 'Cartesian_3D')
+    smesh.SetName(Body_Fitting_Parameters_1, 'Body Fitting Parameters_1')
+    smesh.SetName(Mesh_1.GetMesh(), 'Mesh_1')
+    {set_name_for_layers_code.strip()}
+    smesh.SetName(bottom, 'bottom')
+
+{finalize_code(med_file, 'Mesh_1')}
 
 """
 
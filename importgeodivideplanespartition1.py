@@ -3,6 +3,8 @@
 #  This script WRITES another Python script that you can run in Salome.
 # =============================================================================
 
+from salome_batch import batch_requested, finalize_code, publish_code, result_filename
+
 # --- CONFIGURATION ---
 # The total height of your geometry. Based on your example (25, 50, 75 for 4 layers),
 # the total height is 100. Change this if your box has a different height.
@@ -14,6 +16,10 @@ TOTAL_HEIGHT = 100.0
 # The name of the file that this script will create.
 OUTPUT_FILENAME = "salome_partition_script.py"
 
+# True (or run with --batch): headless run; only the final partition is
+# published, and the study is saved next to the generated script.
+BATCH_MODE = False
+
 # --- MAIN SCRIPT ---
 
 def generate_script():
@@ -35,6 +41,9 @@ def generate_script():
     # Replace single backslashes with forward slashes for Python/Salome compatibility
     #brep_path_for_salome = brep_path.replace('\\', '/')
 
+    batch_mode = BATCH_MODE or batch_requested()
+    study_file = result_filename(OUTPUT_FILENAME, ".hdf")
+
     print("-" * 40)
     print(f"Generating script '{OUTPUT_FILENAME}' for {num_divisions} divisions...")
 
@@ -57,6 +66,8 @@ import SALOMEDS
 
 geompy = geomBuilder.New()
 
+{publish_code(batch_mode)}
+
 # --- GEOMETRY DEFINITION ---
 O = geompy.MakeVertex(0, 0, 0)
 OX = geompy.MakeVectorDXDYDZ(1, 0, 0)
@@ -98,16 +109,16 @@ Partition_1 = geompy.MakePartition([Box_1_brep_1], [{translations_list_str}], []
 
 # --- ADD OBJECTS TO STUDY ---
 # (Group creation is commented out below as requested)
-geompy.addToStudy( O, 'O' )
-geompy.addToStudy( OX, 'OX' )
-geompy.addToStudy( OY, 'OY' )
-geompy.addToStudy( OZ, 'OZ' )
-geompy.addToStudy( Box_1_brep_1, 'Box_1.brep_1' )
-geompy.addToStudy( Plane_1, 'Plane_1' )
+publish( O, 'O' )
+publish( OX, 'OX' )
+publish( OY, 'OY' )
+publish( OZ, 'OZ' )
+publish( Box_1_brep_1, 'Box_1.brep_1' )
+publish( Plane_1, 'Plane_1' )
 """
     # Add all the translation objects to the study
     for var_name in translation_variable_names:
-        script_content += f"geompy.addToStudy( {var_name}, '{var_name}' )\n"
+        script_content += f"publish( {var_name}, '{var_name}' )\n"
 
     script_content += f"""geompy.addToStudy( Partition_1, 'Partition_1' )
 
@@ -127,8 +138,7 @@ geompy.addToStudy( Plane_1, 'Plane_1' )
 # geompy.addToStudyInFather( Partition_1, layer1, 'layer1' )
 # =================================================================
 
-if salome.sg.hasDesktop():
-  salome.sg.updateObjBrowser()
+{finalize_code(study_file)}
 
 print("\\nScript finished execution.")
 """
@@ -0,0 +1,99 @@
+# ==============================================================================
+#      Layer Lumping Table: N Physical Layers -> M Simulation Layers
+# ==============================================================================
+#
+# A real LPBF part has thousands of 30-60 um layers, but every simulated layer
+# costs a model, a thermal and a mechanical solve. Lumping activates groups of
+# K physical layers at once, so N physical layers become M = ceil(N / K)
+# simulation layers (the last group may hold fewer layers).
+#
+# The table written by this script is read by BOTH sides of the workflow so
+# they always agree:
+#   - geo_and_mesh_with_groups_final.py cuts the part at the group boundaries
+#     (LUMPING_TABLE_FILE) instead of at NUMBER_OF_DIVISIONS equal heights.
+#   - comm_for_ti64_and_substrate_with_time_stepping takes the number of layers,
+#     their time windows and activation temperatures from it (lumping_table_file).
+#
+# Scaling of a lumped layer of K physical layers:
+#   - Time window: K * physical_layer_time (the dwell of all its layers).
+#   - Heights:     the group spans physical layers first..last, stored as
+#                  fractions of the part height (z_bottom, z_top).
+#   - Activation temperature: by the time the group is complete, its physical
+#     layers have cooled for 0..K-1 dwell periods. With a retained fraction r of
+#     the superheat per dwell period, the group starts at
+#         T_base + (T_melt - T_base) * mean(r**k for k = 0..K-1)
+#     r = 1.0 keeps the melt temperature.
+#
+# --- HOW TO USE ---
+# 1. Set the parameters below and run:  python layer_lumping.py
+# 2. Point LUMPING_TABLE_FILE / lumping_table_file of the generators at the
+#    written JSON file.
+#
+# ==============================================================================
+
+import json
+import math
+
+# --- CONFIGURATION ---
+NUM_PHYSICAL_LAYERS = 2000     # Layers of the real build
+LAYERS_PER_GROUP = 100         # Physical layers activated together (K)
+PHYSICAL_LAYER_TIME = 10.0     # Dwell / cooling time of one physical layer (s)
+MELT_TEMP = 1605.0             # Temperature of a freshly melted layer (K)
+BASEPLATE_TEMP = 373.15        # Constant temperature of the bottom plate (K)
+HEAT_RETENTION = 1.0           # Superheat fraction retained per dwell period
+OUTPUT_FILENAME = "layer_lumping.json"
+
+
+def build_lumping_table(num_physical_layers, layers_per_group, physical_layer_time,
+                        melt_temp, baseplate_temp, heat_retention=1.0):
+    """
+    Groups `num_physical_layers` layers into simulation layers of
+    `layers_per_group` layers and returns the lumping table as a dict.
+    """
+    num_groups = math.ceil(num_physical_layers / layers_per_group)
+    layers = []
+    time_start = 0.0
+    for g in range(num_groups):
+        first = g * layers_per_group + 1
+        last = min((g + 1) * layers_per_group, num_physical_layers)
+        count = last - first + 1
+        retained = sum(heat_retention ** k for k in range(count)) / count
+        time_end = time_start + count * physical_layer_time
+        layers.append({
+            'layer': g + 1,
+            'first_physical': first,
+            'last_physical': last,
+            'z_bottom': (first - 1) / num_physical_layers,
+            'z_top': last / num_physical_layers,
+            'time_start': time_start,
+            'time_end': time_end,
+            'melt_temp': baseplate_temp + (melt_temp - baseplate_temp) * retained,
+        })
+        time_start = time_end
+
+    return {
+        'num_physical_layers': num_physical_layers,
+        'layers_per_group': layers_per_group,
+        'physical_layer_time': physical_layer_time,
+        'layers': layers,
+    }
+
+
+def write_lumping_table(table, filename):
+    """Writes the lumping table as JSON."""
+    with open(filename, 'w') as f:
+        json.dump(table, f, indent=2)
+
+
+def load_lumping_table(filename):
+    """Reads a lumping table written by write_lumping_table()."""
+    with open(filename) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    table = build_lumping_table(NUM_PHYSICAL_LAYERS, LAYERS_PER_GROUP, PHYSICAL_LAYER_TIME,
+                                MELT_TEMP, BASEPLATE_TEMP, HEAT_RETENTION)
+    write_lumping_table(table, OUTPUT_FILENAME)
+    print(f"Lumped {NUM_PHYSICAL_LAYERS} physical layers into {len(table['layers'])} simulation layers.")
+    print(f"Lumping table written to: {OUTPUT_FILENAME}")
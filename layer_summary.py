@@ -0,0 +1,150 @@
+# ==============================================================================
+#      Per-Layer Summary Statistics of All Result Files (Parallel)
+# ==============================================================================
+#
+# Scans every ther{i}.rmed / mec{i}.rmed file of a run and writes ONE table with
+# the statistics of each result, layer and time step: min, max, mean and
+# percentiles over the nodes. This is the distortion/stress/temperature report
+# of a build, without opening the files one by one in ParaView.
+#
+# The files are read with rmed_reader.py (h5py, memory-mapped arrays) and
+# scanned in a ProcessPoolExecutor, one task per file: all the results of a
+# file (DEPL, SXX, ..., VMIS of mec{i}.rmed) are computed in the same task.
+# The results are those of RESULT_CONFIG in result_animation_save_3.py (or any
+# library with the same entries passed to summarize_run()).
+#
+# --- HOW TO USE ---
+# 1. Set RESULTS_PATH and NUM_FILES below (or pass the path as argument).
+# 2. Run: python layer_summary.py [results_path]
+# 3. Open OUTPUT_FILE: one row per layer, result and time step.
+#    A .parquet output file needs pandas (with pyarrow); .csv needs nothing.
+#
+# ==============================================================================
+
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from result_animation_save_3 import RESULT_CONFIG
+from rmed_reader import component_values, field_steps, open_rmed, read_field, result_field
+
+# --- CONFIGURATION ---
+
+# Directory containing the ther{i}.rmed / mec{i}.rmed files
+RESULTS_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run"
+
+# Number of layer files (layers 1..NUM_FILES)
+NUM_FILES = 20
+
+# Results to summarize (keys of RESULT_CONFIG in result_animation_save_3.py)
+SUMMARY_KEYS = ['TEMP', 'DEPL', 'SXX', 'SYY', 'SZZ', 'VMIS']
+
+# Percentiles computed over the nodes of every step
+PERCENTILES = [50, 95, 99]
+
+# Summary table written into RESULTS_PATH (.csv or .parquet)
+OUTPUT_FILE = "layer_summary.csv"
+
+# Number of worker processes (None: one per CPU)
+MAX_WORKERS = None
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+def summary_columns(percentiles=PERCENTILES):
+    """Column names of the summary table."""
+    return (['layer', 'result', 'field', 'component', 'step', 'time', 'nodes', 'min', 'max', 'mean']
+            + [f"p{p:g}" for p in percentiles])
+
+
+def result_specs(result_keys, result_config=RESULT_CONFIG):
+    """{key: RESULT_CONFIG entry} of the given keys; ValueError for an unknown key."""
+    unknown = [key for key in result_keys if key not in result_config]
+    if unknown:
+        raise ValueError(f"Unknown result key(s) {unknown}. Please choose from {list(result_config)}")
+    return {key: result_config[key] for key in result_keys}
+
+
+def summarize_file(path, layer, results, percentiles=PERCENTILES):
+    """Statistics rows of the given results ({key: RESULT_CONFIG entry}) for every time step of one .rmed file."""
+    rows = []
+    with open_rmed(path) as med:
+        for result_key, result in results.items():
+            name = result_field(med, result, layer)
+            for step, number, step_time in field_steps(med, name):
+                values, components, _ = read_field(med, name, step)
+                data = np.asarray(component_values(values, components, result['component']), dtype=float)
+                rows.append([layer, result_key, name, result['component'] or '', number, step_time, data.size,
+                             data.min(), data.max(), data.mean()] + list(np.percentile(data, percentiles)))
+    return rows
+
+
+def layer_tasks(results_path, num_files, results):
+    """One (path, layer, {key: RESULT_CONFIG entry}) task per existing result file."""
+    by_basename = {}
+    for result_key, result in results.items():
+        by_basename.setdefault(result['file_basename'], {})[result_key] = result
+    tasks, missing = [], []
+    for layer in range(1, num_files + 1):
+        for basename, file_results in by_basename.items():
+            path = os.path.join(results_path, f"{basename}{layer}.rmed")
+            (tasks if os.path.isfile(path) else missing).append((path, layer, file_results))
+    return tasks, missing
+
+
+def _pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise RuntimeError("pandas (with pyarrow) is needed for a Parquet summary, or use a .csv OUTPUT_FILE.")
+    return pandas
+
+
+def write_summary(rows, output_file, percentiles=PERCENTILES):
+    """Writes the rows as CSV, or Parquet when output_file ends with .parquet."""
+    columns = summary_columns(percentiles)
+    if output_file.lower().endswith('.parquet'):
+        _pandas().DataFrame(rows, columns=columns).to_parquet(output_file, index=False)
+        return
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows([f"{value:.9g}" if isinstance(value, float) else value for value in row] for row in rows)
+
+
+def summarize_run(results_path=RESULTS_PATH, num_files=NUM_FILES, result_keys=SUMMARY_KEYS,
+                  output_file=OUTPUT_FILE, max_workers=MAX_WORKERS, result_config=RESULT_CONFIG):
+    """Scans all layer files in parallel and writes the summary table. Returns its path."""
+    results = result_specs(result_keys, result_config)
+    if output_file.lower().endswith('.parquet'):
+        _pandas()  # fail before the scan, not after it
+
+    tasks, missing = layer_tasks(results_path, num_files, results)
+    for path, _, _ in missing:
+        print(f"  WARNING: missing result file {path}")
+    print(f"Summarizing {len(tasks)} result files of {num_files} layers...")
+
+    start = time.perf_counter()
+    rows, failed = [], 0
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(summarize_file, path, layer, file_results): path for path, layer, file_results in tasks}
+        for future in as_completed(futures):
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                failed += 1
+                print(f"  ERROR: {os.path.basename(futures[future])}: {type(e).__name__}: {e}")
+    rows.sort(key=lambda row: (row[0], result_keys.index(row[1]), row[4]))
+
+    output_path = os.path.join(results_path, output_file)
+    write_summary(rows, output_path)
+    print(f"Wrote {len(rows)} rows ({len(tasks) - failed}/{len(tasks)} files) to '{output_path}' "
+          f"in {time.perf_counter() - start:.1f} s")
+    return output_path
+
+
+if __name__ == "__main__":
+    summarize_run(sys.argv[1] if len(sys.argv) > 1 else RESULTS_PATH)
@@ -0,0 +1,155 @@
+# ==============================================================================
+#      Material Library for the Code_Aster Command File Generators
+# ==============================================================================
+#
+# The temperature-dependent material tables (Young's modulus, Poisson ratio,
+# conductivities, RHO_CP, yield stress, ...) used to be pasted as long string
+# literals into every .comm generator. They now live here, once, as NumPy
+# tables with the fields ('temp', 'value').
+#
+# render_material() turns a material into the DEFI_FONCTION / DEFI_MATERIAU
+# text of the .comm preamble:
+#
+#   - Each distinct table is emitted ONCE. A function whose table is identical
+#     to an earlier one (e.g. kappa_Y == kappa_X for an in-plane isotropic
+#     conductivity) is emitted as a plain alias:  kappa_Y = kappa_X
+#   - With a resample tolerance > 0, every table is reduced to the fewest
+#     points whose piecewise-linear interpolation stays within
+#     tolerance * max|value| of the full table (fewer points, cheaper
+#     interpolation at every Gauss point and every iteration).
+#   - The rendered text is cached per (material, tolerance), so a generator
+#     (or a sweep of generators) renders each material only once.
+#
+# --- HOW TO USE ---
+#   from material_library import render_material
+#   add_line(render_material('TI64', resample_tolerance=0.0))
+#
+# ==============================================================================
+
+from functools import lru_cache
+
+import numpy as np
+
+# Every function table has these fields
+TABLE_DTYPE = np.dtype([('temp', 'f8'), ('value', 'f8')])
+
+
+def make_table(vale):
+    """Builds a table from a flat DEFI_FONCTION VALE sequence (x1, y1, x2, y2, ...)."""
+    values = np.asarray(vale, dtype=float).reshape(-1, 2)
+    table = np.empty(len(values), dtype=TABLE_DTYPE)
+    table['temp'] = values[:, 0]
+    table['value'] = values[:, 1]
+    return table
+
+
+# Material name -> {'functions': {function name: table}, 'mater': DEFI_MATERIAU text}.
+# The functions are emitted in this order, so aliases always follow their target.
+MATERIALS = {
+    # Ti-6Al-4V with orthotropic conduction and temperature-dependent
+    # hardening (comm_with_last_cooling_analysis, comm_for_ti64_*).
+    'TI64': {
+        'functions': {
+            'youngmo1': make_table((1.0, 107000.0, 293.15, 107000.0, 373.15, 103400.0, 473.15, 99510.0, 573.15, 93710.0, 673.15, 85500.0, 773.15, 74710.0, 873.15, 61840.0, 973.15, 48160.0, 1073.15, 35290.0, 1173.15, 24500.0, 1273.15, 16290.0, 1373.15, 10490.0, 1473.15, 6610.0, 1573.15, 4106.0, 1673.15, 2528.0, 1773.15, 1547.0, 1873.15, 943.5, 1878.15, 1.0)),
+            'poiss1': make_table((1.0, 0.323, 293.15, 0.323, 373.15, 0.328, 473.15, 0.334, 573.15, 0.339, 673.15, 0.345, 773.15, 0.351, 873.15, 0.357, 973.15, 0.363, 1073.15, 0.369, 1173.15, 0.374, 1273.15, 0.380, 1373.15, 0.386, 1473.15, 0.392, 1573.15, 0.398, 1673.15, 0.403, 1773.15, 0.409, 1873.15, 0.415)),
+            'alpha1': make_table((1.0, 6.5e-06, 40.0, 6.5e-06, 100.0, 7.1e-06, 293.0, 8.9e-06, 400.0, 9.7e-06, 600.0, 1.08e-05, 800.0, 1.14e-05, 900.0, 1.16e-05, 1100.0, 1.16e-05)),
+            'rho1': make_table((1.0, 4.405e-09, 293.15, 4.405e-09, 1500.15, 4.243e-09, 2050.15, 4.189e-09, 2150.15, 3.865e-09, 2400.15, 3.730e-09, 2773.15, 3.730e-09)),
+            'kappa_X': make_table((1.0, 8.11, 293.15, 8.11, 373.15, 7.74, 473.15, 7.52, 573.15, 7.55, 673.15, 7.81, 773.15, 8.29, 873.15, 8.96, 973.15, 9.81, 1073.15, 10.82, 1173.15, 11.98, 1273.15, 13.26, 1373.15, 14.65, 1473.15, 16.13, 1573.15, 17.69, 1673.15, 19.29, 1773.15, 20.93, 1873.15, 22.6, 1923.15, 28.53, 1973.15, 29.45, 2073.15, 31.28, 2173.15, 33.11, 2223.15, 34.02)),
+            'kappa_Y': make_table((1.0, 8.11, 293.15, 8.11, 373.15, 7.74, 473.15, 7.52, 573.15, 7.55, 673.15, 7.81, 773.15, 8.29, 873.15, 8.96, 973.15, 9.81, 1073.15, 10.82, 1173.15, 11.98, 1273.15, 13.26, 1373.15, 14.65, 1473.15, 16.13, 1573.15, 17.69, 1673.15, 19.29, 1773.15, 20.93, 1873.15, 22.6, 1923.15, 28.53, 1973.15, 29.45, 2073.15, 31.28, 2173.15, 33.11, 2223.15, 34.02)),
+            'kappa_Z': make_table((1.0, 7.01, 293.15, 7.01, 373.15, 7.34, 473.15, 8.02, 573.15, 8.95, 673.15, 10.07, 773.15, 11.36, 873.15, 12.75, 973.15, 14.21, 1073.15, 15.68, 1173.15, 17.14, 1273.15, 18.52, 1373.15, 19.78, 1473.15, 20.88, 1573.15, 21.77, 1673.15, 22.42, 1773.15, 22.76, 1873.15, 22.76, 1923.15, 28.53, 1973.15, 29.45, 2073.15, 31.28, 2173.15, 33.11, 2223.15, 34.02)),
+            'rhocp1': make_table((1.0, 2.56e-03, 300.0, 2.56e-03, 400.0, 2.64e-03, 500.0, 2.72e-03, 600.0, 2.81e-03, 700.0, 2.91e-03, 800.0, 3.01e-03, 900.0, 3.11e-03, 1000.0, 3.22e-03, 1100.0, 3.32e-03, 1200.0, 3.42e-03, 1300.0, 3.50e-03, 1400.0, 3.57e-03, 1500.0, 3.63e-03, 1600.0, 3.67e-03, 1700.0, 3.70e-03, 1800.0, 3.70e-03, 1900.0, 3.70e-03, 1950.0, 3.70e-03)),
+            'sy_vs_temp': make_table((1.0, 1098.0, 293.15, 1098.0, 477.15, 844.0, 700.15, 663.0, 811.15, 527.0, 1088.15, 60.0, 1217.15, 21.0, 1878.15, 0.1)),
+            'harden_mod': make_table((1.0, 1332.0, 293.15, 1332.0, 477.15, 1207.0, 700.15, 1033.0, 811.15, 943.0, 1088.15, 708.0, 1217.15, 596.0, 1878.15, 0.1)),
+        },
+        'mater': """mater1 = DEFI_MATERIAU(
+    ELAS_FO=_F(
+        E=youngmo1,
+        NU=poiss1,
+        RHO=rho1,
+        ALPHA=alpha1,
+        TEMP_DEF_ALPHA=293.0,
+    ),
+    THER_NL_ORTH=_F(
+        RHO_CP=rhocp1,
+        LAMBDA_L=kappa_X,
+        LAMBDA_T=kappa_Y,
+        LAMBDA_N=kappa_Z,
+    ),
+    ECRO_LINE_FO=_F(
+        SY=sy_vs_temp,
+        D_SIGM_EPSI=harden_mod,
+    ),
+)\n""",
+    },
+    # Ti-6Al-4V with isotropic conduction and constant hardening, as in the
+    # original two-layer command file (generatecommpart3.py).
+    'TI64_ISOTROPIC': {
+        'functions': {
+            'kappa1': make_table((430.0, 5.957, 1270.0, 17.0, 1383.0, 19.87, 1799.0, 21.9, 1801.0, 28.8, 2666.0, 42.2)),
+            'rhocp1': make_table((293.0, 2.435, 873.0, 2.958, 1799.0, 3.149, 1801.0, 4.616, 2073.0, 4.532, 2573.0, 4.278)),
+            'youngmo1': make_table((300.0, 107000.0, 600.0, 99000.0, 800.0, 90000.0, 1000.0, 80000.0, 1200.0, 70000.0)),
+            'poiss1': make_table((300.0, 0.32, 600.0, 0.31, 800.0, 0.3, 1000.0, 0.29, 1200.0, 0.28)),
+            'rho1': make_table((293.0, 4.15e-06, 973.0, 4.35e-06, 1799.0, 4.15e-06, 1801.0, 4.1e-06, 2073.0, 4e-06, 2573.0, 3.8e-06)),
+            'alpha1': make_table((300.0, 8.9e-06, 600.0, 9.2e-06, 800.0, 9.5e-06, 1000.0, 9.8e-06, 1200.0, 1e-05)),
+        },
+        'mater': "mater1 = DEFI_MATERIAU(ECRO_LINE=_F(D_SIGM_EPSI=3000.0, EPSI_LIM=0.01, SY=950.0), ELAS_FO=_F(ALPHA=alpha1, E=youngmo1, NU=poiss1, RHO=rho1, TEMP_DEF_ALPHA=300.0), THER_NL=_F(LAMBDA=kappa1, RHO_CP=rhocp1))\n",
+    },
+}
+
+
+def material_table(material, function):
+    """Returns the table of one function of a material."""
+    return MATERIALS[material]['functions'][function]
+
+
+def resample_table(table, tolerance):
+    """
+    Returns the smallest subset of the table points (always keeping both end
+    points) whose piecewise-linear interpolation stays within
+    tolerance * max|value| of the full table at every original point.
+    """
+    if tolerance <= 0 or len(table) <= 2:
+        return table
+    temp, value = table['temp'], table['value']
+    limit = tolerance * np.max(np.abs(value))
+
+    # Greedy: from each kept point, jump to the furthest point that still
+    # keeps every skipped point within the limit.
+    kept = [0]
+    start = 0
+    while start < len(table) - 1:
+        end = start + 1
+        for candidate in range(start + 2, len(table)):
+            between = slice(start + 1, candidate)
+            approx = np.interp(temp[between], temp[[start, candidate]], value[[start, candidate]])
+            if np.max(np.abs(approx - value[between])) > limit:
+                break
+            end = candidate
+        kept.append(end)
+        start = end
+    return table[kept]
+
+
+def _format_vale(table):
+    """Renders a table as a flat 'x1, y1, x2, y2, ...' VALE string."""
+    return ", ".join(f"{float(t)!r}, {float(v)!r}" for t, v in table)
+
+
+@lru_cache(maxsize=None)
+def render_material(material, resample_tolerance=0.0):
+    """
+    Returns the DEFI_FONCTION and DEFI_MATERIAU commands of a material as
+    .comm text. Identical tables are emitted once and aliased.
+    """
+    lines = []
+    emitted = []  # (function name, table) of the functions emitted so far
+    for name, table in MATERIALS[material]['functions'].items():
+        table = resample_table(table, resample_tolerance)
+        alias = next((other for other, other_table in emitted if np.array_equal(other_table, table)), None)
+        if alias:
+            lines.append(f"{name} = {alias}")
+            continue
+        lines.append(f"{name} = DEFI_FONCTION(NOM_PARA='TEMP', PROL_DROITE='CONSTANT', PROL_GAUCHE='CONSTANT', VALE=({_format_vale(table)}))")
+        emitted.append((name, table))
+    lines.append(MATERIALS[material]['mater'])
+    return "\n".join(lines)
@@ -0,0 +1,236 @@
+# ==============================================================================
+#      Parameter Sweep: Salome, .comm and ParaView Scripts for Many Variants
+# ==============================================================================
+#
+# Every generator in this folder is driven by module-level constants
+# (NUMBER_OF_DIVISIONS, MESH_MAX_SIZE, time_per_layer, initial_melt_temp...).
+# Instead of editing and rerunning a generator for every variant, describe the
+# variants in a YAML or JSON sweep file and run:
+#
+#     python parameter_sweep.py sweep.yaml
+#
+# Each combination of the grid values is one case. A case gets its own
+# directory (<OUTPUT_DIR>/case_0001, ...) in which every generator runs with
+# the case's values, and a manifest.json recording the parameters, the files
+# each generator wrote and its console log. The cases run in parallel in a
+# ProcessPoolExecutor; a sweep_manifest.json in OUTPUT_DIR lists them all.
+#
+# The generators are not modified: the first top-level assignment of each
+# swept constant is replaced in the generator's source before it is run as
+# a script, so a misspelt name is reported instead of silently ignored.
+#
+# --- SWEEP FILE ---
+#   generators:            # stage name -> generator script (relative to the sweep file)
+#     salome: geo_and_mesh_with_groups_final.py
+#     comm: comm_for_ti64_and_substrate_with_time_stepping
+#     paraview: result_animation_save_3.py
+#   fixed:                 # same value in every case
+#     comm.time_stepping: ADAPTIVE
+#   grid:                  # every combination of these values is a case
+#     salome.NUMBER_OF_DIVISIONS, comm.num_layers, paraview.num_files: [10, 20, 40]
+#     comm.time_per_layer: [5, 10]
+#
+# A grid key may list several 'stage.CONSTANT' targets separated by commas;
+# they all take the same value (e.g. the layer count of the mesh and the .comm).
+# The example above makes 3 x 2 = 6 cases. See sweep_example.yaml.
+#
+# An optional top-level 'cache: <dir>' runs the generators through the
+# content-addressed cache of artifact_cache.py: unchanged cases are skipped.
+#
+# ==============================================================================
+
+import ast
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# --- CONFIGURATION ---
+
+# Sweep file used when none is given on the command line
+SWEEP_FILE = "sweep_example.yaml"
+
+# Directory receiving one sub-directory per case
+OUTPUT_DIR = "sweep_cases"
+
+# Number of worker processes (None: one per CPU)
+MAX_WORKERS = None
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+def load_sweep(path):
+    """Reads a YAML (.yaml/.yml) or JSON sweep file."""
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("PyYAML is needed for YAML sweep files (pip install pyyaml), or use JSON.")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _split_targets(key):
+    """'salome.N, comm.n' -> [('salome', 'N'), ('comm', 'n')]"""
+    targets = []
+    for target in key.split(','):
+        stage, _, name = target.strip().partition('.')
+        if not name:
+            raise ValueError(f"Sweep parameter '{target.strip()}' must be written as 'stage.CONSTANT'.")
+        targets.append((stage, name))
+    return targets
+
+
+def expand_cases(sweep):
+    """
+    Returns one dict per case: {'case': 'case_0001', 'parameters': {key: value},
+    'overrides': {stage: {CONSTANT: value}}}.
+    """
+    generators = sweep['generators']
+    fixed = sweep.get('fixed') or {}
+    grid = sweep.get('grid') or {}
+    for key in list(fixed) + list(grid):
+        for stage, _ in _split_targets(key):
+            if stage not in generators:
+                raise ValueError(f"Sweep parameter '{key}' uses unknown stage '{stage}'.")
+
+    cases = []
+    for index, values in enumerate(itertools.product(*grid.values()), start=1):
+        parameters = dict(fixed)
+        parameters.update(zip(grid.keys(), values))
+        overrides = {stage: {} for stage in generators}
+        for key, value in parameters.items():
+            for stage, name in _split_targets(key):
+                overrides[stage][name] = value
+        cases.append({'case': f"case_{index:04d}", 'parameters': parameters, 'overrides': overrides})
+    return cases
+
+
+def override_constants(source, overrides, filename):
+    """
+    Returns the generator's code with the first top-level assignment of every
+    constant in `overrides` replaced by the given value.
+    """
+    tree = ast.parse(source, filename)
+    remaining = dict(overrides)
+    for node in tree.body:
+        if isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [t.id for t in targets if isinstance(t, ast.Name)]
+            if len(names) == 1 and names[0] in remaining:
+                node.value = ast.copy_location(ast.parse(repr(remaining.pop(names[0])), mode='eval').body, node.value)
+    if remaining:
+        raise ValueError(f"'{os.path.basename(filename)}' has no top-level constant(s) {sorted(remaining)}.")
+    return compile(ast.fix_missing_locations(tree), filename, 'exec')
+
+
+def run_generator(path, overrides, workdir, log):
+    """
+    Runs one generator script as __main__ in `workdir` with its constants
+    overridden, printing into the `log` stream. Returns the files it wrote.
+    """
+    with open(path) as f:
+        code = override_constants(f.read(), overrides, path)
+
+    def snapshot():
+        return {name: os.stat(os.path.join(workdir, name)).st_mtime_ns for name in os.listdir(workdir)}
+
+    before = snapshot()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(log):
+            exec(code, {'__name__': '__main__', '__file__': path})
+    finally:
+        os.chdir(cwd)
+    after = snapshot()
+    return sorted(name for name, mtime in after.items() if before.get(name) != mtime)
+
+
+def run_case(case, generators, output_dir, cache_dir=None):
+    """
+    Generates every stage of one case in its own directory and writes its
+    manifest. With a `cache_dir`, unchanged stages are taken from the cache.
+    """
+    case_dir = os.path.join(output_dir, case['case'])
+    os.makedirs(case_dir, exist_ok=True)
+    # The generators import their helper modules from their own folder
+    for path in generators.values():
+        if os.path.dirname(path) not in sys.path:
+            sys.path.insert(0, os.path.dirname(path))
+
+    manifest = {'case': case['case'], 'parameters': case['parameters'], 'stages': {}, 'status': 'done'}
+    for stage, path in generators.items():
+        entry = {'generator': path, 'overrides': case['overrides'][stage]}
+        log = io.StringIO()
+        start = time.perf_counter()
+        try:
+            if cache_dir:
+                from artifact_cache import cached_generate
+                entry['key'], entry['outputs'], entry['cache'] = cached_generate(
+                    path, case['overrides'][stage], case_dir, cache_dir, log)
+            else:
+                entry['outputs'] = run_generator(path, case['overrides'][stage], case_dir, log)
+            entry['status'] = 'done'
+        except (Exception, SystemExit) as e:  # some generators call exit() on bad input
+            entry['outputs'] = []
+            entry['status'] = 'failed'
+            entry['error'] = f"{type(e).__name__}: {e}"
+            manifest['status'] = 'failed'
+        entry['seconds'] = round(time.perf_counter() - start, 3)
+        entry['log'] = f"{stage}.log"
+        with open(os.path.join(case_dir, entry['log']), 'w') as f:
+            f.write(log.getvalue())
+        manifest['stages'][stage] = entry
+
+    with open(os.path.join(case_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def run_sweep(sweep_file, output_dir=OUTPUT_DIR, max_workers=MAX_WORKERS):
+    """Runs all cases of a sweep file in parallel. Returns the sweep manifest."""
+    sweep = load_sweep(sweep_file)
+    base_dir = os.path.dirname(os.path.abspath(sweep_file))
+    generators = {stage: os.path.abspath(os.path.join(base_dir, path)) for stage, path in sweep['generators'].items()}
+    for stage, path in generators.items():
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Generator of stage '{stage}' not found: {path}")
+
+    cases = expand_cases(sweep)
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    cache_dir = os.path.join(base_dir, sweep['cache']) if sweep.get('cache') else None
+    print(f"Running {len(cases)} cases x {len(generators)} generators into '{output_dir}'...")
+
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_case, case, generators, output_dir, cache_dir): case['case'] for case in cases}
+        for future in as_completed(futures):
+            manifest = future.result()
+            results[manifest['case']] = manifest
+            failed = [stage for stage, entry in manifest['stages'].items() if entry['status'] != 'done']
+            print(f"  {manifest['case']}: {manifest['status']}" + (f" ({', '.join(failed)})" if failed else ""))
+
+    sweep_manifest = {
+        'sweep_file': os.path.abspath(sweep_file),
+        'generators': generators,
+        'cases': [{'case': case['case'], 'parameters': case['parameters'], 'status': results[case['case']]['status']}
+                  for case in cases],
+    }
+    with open(os.path.join(output_dir, "sweep_manifest.json"), 'w') as f:
+        json.dump(sweep_manifest, f, indent=2)
+
+    failed = sum(1 for case in sweep_manifest['cases'] if case['status'] != 'done')
+    print(f"Generated {len(cases) - failed}/{len(cases)} cases in {time.perf_counter() - start:.1f} s "
+          f"(manifest: {os.path.join(output_dir, 'sweep_manifest.json')})")
+    return sweep_manifest
+
+
+if __name__ == "__main__":
+    run_sweep(sys.argv[1] if len(sys.argv) > 1 else SWEEP_FILE)
@@ -0,0 +1,334 @@
+# ==============================================================================
+#      End-to-End Pipeline: STL -> Geometry -> Mesh -> .comm -> Solve -> Post
+# ==============================================================================
+#
+# Replaces the YACS workflows (yacs_geom_and_mesh.xml, yacs_geometry_creation.xml),
+# whose geometry/mesh code lives in CDATA nodes with the parameters in a
+# datanode. Here the chain is a small YAML/JSON file over the existing
+# generators, and runs with:
+#
+#     python pipeline.py pipeline_example.yaml            (real tools)
+#     python pipeline.py pipeline_example.yaml --offline  (local stand-ins)
+#
+# A pipeline is a DAG of stages of two kinds:
+#   generator stages  run a generator of this folder with a 'config' of
+#                     constants (a Salome script, a .comm, a ParaView script);
+#   run stages        run an executor (Salome, Code_Aster, pvbatch...) on the
+#                     'input' file, usually the output of a generator stage.
+# A stage runs after the stages in its 'after' list and the stage named by its
+# 'input'. In config values, {case_dir} and {pipeline_dir} are replaced by
+# the case directory and the directory of the pipeline file.
+#
+# Caching: generator stages go through artifact_cache.py. A run stage is keyed
+# on its executor, its input file and the files produced by the stages it
+# depends on; when the key is unchanged and its outputs are intact (recorded in
+# <case>/pipeline_state.json), it is skipped. Editing the .comm generator thus
+# reruns the solve and the post-processing but not the mesh.
+#
+# Cases: optional 'fixed' and 'grid' sections (same syntax as parameter_sweep.py,
+# targets are generator stages) make several cases, run in parallel in a
+# ProcessPoolExecutor. The stages of one case run one after the other.
+#
+# Executors (EXECUTORS below, or an 'executors' section in the pipeline file):
+#   a command         e.g. "salome -t {input}"; {input} is the input file,
+#                     {export} a run_aster .export file written for it;
+#   'module:function' a Python function(input_path, workdir, log) returning
+#                     the files it wrote;
+#   'standin'         a local stand-in: it writes the files the real tool
+#                     would write (MED exports, .rmed results, animations),
+#                     found in the input script, with a placeholder content
+#                     derived from the input. No Salome/Code_Aster needed.
+#
+# ==============================================================================
+
+import hashlib
+import importlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from artifact_cache import CACHE_DIR, cached_generate, file_digest
+from comm_chunks import write_export
+from parameter_sweep import expand_cases, load_sweep
+
+# --- CONFIGURATION ---
+
+# Pipeline file used when none is given on the command line
+PIPELINE_FILE = "pipeline_example.yaml"
+
+# Directory receiving one sub-directory per case
+OUTPUT_DIR = "pipeline_cases"
+
+# Number of worker processes for the cases (None: one per CPU)
+MAX_WORKERS = None
+
+# Default executors of the run stages (see above)
+EXECUTORS = {
+    'salome': "salome -t {input}",
+    'aster': "run_aster {export}",
+    'pvbatch': "pvbatch {input}",
+}
+
+# File recording the keys and outputs of the run stages of a case
+STATE_FILENAME = "pipeline_state.json"
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+# Files written by the real tools, as found in their input by the stand-ins
+STANDIN_OUTPUTS = {
+    'salome': [r'ExportMED\(r"([^"]+)"', r'SaveAs\(r"([^"]+)"'],
+    'aster': [r"FICHIER=r'([^']+\.rmed)'"],
+    'pvbatch': [r"'([^'\n]+\.(?:ogv|avi|mp4))'", r"SaveScreenshot\('([^']+)'"],
+}
+
+
+def load_pipeline(path):
+    """Reads a pipeline file and checks its stages. Generator paths become absolute."""
+    pipeline = load_sweep(path)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    stages = pipeline.get('stages') or {}
+    if not stages:
+        raise ValueError(f"'{path}' defines no stages.")
+    for name, stage in stages.items():
+        if ('generator' in stage) == ('run' in stage):
+            raise ValueError(f"Stage '{name}' needs exactly one of 'generator' or 'run'.")
+        if 'generator' in stage:
+            stage['generator'] = os.path.abspath(os.path.join(base_dir, stage['generator']))
+            if not os.path.isfile(stage['generator']):
+                raise FileNotFoundError(f"Generator of stage '{name}' not found: {stage['generator']}")
+        elif 'input' not in stage:
+            raise ValueError(f"Run stage '{name}' has no 'input'.")
+        for dependency in stage_dependencies(stages, name):
+            if dependency not in stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'.")
+    pipeline['stages'] = {name: stages[name] for name in stage_order(stages)}
+    pipeline['pipeline_dir'] = base_dir
+    return pipeline
+
+
+def stage_dependencies(stages, name):
+    """The stages `name` runs after: its 'after' list and the stage producing its 'input'."""
+    dependencies = list(stages[name].get('after') or [])
+    if stages[name].get('input') in stages and stages[name]['input'] not in dependencies:
+        dependencies.append(stages[name]['input'])
+    return dependencies
+
+
+def stage_order(stages):
+    """Stage names in an order where every stage comes after its dependencies."""
+    order = []
+
+    def visit(name, path):
+        if name in path:
+            raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}")
+        if name in order:
+            return
+        for dependency in stage_dependencies(stages, name):
+            visit(dependency, path + [name])
+        order.append(name)
+
+    for name in stages:
+        visit(name, [])
+    return order
+
+
+def standin_run(tool, input_path, workdir, log):
+    """Local stand-in of `tool`: writes the output files named in its input script."""
+    with open(input_path) as f:
+        source = f.read()
+    digest = file_digest(input_path)
+    written = []
+    for pattern in STANDIN_OUTPUTS.get(tool, []):
+        for path in dict.fromkeys(re.findall(pattern, source)):
+            path = os.path.join(workdir, path)
+            with open(path, 'w') as f:
+                f.write(f"stand-in {tool} output of {os.path.basename(input_path)} (sha256 {digest})\n")
+            written.append(os.path.abspath(path))
+    print(f"[stand-in {tool}] {os.path.basename(input_path)}: wrote {len(written)} file(s)", file=log)
+    return written
+
+
+def _run_executor(tool, definition, input_path, workdir, log):
+    """Runs one executor on `input_path`. Returns the files it reports (commands report none)."""
+    if definition == 'standin':
+        return standin_run(tool, input_path, workdir, log)
+    if '{' not in definition and re.fullmatch(r'[\w.]+:\w+', definition):
+        module, _, function = definition.partition(':')
+        return getattr(importlib.import_module(module), function)(input_path, workdir, log) or []
+
+    fields = {'input': input_path}
+    if '{export}' in definition:
+        stem = os.path.splitext(input_path)[0]
+        fields['export'] = stem + ".export"
+        write_export(fields['export'], input_path, stem + ".mess")
+    command = definition.format(**fields)
+    print(f"$ {command}", file=log)
+    log.flush()
+    return_code = subprocess.call(shlex.split(command), cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+    if return_code != 0:
+        raise RuntimeError(f"'{command}' failed with exit code {return_code}.")
+    return []
+
+
+def _stage_config(stage, overrides, case_dir, pipeline_dir):
+    config = dict(stage.get('config') or {})
+    config.update(overrides)
+    for name, value in config.items():
+        if isinstance(value, str):
+            config[name] = value.replace('{case_dir}', case_dir).replace('{pipeline_dir}', pipeline_dir)
+    return config
+
+
+def _load_state(case_dir):
+    path = os.path.join(case_dir, STATE_FILENAME)
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _outputs_intact(outputs):
+    return all(os.path.isfile(path) and file_digest(path) == digest for path, digest in outputs.items())
+
+
+def run_stage(name, stage, case_dir, entries, state, executors, log):
+    """Runs one run stage unless its key and outputs are unchanged. Returns (key, outputs, status)."""
+    if stage['input'] in entries:
+        produced = entries[stage['input']]['outputs']
+        if len(produced) != 1:
+            raise ValueError(f"Stage '{stage['input']}' produced {len(produced)} files; "
+                             f"name the input of stage '{name}' explicitly.")
+        input_path = produced[0]
+    else:
+        input_path = os.path.abspath(os.path.join(case_dir, stage['input']))
+
+    tool = stage['run']
+    definition = executors.get(tool)
+    if definition is None:
+        raise KeyError(f"Stage '{name}' uses unknown executor '{tool}'.")
+    upstream = {path: file_digest(path)
+                for dependency in stage.get('depends', [])
+                for path in entries[dependency]['outputs'] if os.path.isfile(path)}
+    key = hashlib.sha256(json.dumps({
+        'executor': [tool, definition],
+        'input': file_digest(input_path),
+        'upstream': sorted(upstream.values()),
+    }, sort_keys=True).encode()).hexdigest()
+
+    previous = state.get(name)
+    if previous and previous['key'] == key and _outputs_intact(previous['outputs']):
+        return key, sorted(previous['outputs']), 'cached'
+
+    before = {entry.path: entry.stat().st_mtime_ns for entry in os.scandir(case_dir)}
+    reported = _run_executor(tool, definition, input_path, case_dir, log)
+    after = {entry.path: entry.stat().st_mtime_ns for entry in os.scandir(case_dir)}
+    outputs = set(map(os.path.abspath, reported))
+    outputs.update(os.path.abspath(path) for path, mtime in after.items()
+                   if before.get(path) != mtime and os.path.isfile(path) and os.path.basename(path) != STATE_FILENAME)
+    outputs.discard(input_path)
+    for path in stage.get('outputs') or []:
+        if not os.path.isfile(os.path.join(case_dir, path)):
+            raise FileNotFoundError(f"Stage '{name}' did not write its expected output '{path}'.")
+    state[name] = {'key': key, 'outputs': {path: file_digest(path) for path in sorted(outputs) if os.path.isfile(path)}}
+    return key, sorted(state[name]['outputs']), 'done'
+
+
+def run_case(case, pipeline, output_dir, cache_dir, executors):
+    """Runs every stage of one case in its own directory and writes its manifest."""
+    case_dir = os.path.join(output_dir, case['case'])
+    os.makedirs(os.path.join(case_dir, "logs"), exist_ok=True)
+    # The generators import their helper modules from their own folder
+    for stage in pipeline['stages'].values():
+        if 'generator' in stage and os.path.dirname(stage['generator']) not in sys.path:
+            sys.path.insert(0, os.path.dirname(stage['generator']))
+
+    state = _load_state(case_dir)
+    manifest = {'case': case['case'], 'parameters': case['parameters'], 'stages': {}, 'status': 'done'}
+    entries = manifest['stages']
+    for name, stage in pipeline['stages'].items():
+        dependencies = stage_dependencies(pipeline['stages'], name)
+        entry = {'kind': 'generator' if 'generator' in stage else stage['run'], 'after': dependencies}
+        entries[name] = entry
+        blocked = [d for d in dependencies if entries[d]['status'] not in ('done', 'cached')]
+        if blocked:
+            entry.update(status='skipped', outputs=[], error=f"Dependencies not done: {', '.join(blocked)}")
+            manifest['status'] = 'failed'
+            continue
+
+        # Logs go to a sub-directory, so they are not taken for outputs of the stage
+        entry['log'] = os.path.join("logs", f"{name}.log")
+        start = time.perf_counter()
+        with open(os.path.join(case_dir, entry['log']), 'w') as log:
+            try:
+                if 'generator' in stage:
+                    config = _stage_config(stage, case['overrides'].get(name, {}), case_dir, pipeline['pipeline_dir'])
+                    entry['config'] = config
+                    entry['key'], outputs, status = cached_generate(stage['generator'], config, case_dir, cache_dir, log)
+                    entry['outputs'] = [os.path.join(case_dir, output) for output in outputs]
+                    entry['status'] = 'done' if status == 'generated' else 'cached'
+                else:
+                    entry['key'], entry['outputs'], entry['status'] = run_stage(
+                        name, dict(stage, depends=dependencies), case_dir, entries, state, executors, log)
+            except (Exception, SystemExit) as e:  # some generators call exit() on bad input
+                entry.update(status='failed', outputs=[], error=f"{type(e).__name__}: {e}")
+                manifest['status'] = 'failed'
+        entry['seconds'] = round(time.perf_counter() - start, 3)
+
+    with open(os.path.join(case_dir, STATE_FILENAME), 'w') as f:
+        json.dump(state, f, indent=2)
+    with open(os.path.join(case_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def run_pipeline(pipeline_file, output_dir=OUTPUT_DIR, max_workers=MAX_WORKERS, offline=False):
+    """Runs all cases of a pipeline file in parallel. Returns the pipeline manifest."""
+    pipeline = load_pipeline(pipeline_file)
+    executors = dict(EXECUTORS)
+    executors.update(pipeline.get('executors') or {})
+    if offline:
+        executors = {tool: 'standin' for tool in executors}
+
+    generator_stages = {name: stage['generator'] for name, stage in pipeline['stages'].items() if 'generator' in stage}
+    cases = expand_cases({'generators': generator_stages, 'fixed': pipeline.get('fixed'), 'grid': pipeline.get('grid')})
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    cache_dir = os.path.join(pipeline['pipeline_dir'], pipeline.get('cache') or CACHE_DIR)
+    print(f"Running {len(cases)} case(s) x {len(pipeline['stages'])} stages into '{output_dir}'"
+          + (" with local stand-ins" if offline else "") + "...")
+
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run_case, case, pipeline, output_dir, cache_dir, executors) for case in cases]
+        for future in as_completed(futures):
+            manifest = future.result()
+            results[manifest['case']] = manifest
+            summary = ", ".join(f"{name} {entry['status']}" for name, entry in manifest['stages'].items())
+            print(f"  {manifest['case']}: {manifest['status']} ({summary})")
+
+    pipeline_manifest = {
+        'pipeline_file': os.path.abspath(pipeline_file),
+        'stages': {name: stage_dependencies(pipeline['stages'], name) for name in pipeline['stages']},
+        'executors': executors,
+        'cases': [{'case': case['case'], 'parameters': case['parameters'], 'status': results[case['case']]['status']}
+                  for case in cases],
+    }
+    with open(os.path.join(output_dir, "pipeline_manifest.json"), 'w') as f:
+        json.dump(pipeline_manifest, f, indent=2)
+
+    failed = sum(1 for case in pipeline_manifest['cases'] if case['status'] != 'done')
+    print(f"Finished {len(cases) - failed}/{len(cases)} cases in {time.perf_counter() - start:.1f} s "
+          f"(manifest: {os.path.join(output_dir, 'pipeline_manifest.json')})")
+    return pipeline_manifest
+
+
+if __name__ == "__main__":
+    arguments = [a for a in sys.argv[1:] if a != '--offline']
+    manifest = run_pipeline(arguments[0] if arguments else PIPELINE_FILE, offline='--offline' in sys.argv[1:])
+    sys.exit(0 if all(case['status'] == 'done' for case in manifest['cases']) else 1)
@@ -0,0 +1,120 @@
+# ==============================================================================
+#      Parallel Offscreen Rendering of the Layer Animations (pvbatch Shards)
+# ==============================================================================
+#
+# The script written by results_animation_save_two_view_2 renders every layer
+# one after the other. It also runs offscreen with pvbatch on a range of
+# layers (--layers FIRST:LAST), so this driver splits the layers into K
+# contiguous ranges and renders them in K pvbatch processes at once:
+#
+#   pvbatch <script> --layers 1:50      pvbatch <script> --layers 51:100  ...
+#
+# The generator writes <script>_layers.json next to the script, listing every
+# layer's screenshot and animation. When all shards are done, the per-layer
+# clips are concatenated in layer order into one animation with ffmpeg.
+#
+# --- HOW TO USE ---
+# 1. Run results_animation_save_two_view_2 (writes the script and the .json).
+# 2. Run: python render_shards.py [run_this_in_paraview_GENERALIZED_layers.json]
+#    Each shard logs to shard_<first>-<last>.log next to the .json file.
+#
+# ==============================================================================
+
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+# --- CONFIGURATION ---
+
+# Layer list written by results_animation_save_two_view_2
+LAYERS_FILE = "run_this_in_paraview_GENERALIZED_layers.json"
+
+# Number of pvbatch processes (None: one per CPU)
+NUM_WORKERS = None
+
+# Command running the generated script offscreen
+PVBATCH_COMMAND = "pvbatch --force-offscreen-rendering"
+
+# Animation of all layers, written next to the per-layer clips (None: no stitching)
+STITCH_OUTPUT = "all_layers.ogv"
+
+# Command used to concatenate the clips
+FFMPEG_COMMAND = "ffmpeg"
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+def shard_ranges(num_layers, workers):
+    """Splits layers 1..num_layers into at most `workers` contiguous (first, last) ranges."""
+    workers = max(1, min(workers, num_layers))
+    size, extra = divmod(num_layers, workers)
+    ranges, first = [], 1
+    for shard in range(workers):
+        last = first + size - 1 + (1 if shard < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def run_shards(script, ranges, workdir, pvbatch_command=PVBATCH_COMMAND):
+    """Runs one pvbatch process per layer range, all at once. Returns the failed ranges."""
+    processes = []
+    for first, last in ranges:
+        log = open(os.path.join(workdir, f"shard_{first}-{last}.log"), 'w')
+        command = shlex.split(pvbatch_command) + [script, '--layers', f"{first}:{last}"]
+        print(f"  Starting layers {first}-{last}: {' '.join(command)}")
+        processes.append(((first, last), subprocess.Popen(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT), log))
+
+    failed = []
+    for layer_range, process, log in processes:
+        return_code = process.wait()
+        log.close()
+        if return_code != 0:
+            failed.append(layer_range)
+            print(f"  ERROR: layers {layer_range[0]}-{layer_range[1]} failed (exit code {return_code}), "
+                  f"see shard_{layer_range[0]}-{layer_range[1]}.log")
+    return failed
+
+
+def stitch_clips(clips, output, ffmpeg_command=FFMPEG_COMMAND):
+    """Concatenates the clips (same size and codec) into `output` without re-encoding."""
+    list_file = os.path.splitext(output)[0] + "_clips.txt"
+    with open(list_file, 'w') as f:
+        for clip in clips:
+            f.write("file '{}'\n".format(os.path.abspath(clip).replace("'", "'\\''")))
+    command = shlex.split(ffmpeg_command) + ['-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                                             '-i', list_file, '-c', 'copy', output]
+    return_code = subprocess.call(command)
+    if return_code != 0:
+        raise RuntimeError(f"'{' '.join(command)}' failed with exit code {return_code}.")
+
+
+def render_layers(layers_file=LAYERS_FILE, workers=NUM_WORKERS, stitch_output=STITCH_OUTPUT):
+    """Renders all layers of a generated script in parallel shards, then stitches the animations."""
+    with open(layers_file) as f:
+        manifest = json.load(f)
+    workdir = os.path.dirname(os.path.abspath(layers_file))
+    ranges = shard_ranges(manifest['num_layers'], workers or os.cpu_count() or 1)
+
+    print(f"Rendering {manifest['num_layers']} layers of '{manifest['script']}' in {len(ranges)} pvbatch processes...")
+    start = time.perf_counter()
+    failed = run_shards(manifest['script'], ranges, workdir)
+    print(f"Rendered {len(ranges) - len(failed)}/{len(ranges)} shards in {time.perf_counter() - start:.1f} s")
+
+    if not stitch_output:
+        return not failed
+    clips = [layer['animation'] for layer in manifest['layers']]
+    missing = [clip for clip in clips if not os.path.isfile(clip)]
+    if missing:
+        print(f"ERROR: {len(missing)} animation(s) missing (first: {missing[0]}); not stitching.")
+        return False
+    output = os.path.join(os.path.dirname(clips[0]), stitch_output)
+    stitch_clips(clips, output)
+    print(f"Stitched {len(clips)} animations into '{output}'")
+    return not failed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if render_layers(sys.argv[1] if len(sys.argv) > 1 else LAYERS_FILE) else 1)
@@ -4,6 +4,8 @@
 
 import os
 
+from field_index import resolve_field
+
 # --- HOW TO USE AND CUSTOMIZE THIS SCRIPT IN THE FUTURE ---
 #
 # 1. PRIMARY USAGE:
@@ -16,11 +18,12 @@ import os
 #      to the `RESULT_CONFIG` dictionary below.
 #    - Study the existing entries ('TEMP', 'DEPL', 'SXX') to see the patterns.
 #
-# 3. MODIFYING NAMING RULES:
-#    - If Salome changes how it names fields, the logic is in the main `for` loop
-#      under the comment "DYNAMIC FIELD NAME AND TUPLE GENERATION".
-#    - Read the comments there to understand how it builds the names. You can tweak
-#      the f-strings (e.g., `f"{...}"`) in that section to match any new pattern.
+# 3. FIELD NAMES:
+#    - The field names are read from the .rmed files in `results_path` (see
+#      field_index.py; the index is cached next to the results), so they are exact.
+#    - If the files do not exist yet, the Code_Aster naming rule is used: the
+#      `result_name` cut/padded with '_' to 8 characters + the `field_name`
+#      (resmec1_DEPL, resmec12DEPL, stress1_SIEQ_NOEU...).
 #
 # ---------------------------------------------------------------------------------
 
@@ -33,36 +36,40 @@ result_key = 'DEPL'
 # 2. SET THE FIXED COLORMAP RANGE FOR YOUR CHOSEN RESULT
 fixed_colormap_min = 0.0
 fixed_colormap_max = 0.15
+#    ...or compute it from the .rmed files in results_path (needs h5py, see
+#    colormap_range.py). The range is cached next to the results.
+auto_colormap_range = False
+colormap_clip_percentiles = None  # None: global min/max. (1, 99): ignore outliers.
 
 # --- THE CONFIGURATION LIBRARY (Add new results here) ---
 RESULT_CONFIG = {
     # 'KEY': This is the name you use in `result_key` above.
     'TEMP': {
         'file_basename': 'ther',  # The start of the .rmed filename (ther1.rmed, ther2.rmed...).
-        'field_name': 'TEMP',     # The base name of the result field inside the file.
+        'field_name': 'TEMP',     # The NOM_CHAM of the result field inside the file.
         'component': None,        # Use `None` for SCALAR results (like temperature).
-        'result_prefix': 'res'    # The text that comes before the number in the field name.
+        'result_name': 'resther{}'  # The Code_Aster result of the layer ('{}' is the layer number).
     },
     'DEPL': {
         'file_basename': 'mec',
         'field_name': 'DEPL',
         'component': 'Magnitude', # Use 'Magnitude' for VECTOR results (like displacement).
-        'result_prefix': 'res'
+        'result_name': 'resmec{}'
     },
     'SXX': {
         'file_basename': 'mec',
         'field_name': 'SIGM_NOEU', # The base name for the TENSOR result (stress).
         'component': 'SIXX',      # The specific component of the tensor to visualize.
-        'result_prefix': 'stress'
+        'result_name': 'stress{}'
     },
     # ... other stress components ...
-    'SYY': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIYY', 'result_prefix': 'stress'},
-    'SZZ': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIZZ', 'result_prefix': 'stress'},
+    'SYY': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIYY', 'result_name': 'stress{}'},
+    'SZZ': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIZZ', 'result_name': 'stress{}'},
     'VMIS': {
         'file_basename': 'mec',
         'field_name': 'SIEQ_NOEU',
         'component': 'VMIS',
-        'result_prefix': 'stress'
+        'result_name': 'stress{}'
     }
 }
 # --- END OF USER INPUTS ---
@@ -70,17 +77,11 @@ RESULT_CONFIG = {
 
 # --- SCRIPT GENERATION LOGIC (Fully automatic from here) ---
 
-try:
-    config = RESULT_CONFIG[result_key]
-except KeyError:
-    print(f"Error: Invalid result_key '{result_key}'. Please choose from {list(RESULT_CONFIG.keys())}")
-    exit()
-
 # Other Parameters
 num_files = 20
 results_path = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run"
-animation_base_name = f"animation_{result_key}"
-output_filename = f"generated_paraview_script_{result_key}.py"
+animation_base_name = None  # None: "animation_<result_key>"
+output_filename = None      # None: "generated_paraview_script_<result_key>.py"
 colormap_preset = "Rainbow Uniform"
 show_legend_in_animation = False
 frame_rate = 2
@@ -90,81 +91,120 @@ camera_position = [11.06857794191841, -39.664396099178866, 26.03454514364917]
 camera_focal_point = [10.0, 10.0, 1.9999999999999616]
 camera_view_up = [-0.05134727680585449, 0.4341406562705134, 0.8993805355563523]
 camera_parallel_scale = 14.282856857085696
+# Frame cache: when set, every frame is saved as a PNG in this directory under a
+# hash of everything it depends on (file, time step, field, camera, colormap,
+# resolution...) and the clips are assembled from the frames with ffmpeg.
+# Rerunning after a tweak renders only the frames that changed.
+frame_cache_dir = None  # e.g. "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run/frame_cache"
+ffmpeg_command = "ffmpeg"
 
-loading_code = ""
-for i in range(1, num_files + 1):
-    reader_var = f"{config['file_basename']}{i}_reader"
-    file_path = os.path.join(results_path, f"{config['file_basename']}{i}.rmed").replace("\\", "/")
-    loading_code += f"\n{reader_var} = MEDReader(registrationName='{config['file_basename']}{i}.rmed', FileNames=['{file_path}'])"
-
-processing_loop_code = ""
-for i in range(1, num_files + 1):
-    reader_var = f"{config['file_basename']}{i}_reader"
-    display_var = f"{reader_var}_display"
-    
-    # --- DYNAMIC FIELD NAME AND TUPLE GENERATION ---
-    # This is the core logic that adapts to different naming rules.
-    # If you ever need to change a naming rule, this is the place to do it.
-
-    if config['component'] is None:  # SCALAR CASE (e.g., 'TEMP')
-        # Rule: Field name number rolls over every 10 files (resther1TEMP, resther2TEMP...).
-        field_num_in_name = i if i < 10 else i // 10
-        full_field_name = f"{config['result_prefix']}{config['file_basename']}{field_num_in_name}{config['field_name']}"
-        color_by_tuple = f"('POINTS', '{full_field_name}')"
-        
-    else:  # VECTOR/TENSOR CASE (e.g., 'DEPL', 'SXX', 'VMIS')
-        if config['field_name'] == 'DEPL': # Special handling for Displacement
-            # Rule for DEPL: Underscore disappears for layers >= 10.
-            # Name format: res + mec + number + [_] + DEPL
-            if i < 10:
-                # FIX: Added config['file_basename'] to correctly form 'resmec1_DEPL'
-                full_field_name = f"{config['result_prefix']}{config['file_basename']}{i}_{config['field_name']}"
-            else: # i >= 10
-                full_field_name = f"{config['result_prefix']}{config['file_basename']}{i}{config['field_name']}"
-        
-        else: # Generic handling for other Tensors (Stress)
-            # Rule for STRESS: Underscore disappears for layers >= 10.
-            # Name format: stress + number + [_] + SIGM_NOEU
-            if i < 10:
-                full_field_name = f"{config['result_prefix']}{i}_{config['field_name']}"
-            else: # i >= 10
-                full_field_name = f"{config['result_prefix']}{i}{config['field_name']}"
-        
-        # Finally, build the tuple for the ColorBy command
-        color_by_tuple = f"('POINTS', '{full_field_name}', '{config['component']}')"
-        
-    start_frame = (i - 1) * timesteps_per_file
-    end_frame = i * timesteps_per_file - 1
-    animation_output_path = os.path.join(results_path, f"{animation_base_name}_{i}.ogv").replace("\\", "/")
-
-    processing_loop_code += f"""
-# --- Processing and Animating File {i} for {result_key} ---
-print("Processing file: {config['file_basename']}{i}.rmed | Field: {full_field_name}")
-SetActiveSource({reader_var})
-{display_var} = Show({reader_var}, renderView1, 'UnstructuredGridRepresentation')
-{display_var}.Representation = 'Surface'
-"""
+def build_script():
+    """Returns the text of the ParaView script for the inputs above."""
+    try:
+        config = RESULT_CONFIG[result_key]
+    except KeyError:
+        raise ValueError(f"Invalid result_key '{result_key}'. Please choose from {list(RESULT_CONFIG.keys())}")
+    base_name = animation_base_name or f"animation_{result_key}"
+
+    colormap_min, colormap_max = fixed_colormap_min, fixed_colormap_max
+    if auto_colormap_range:
+        from colormap_range import data_range
+        colormap_min, colormap_max = data_range(results_path, config, num_files, colormap_clip_percentiles)
+
+    # One entry per result file; the generated script loads them one at a time
+    layer_entries = ""
+    for i in range(1, num_files + 1):
+        file_name = f"{config['file_basename']}{i}.rmed"
+        file_path = os.path.join(results_path, file_name).replace("\\", "/")
+
+        # --- FIELD NAME: read from the file (or the Code_Aster rule before the run) ---
+        full_field_name = resolve_field(results_path, file_name, config['result_name'].format(i), config['field_name'])
+
+        animation_output_path = os.path.join(results_path, f"{base_name}_{i}.ogv").replace("\\", "/")
+        layer_entries += f"    ('{file_name}', '{file_path}', '{full_field_name}', '{animation_output_path}'),\n"
+
+    if config['component'] is None:
+        color_by_code = "ColorBy(display, ('POINTS', field_name))"
+    else:
+        color_by_code = f"ColorBy(display, ('POINTS', field_name, '{config['component']}'))"
+
+    # --- Saving: one SaveAnimation per file, or cached frames + ffmpeg ---
+    frame_cache_setup, frame_cache_check = "", ""
+    save_code = f"""SaveAnimation(animation_path, renderView1, ImageResolution={image_resolution},
+        FrameRate={frame_rate},
+        FrameWindow=[0, {timesteps_per_file - 1}])"""
+    if frame_cache_dir:
+        render_settings = (camera_position, camera_focal_point, camera_view_up, camera_parallel_scale,
+                           colormap_preset, colormap_min, colormap_max, image_resolution,
+                           show_legend_in_animation, config['component'])
+        frame_cache_setup = f"""
+# --- Frame cache: a frame is rendered only if no frame with the same key exists ---
+import hashlib
+import json
+import os
+import subprocess
 
-    if i > 1:
-        prev_reader_var = f"{config['file_basename']}{i-1}_reader"
-        processing_loop_code += f"Hide({prev_reader_var}, renderView1)\n"
-    
-    processing_loop_code += f"""
-ColorBy({display_var}, {color_by_tuple})
-lut = GetColorTransferFunction('{full_field_name}')
-pwf = GetOpacityTransferFunction('{full_field_name}')
-lut.ApplyPreset('{colormap_preset}', True)
-lut.RescaleTransferFunction({fixed_colormap_min}, {fixed_colormap_max})
-pwf.RescaleTransferFunction({fixed_colormap_min}, {fixed_colormap_max})
-{display_var}.SetScalarBarVisibility(renderView1, {show_legend_in_animation})
-renderView1.Update()
-SaveAnimation('{animation_output_path}', renderView1, ImageResolution={image_resolution},
-    FrameRate={frame_rate},
-    FrameWindow=[{start_frame}, {end_frame}])
+frame_cache_dir = '{frame_cache_dir}'
+os.makedirs(frame_cache_dir, exist_ok=True)
+# Everything a frame depends on besides its file, field and time step
+render_settings = {render_settings!r}
+
+def file_version(file_path):
+    stat = os.stat(file_path)
+    return (file_path, stat.st_size, stat.st_mtime_ns)
+
+def frame_path(file_path, field_name, step):
+    key = repr((file_version(file_path), field_name, step, render_settings))
+    return os.path.join(frame_cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.png')
+
+# Number of time steps of every file version already loaded, so a file with
+# fewer steps than {timesteps_per_file} is known to be complete without loading it
+step_counts_path = os.path.join(frame_cache_dir, 'time_steps.json')
+step_counts = json.load(open(step_counts_path)) if os.path.isfile(step_counts_path) else {{}}
+
+def frame_count(file_path):
+    return min({timesteps_per_file}, step_counts.get(repr(file_version(file_path)), {timesteps_per_file}))
+
+def record_frame_count(file_path, count):
+    step_counts[repr(file_version(file_path))] = count
+    with open(step_counts_path, 'w') as f:
+        json.dump(step_counts, f, indent=1)
+
+def assemble_clip(frames, animation_path):
+    \"\"\"Encodes the frames into the clip, unless the clip already holds exactly these frames.\"\"\"
+    if not frames:
+        print(f"  no time steps: {{animation_path}} not written")
+        return
+    frame_list = ''.join(f"file '{{frame}}'\\nduration {1.0 / frame_rate}\\n" for frame in frames)
+    frame_list += f"file '{{frames[-1]}}'\\n"  # the concat demuxer drops the last duration
+    list_path = animation_path + '.frames.txt'
+    if os.path.isfile(animation_path) and os.path.isfile(list_path) and open(list_path).read() == frame_list:
+        return
+    with open(list_path, 'w') as f:
+        f.write(frame_list)
+    subprocess.check_call({ffmpeg_command.split()!r} + ['-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                           '-i', list_path, '-r', '{frame_rate}', animation_path])
 """
+        frame_cache_check = f"""
+    frames = [frame_path(file_path, field_name, step) for step in range(frame_count(file_path))]
+    missing = [step for step, frame in enumerate(frames) if not os.path.isfile(frame)]
+    if not missing:
+        print(f"All frames of {{file_name}} are cached")
+        assemble_clip(frames, animation_path)
+        continue"""
+        save_code = f"""times = reader.TimestepValues
+    times = list(times) if hasattr(times, '__len__') else [times]
+    record_frame_count(file_path, len(times))
+    frames = frames[:len(times)]
+    missing = [step for step in missing if step < len(times)]
+    for step in missing:
+        animationScene1.AnimationTime = times[step]
+        SaveScreenshot(frames[step], renderView1, ImageResolution={image_resolution})
+    print(f"  rendered {{len(missing)}} of {{len(frames)}} frames")
+    assemble_clip(frames, animation_path)"""
 
-# --- Assemble the final ParaView script ---
-paraview_script_content = f"""
+    # --- Assemble the final ParaView script ---
+    paraview_script_content = f"""
 ###
 ### This file was generated by the PERFECTED Python script (v6).
 ### Animation for: {result_key}
@@ -176,31 +216,62 @@ from pvsimple import *
 
 pvsimple._DisableFirstRenderCameraReset()
 
-# --- Load all result files ---
-{loading_code.strip()}
-
+# --- Result files: (file name, path, field name, animation file) ---
+# They are streamed: one MEDReader exists at a time, so the memory used is
+# that of one layer, however many files are processed.
+layers = [
+{layer_entries.rstrip()}
+]
+{frame_cache_setup}
 # --- Initial Scene Setup ---
 renderView1 = GetActiveViewOrCreate('RenderView')
 layout1 = GetLayout()
 layout1.SetSize({image_resolution[0]}, {image_resolution[1]})
-renderView1.CameraPosition = {camera_position}
-renderView1.CameraFocalPoint = {camera_focal_point}
-renderView1.CameraViewUp = {camera_view_up}
-renderView1.CameraParallelScale = {camera_parallel_scale}
 animationScene1 = GetAnimationScene()
-animationScene1.UpdateAnimationUsingDataTimeSteps()
 
-# --- Loop through each result file to process and save animation ---
-{processing_loop_code.strip()}
+# --- Load, animate and release each result file in turn ---
+reader = None
+for file_name, file_path, field_name, animation_path in layers:{frame_cache_check}
+    print(f"Processing file: {{file_name}} | Field: {{field_name}}")
+    if reader is not None:
+        Delete(reader)  # also deletes its representation
+    reader = MEDReader(registrationName=file_name, FileNames=[file_path])
+    display = Show(reader, renderView1, 'UnstructuredGridRepresentation')
+    display.Representation = 'Surface'
+    renderView1.CameraPosition = {camera_position}
+    renderView1.CameraFocalPoint = {camera_focal_point}
+    renderView1.CameraViewUp = {camera_view_up}
+    renderView1.CameraParallelScale = {camera_parallel_scale}
+    animationScene1.UpdateAnimationUsingDataTimeSteps()
+
+    {color_by_code}
+    lut = GetColorTransferFunction(field_name)
+    pwf = GetOpacityTransferFunction(field_name)
+    lut.ApplyPreset('{colormap_preset}', True)
+    lut.RescaleTransferFunction({colormap_min}, {colormap_max})
+    pwf.RescaleTransferFunction({colormap_min}, {colormap_max})
+    display.SetScalarBarVisibility(renderView1, {show_legend_in_animation})
+    renderView1.Update()
+    {save_code}
 
 print("\\nAutomation for {result_key} finished successfully!")
 """
+    return paraview_script_content
+
 
 # --- Write the generated script to a file ---
-try:
-    with open(output_filename, "w") as file:
-        file.write(paraview_script_content)
-    print(f"Successfully created ParaView script: '{output_filename}'")
-    print(f" -> It will process {num_files} files for the '{result_key}' result.")
-except IOError as e:
-    print(f"Error writing to file: {e}")
+if __name__ == "__main__":
+    try:
+        paraview_script_content = build_script()
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit()
+
+    script_filename = output_filename or f"generated_paraview_script_{result_key}.py"
+    try:
+        with open(script_filename, "w") as file:
+            file.write(paraview_script_content)
+        print(f"Successfully created ParaView script: '{script_filename}'")
+        print(f" -> It will process {num_files} files for the '{result_key}' result.")
+    except IOError as e:
+        print(f"Error writing to file: {e}")
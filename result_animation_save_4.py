@@ -4,11 +4,13 @@
 
 import os
 
+from field_index import resolve_field
+
 # --- HOW TO USE AND CUSTOMIZE THIS SCRIPT ---
 # 1. PRIMARY USAGE: Edit the settings in the "USER INPUTS" section below.
 # 2. CUSTOMIZING NEW RESULTS: Add new entries to the `RESULT_CONFIG` dictionary.
-# 3. MODIFYING NAMING RULES: The core logic is in the main `for` loop under
-#    "DYNAMIC FIELD NAME AND TUPLE GENERATION".
+# 3. FIELD NAMES: Read from the .rmed files in `results_path` (see field_index.py),
+#    or built with the Code_Aster rule from `result_name` before the run.
 # ---------------------------------------------------------------------------------
 
 # --- USER INPUTS (Edit these settings for each run) ---
@@ -54,7 +56,7 @@ timesteps_per_file = 18
 image_resolution = [1920, 1080]
 
 # --- 5. CONFIGURATION LIBRARY (ADVANCED: Add new results here) ---
-RESULT_CONFIG = { 'TEMP': {'file_basename': 'ther', 'field_name': 'TEMP', 'component': None, 'result_prefix': 'res'}, 'DEPL': {'file_basename': 'mec', 'field_name': 'DEPL', 'component': 'Magnitude', 'result_prefix': 'res'}, 'SXX': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIXX', 'result_prefix': 'stress'}, 'SYY': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIYY', 'result_prefix': 'stress'}, 'SZZ': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIZZ', 'result_prefix': 'stress'}, 'VMIS': {'file_basename': 'mec', 'field_name': 'SIEQ_NOEU', 'component': 'VMIS', 'result_prefix': 'stress'} }
+RESULT_CONFIG = { 'TEMP': {'file_basename': 'ther', 'field_name': 'TEMP', 'component': None, 'result_name': 'resther{}'}, 'DEPL': {'file_basename': 'mec', 'field_name': 'DEPL', 'component': 'Magnitude', 'result_name': 'resmec{}'}, 'SXX': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIXX', 'result_name': 'stress{}'}, 'SYY': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIYY', 'result_name': 'stress{}'}, 'SZZ': {'file_basename': 'mec', 'field_name': 'SIGM_NOEU', 'component': 'SIZZ', 'result_name': 'stress{}'}, 'VMIS': {'file_basename': 'mec', 'field_name': 'SIEQ_NOEU', 'component': 'VMIS', 'result_name': 'stress{}'} }
 # --- END OF USER INPUTS ---
 
 
@@ -93,11 +95,8 @@ for i in range(1, num_files + 1):
 processing_loop_code = ""
 for i in range(1, num_files + 1):
     reader_var, display_var = f"{config['file_basename']}{i}_reader", f"{reader_var}_display"
-    if config['component'] is None: full_field_name, color_by_tuple = (f"{config['result_prefix']}{config['file_basename']}{i if i < 10 else i // 10}{config['field_name']}", f"('POINTS', '{f'{config['result_prefix']}{config['file_basename']}{i if i < 10 else i // 10}{config['field_name']}'}')")
-    else:
-        if config['field_name'] == 'DEPL': full_field_name = f"{config['result_prefix']}{config['file_basename']}{i}_{config['field_name']}" if i < 10 else f"{config['result_prefix']}{config['file_basename']}{i}{config['field_name']}"
-        else: full_field_name = f"{config['result_prefix']}{i}_{config['field_name']}" if i < 10 else f"{config['result_prefix']}{i}{config['field_name']}"
-        color_by_tuple = f"('POINTS', '{full_field_name}', '{config['component']}')"
+    full_field_name = resolve_field(results_path, f"{config['file_basename']}{i}.rmed", config['result_name'].format(i), config['field_name'])
+    color_by_tuple = f"('POINTS', '{full_field_name}')" if config['component'] is None else f"('POINTS', '{full_field_name}', '{config['component']}')"
     start_frame, end_frame = (i - 1) * timesteps_per_file, i * timesteps_per_file - 1
     animation_output_path = os.path.join(results_path, f"{animation_base_name}_{i}.ogv").replace("\\", "/")
     legend_code = ""
@@ -0,0 +1,190 @@
+# ==============================================================================
+#      Lightweight .rmed (MED/HDF5) Result Reader - No ParaView Needed
+# ==============================================================================
+#
+# The animation scripts load every ther{i}.rmed / mec{i}.rmed through MEDReader
+# in a pvsimple session, even when all we need is the peak VMIS or the max DEPL
+# of each layer. A .rmed file is an HDF5 file, so h5py reads it directly:
+#
+#   /ENS_MAA/<mesh>/<step>/NOE/COO          node coordinates (x..., y..., z...)
+#   /CHA/<field>/                           one group per field; attributes
+#                                           NCO (components) and NOM (names)
+#   /CHA/<field>/<step>/NOE/<profile>/CO    nodal values of one time step,
+#                                           component by component
+#   /PROFILS/<profile>/PFL                  node numbers of a partial field
+#
+# Uncompressed, contiguous datasets (the Code_Aster default) are memory-mapped
+# with numpy instead of read: only the pages actually used are loaded.
+#
+# Field names: Code_Aster writes <concept name><NOM_CHAM>, the concept name
+# cut and padded with '_' to 8 characters. This is where the quirks hard-coded
+# in the animation scripts come from:
+#   resmec1  + DEPL      -> 'resmec1_DEPL'      resmec12 + DEPL -> 'resmec12DEPL'
+#   stress1  + SIEQ_NOEU -> 'stress1_SIEQ_NOEU' resther12 + TEMP -> 'resther1TEMP'
+# find_field() applies this rule and falls back to searching the file
+# (see field_index.py).
+#
+# Results are described like the entries of RESULT_CONFIG in
+# result_animation_save_3.py (file_basename, result_name, field_name,
+# component), which is the library used by default.
+#
+# --- HOW TO USE ---
+#   python rmed_reader.py          prints the min/max of RESULT_KEY for every
+#                                  layer file and time step
+#   As a library:
+#       from rmed_reader import open_rmed, find_field, read_field, read_coordinates
+#       with open_rmed("mec3.rmed") as med:
+#           name = find_field(med, "stress3", "SIEQ_NOEU")
+#           values, components, nodes = read_field(med, name)
+#
+# ==============================================================================
+
+import os
+
+import h5py
+import numpy as np
+
+from field_index import match_field
+from result_animation_save_3 import RESULT_CONFIG
+
+# --- CONFIGURATION ---
+
+# Directory containing the ther{i}.rmed / mec{i}.rmed files
+RESULTS_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run"
+
+# Number of layer files to read
+NUM_FILES = 20
+
+# Result to extract (a key of RESULT_CONFIG in result_animation_save_3.py)
+RESULT_KEY = 'VMIS'
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+NO_PROFILE = 'MED_NO_PROFILE_INTERNAL'
+
+
+def open_rmed(path):
+    """Opens a .rmed file read-only (use it in a `with` block)."""
+    return h5py.File(path, 'r')
+
+
+def find_field(med, concept, field):
+    """Name of the field `field` (e.g. 'DEPL') of the result `concept` (e.g. 'resmec12') in the file."""
+    return match_field(list(med['CHA']) if 'CHA' in med else [], concept, field, med.filename)
+
+
+def _array(dataset):
+    """Memory-maps a contiguous uncompressed dataset, reads it otherwise."""
+    offset = dataset.id.get_offset()
+    if dataset.chunks is None and dataset.compression is None and offset is not None:
+        return np.memmap(dataset.file.filename, dtype=dataset.dtype, mode='r', offset=offset, shape=dataset.shape)
+    return dataset[()]
+
+
+def _last_step(group):
+    """The last step group under a mesh or field group (step names sort by time step number)."""
+    return group[sorted(group)[-1]]
+
+
+def read_coordinates(med, mesh=None):
+    """Node coordinates as an (n, dim) array (a view of the file when memory-mapped)."""
+    mesh_group = med['ENS_MAA'][mesh or sorted(med['ENS_MAA'])[0]]
+    dim = int(mesh_group.attrs.get('ESP', mesh_group.attrs.get('DIM', 3)))
+    coordinates = _array(_last_step(mesh_group)['NOE']['COO'])
+    return coordinates.reshape(dim, -1).T
+
+
+def field_components(med, name):
+    """Component names of a field, e.g. ['DX', 'DY', 'DZ']."""
+    attributes = med['CHA'][name].attrs
+    count = int(attributes['NCO'])
+    names = attributes['NOM']
+    names = names.decode() if isinstance(names, bytes) else str(names)
+    return [names[16 * c:16 * (c + 1)].strip() for c in range(count)]
+
+
+def field_steps(med, name):
+    """(step key, time step number, time) of every step of a field, in order."""
+    group = med['CHA'][name]
+    return [(key, int(group[key].attrs['NDT']), float(group[key].attrs['PDT'])) for key in sorted(group)]
+
+
+def read_field(med, name, step=None):
+    """
+    Nodal values of one step of a field (last step by default).
+    Returns (values, components, nodes): values is (n, components), nodes the
+    0-based node indices of the values (None when the field covers all nodes).
+    """
+    group = med['CHA'][name]
+    step_group = group[step or sorted(group)[-1]]
+    entity = next((key for key in step_group if key.split('.')[0] == 'NOE'), None)
+    if entity is None:
+        raise KeyError(f"Field '{name}' has no nodal values in {med.filename}.")
+    profile = next(key for key in step_group[entity] if 'CO' in step_group[entity][key])
+    components = field_components(med, name)
+    values = _array(step_group[entity][profile]['CO']).reshape(len(components), -1).T
+
+    nodes = None
+    if profile != NO_PROFILE and 'PROFILS' in med and profile in med['PROFILS']:
+        nodes = np.asarray(med['PROFILS'][profile]['PFL'][()]) - 1
+    return values, components, nodes
+
+
+def component_values(values, components, component):
+    """One column of the values: a component name, 'Magnitude' (vector norm) or None (scalar)."""
+    if component is None:
+        return values[:, 0]
+    if component == 'Magnitude':
+        return np.sqrt(np.einsum('ij,ij->i', values[:, :3], values[:, :3]))
+    return values[:, components.index(component)]
+
+
+def result_field(med, result, layer):
+    """Name of the field of a result (a RESULT_CONFIG entry) in the file of `layer`."""
+    return find_field(med, result['result_name'].format(layer), result['field_name'])
+
+
+def layer_file(results_path, result, layer):
+    """Path of the .rmed file of a layer for a result (a RESULT_CONFIG entry)."""
+    return os.path.join(results_path, f"{result['file_basename']}{layer}.rmed")
+
+
+def layer_values(results_path, result, layer, step=None):
+    """
+    Values of a result on the nodes of one layer file, as (coordinates, values, time).
+    Coordinates are restricted to the nodes the field is defined on.
+    """
+    with open_rmed(layer_file(results_path, result, layer)) as med:
+        name = result_field(med, result, layer)
+        step = step or field_steps(med, name)[-1][0]
+        values, components, nodes = read_field(med, name, step)
+        coordinates = read_coordinates(med)
+        time = float(med['CHA'][name][step].attrs['PDT'])
+        data = np.array(component_values(values, components, result['component']))
+        return (np.array(coordinates if nodes is None else coordinates[nodes]), data, time)
+
+
+def layer_extrema(results_path, result, layer):
+    """Min and max of a result for every time step of one layer file: [(time, min, max), ...]."""
+    with open_rmed(layer_file(results_path, result, layer)) as med:
+        name = result_field(med, result, layer)
+        extrema = []
+        for step, _, time in field_steps(med, name):
+            values, components, _ = read_field(med, name, step)
+            data = component_values(values, components, result['component'])
+            extrema.append((time, float(data.min()), float(data.max())))
+        return extrema
+
+
+if __name__ == "__main__":
+    if RESULT_KEY not in RESULT_CONFIG:
+        raise SystemExit(f"Invalid RESULT_KEY '{RESULT_KEY}'. Please choose from {list(RESULT_CONFIG)}")
+    result = RESULT_CONFIG[RESULT_KEY]
+    print(f"{'layer':>5} {'time':>12} {'min ' + RESULT_KEY:>14} {'max ' + RESULT_KEY:>14}")
+    for layer in range(1, NUM_FILES + 1):
+        path = layer_file(RESULTS_PATH, result, layer)
+        if not os.path.isfile(path):
+            print(f"{layer:>5} missing: {path}")
+            continue
+        for time, low, high in layer_extrema(RESULTS_PATH, result, layer):
+            print(f"{layer:>5} {time:>12.4g} {low:>14.6g} {high:>14.6g}")
@@ -0,0 +1,77 @@
+# ==============================================================================
+#      Driver for Chunked (Restartable) Code_Aster Runs
+# ==============================================================================
+#
+# Runs the chunks listed in a manifest written by a .comm generator with
+# `layers_per_chunk` set (see comm_chunks.py), one after the other.
+#
+# Every chunk that finishes is marked 'done' in the manifest. If a chunk fails
+# (or the machine goes down), simply run this script again: finished chunks
+# are skipped and the run resumes from the base saved by the last one.
+#
+# --- HOW TO USE ---
+# 1. Generate the chunks, e.g. set layers_per_chunk = 20 in
+#    comm_for_ti64_and_substrate_with_time_stepping and run it.
+# 2. Set MANIFEST_PATH below to the generated '<name>_chunks.json'.
+# 3. Run: python run_comm_chunks.py
+#
+# ==============================================================================
+
+import os
+import shlex
+import subprocess
+import sys
+
+from comm_chunks import load_manifest, save_manifest
+
+# --- CONFIGURATION ---
+
+# The manifest written next to the generated chunk files
+MANIFEST_PATH = "lpbf_n_layer_cooling_chunks.json"
+
+# Command used to run one chunk. '{export}' is replaced by the chunk's .export file.
+SOLVER_COMMAND = "run_aster {export}"
+
+# --- MAIN SCRIPT (No need to edit below this line) ---
+
+def run_chunks():
+    """Runs every chunk that is not done yet. Returns True if all are done."""
+    manifest = load_manifest(MANIFEST_PATH)
+    chunks = manifest['chunks']
+    workdir = os.path.dirname(os.path.abspath(MANIFEST_PATH))
+
+    for chunk in chunks:
+        label = f"chunk {chunk['chunk']}/{len(chunks)} (layers {chunk['first_layer']}-{chunk['last_layer']})"
+        if chunk['status'] == 'done':
+            print(f"Skipping {label}: already done.")
+            continue
+
+        if chunk['base_in'] and not os.path.isdir(os.path.join(workdir, chunk['base_in'])):
+            print(f"ERROR: Cannot start {label}: base '{chunk['base_in']}' of the previous chunk is missing.")
+            return False
+
+        print(f"Running {label}...")
+        chunk['status'] = 'running'
+        save_manifest(MANIFEST_PATH, manifest)
+
+        command = shlex.split(SOLVER_COMMAND.format(export=chunk['export']))
+        return_code = subprocess.call(command, cwd=workdir)
+
+        if return_code == 0 and os.path.isdir(os.path.join(workdir, chunk['base_out'])):
+            chunk['status'] = 'done'
+            save_manifest(MANIFEST_PATH, manifest)
+            print(f"Finished {label}.")
+        else:
+            chunk['status'] = 'failed'
+            save_manifest(MANIFEST_PATH, manifest)
+            print(f"ERROR: {label} failed (exit code {return_code}). See '{chunk['mess']}'.")
+            print("Fix the problem and run this script again to resume from this chunk.")
+            return False
+
+    print(f"\nAll {len(chunks)} chunks are done.")
+    return True
+
+
+# --- Main execution block ---
+if __name__ == "__main__":
+    sys.exit(0 if run_chunks() else 1)
@@ -0,0 +1,64 @@
+# ==============================================================================
+#      Headless Batch Mode for the Salome Script Generators
+# ==============================================================================
+#
+# The generated Salome scripts publish every plane, translation and group in
+# the study and refresh the object browser at the end. On headless cluster
+# nodes (salome -t) this is pure overhead.
+#
+# Every geometry/mesh generator accepts a --batch flag (or BATCH_MODE = True in
+# its configuration):
+#
+#   python stl_mesh_with_groups --batch
+#
+# The generated script then:
+#   - publishes no intermediate objects (publish() below is a no-op),
+#   - does not refresh the GUI,
+#   - writes its result directly: mesh scripts export the final mesh to MED,
+#     geometry-only scripts save the study (with its groups) as an .hdf file.
+#
+# Run it unattended with:  salome -t <generated_script>.py
+#
+# ==============================================================================
+
+import os
+import sys
+
+BATCH_FLAG = '--batch'
+
+
+def batch_requested(argv=None):
+    """True when the generator was started with --batch."""
+    return BATCH_FLAG in (sys.argv[1:] if argv is None else argv)
+
+
+def result_filename(output_filename, extension):
+    """Batch result written next to the generated script, e.g. '<script>.med'."""
+    return os.path.abspath(os.path.splitext(output_filename)[0] + extension).replace('\\', '/')
+
+
+def publish_code(batch_mode):
+    """Code defining BATCH_MODE and publish(); goes right after geompy = geomBuilder.New()."""
+    return f'''# --- Batch mode: headless run, intermediates are not published ---
+BATCH_MODE = {bool(batch_mode)}
+
+def publish(shape, name):
+    """Publishes a shape in the study (skipped in batch mode)."""
+    if not BATCH_MODE:
+        geompy.addToStudy(shape, name)'''
+
+
+def finalize_code(result_file, mesh=None):
+    """
+    Code ending the generated script: in batch mode it exports `mesh` to MED
+    (or saves the study when there is no mesh), otherwise it refreshes the GUI.
+    """
+    if mesh:
+        export = f'{mesh}.ExportMED(r"{result_file}")'
+    else:
+        export = f'salome.myStudy.SaveAs(r"{result_file}", False, False)'
+    return f'''if BATCH_MODE:
+    {export}
+    print("Batch mode: result written to {result_file}")
+elif salome.sg.hasDesktop():
+    salome.sg.updateObjBrowser()'''
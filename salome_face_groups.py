@@ -0,0 +1,91 @@
+# ==============================================================================
+#      Batched Face Classification for the Generated Salome Scripts
+# ==============================================================================
+#
+# The generated scripts used to find their boundary faces with one
+# geompy.MakeCDG() + PointCoordinates() (and GetNormal()) per face: several
+# CORBA round-trips and a new GEOM object for every face, which scales badly
+# with STL-derived partitions.
+#
+# face_classification_code() returns the code block the generators paste
+# into their Salome script instead. It makes no GEOM call per face:
+#
+#   - the face IDs of the shape come from one SubShapeAllIDs() call,
+#   - the face IDs and top height of every solid from one GetSubShapesIDs()
+#     and one BoundingBox() call per solid,
+#   - the horizontal faces from one GetShapesOnPlaneWithLocationIDs(ST_ON)
+#     call per distinct height: the bottom plane (z_min) and the top of every
+#     solid (one per layer for a partitioned part),
+#
+# then classifies all faces with NumPy masks:
+#
+#   external    faces owned by one solid only (shared faces are internal)
+#   bottom      external faces on the lowest plane (z_min)
+#   tops        external faces on the plane at the top of their solid
+#   sides       all other external faces (walls, overhangs, downward faces)
+#
+# Heights closer than the tolerance (relative to the part height) are merged;
+# whether a face lies ON a plane is decided by GEOM with its own precision, so
+# a bottom that is not exactly flat ends up in the sides. Every group is then
+# filled with a single UnionIDs() call.
+#
+# The generated code expects `geompy`, `GEOM`, `np` (numpy), publish() (see
+# salome_batch.py), the partitioned shape, the list of its solids and
+# z_min / z_max to be defined.
+#
+# ==============================================================================
+
+
+def face_classification_code(shape, solids, relative_tolerance, group_names, publisher='publish'):
+    """
+    Returns the Salome code that classifies the faces of `shape` and creates
+    the face groups. `group_names` maps 'bottom', 'sides' and 'tops' to the
+    group names to create (a key can be left out to skip that group).
+    `publisher` is the function the groups are published with.
+
+    The code defines face_ids, face_z (height of the horizontal plane every
+    face ID lies on, NaN for the others), solid_face_ids (face IDs of every
+    solid, same order as `solids`), solid_tops, face_tolerance, is_bottom,
+    is_side, is_top and face_groups (group name -> GEOM group).
+    """
+    masks = {'bottom': 'is_bottom', 'sides': 'is_side', 'tops': 'is_top'}
+    groups = ", ".join(f"({name!r}, {masks[kind]})" for kind, name in group_names.items())
+    return f"""# --- Classify all faces with batched GEOM queries (no call per face) ---
+face_ids = np.array(geompy.SubShapeAllIDs({shape}, geompy.ShapeType["FACE"]))
+face_tolerance = {relative_tolerance} * (z_max - z_min)
+
+# Owners of every face: a face shared by two solids is internal
+owner_count = np.zeros(face_ids.max() + 1, dtype=int)
+owner_top = np.full(face_ids.max() + 1, -np.inf)
+solid_face_ids, solid_tops = [], []
+for solid in {solids}:
+    ids = np.array(geompy.GetSubShapesIDs({shape}, geompy.SubShapeAll(solid, geompy.ShapeType["FACE"])))
+    solid_tops.append(geompy.BoundingBox(solid)[5])
+    owner_count[ids] += 1
+    owner_top[ids] = np.maximum(owner_top[ids], solid_tops[-1])
+    solid_face_ids.append(ids)
+
+# Horizontal faces: one plane query per distinct height (bottom and solid tops)
+face_plane_heights = np.sort(np.append(solid_tops, z_min))
+face_plane_heights = face_plane_heights[np.append(True, np.diff(face_plane_heights) > face_tolerance)]
+face_z = np.full(face_ids.max() + 1, np.nan)
+vertical_axis = geompy.MakeVectorDXDYDZ(0, 0, 1)
+for z in face_plane_heights:
+    face_z[geompy.GetShapesOnPlaneWithLocationIDs({shape}, geompy.ShapeType["FACE"], vertical_axis,
+                                                   geompy.MakeVertex(0, 0, z), GEOM.ST_ON)] = z
+
+is_external = owner_count[face_ids] == 1
+is_bottom = is_external & (np.abs(face_z[face_ids] - z_min) <= face_tolerance)
+is_top = is_external & ~is_bottom & (np.abs(face_z[face_ids] - owner_top[face_ids]) <= face_tolerance)
+is_side = is_external & ~is_bottom & ~is_top
+print(f"Classified {{len(face_ids)}} faces: {{is_bottom.sum()}} bottom, {{is_side.sum()}} sides, {{is_top.sum()}} tops")
+
+face_groups = {{}}
+for group_name, mask in ({groups}, ):
+    if not mask.any():
+        continue
+    face_group = geompy.CreateGroup({shape}, geompy.ShapeType["FACE"])
+    geompy.UnionIDs(face_group, face_ids[mask].tolist())
+    {publisher}(face_group, group_name)
+    face_groups[group_name] = face_group
+    print(f"Created GEOM group '{{group_name}}'")"""
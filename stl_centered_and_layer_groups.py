@@ -9,6 +9,7 @@
 
 # Please run this using file instead of copy pasting directly
 
+import os
 import sys
 import salome
 salome.salome_init()
@@ -16,8 +17,12 @@ import salome_notebook
 notebook = salome_notebook.NoteBook()
 
 import GEOM
+import numpy as np
 from salome.geom import geomBuilder
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from salome_batch import batch_requested, result_filename
+
 # --- 1. CONFIGURATION ---
 # Please edit these two variables
 
@@ -27,109 +32,149 @@ STL_FILE_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run/stl/rocket1.
 # The desired number of layers/divisions.
 NUMBER_OF_DIVISIONS = 6
 
+# How the layers are made:
+# 'PARTITION': heal the STL into a solid and cut it with N-1 planes in one
+#              MakePartition (slow and fragile for many divisions).
+# 'EXTRUDE':   slice the STL with stl_slicer.py (next to this script) and
+#              extrude the layer contours, then glue the stacked layers.
+LAYER_METHOD = 'PARTITION'  # Options: 'PARTITION', 'EXTRUDE'
+
+# Batch mode (or run with: salome -t stl_centered_and_layer_groups.py args:--batch):
+# the intermediate shapes are not published, only Partition_1 and its layer
+# groups, and the study is saved next to this script as an .hdf file.
+BATCH_MODE = False
+
 # --- MAIN SCRIPT ---
 
+BATCH_MODE = BATCH_MODE or batch_requested()
+
 # Wrap the entire workflow in a try/except block for clear error messages
 try:
     print("--- Starting script ---")
     geompy = geomBuilder.New()
 
-    # =========================================================================
-    # --- 2. IMPORT AND HEAL STL ---
-    # =========================================================================
-    print(f"Importing and healing STL file: {STL_FILE_PATH}")
+    if LAYER_METHOD == 'EXTRUDE':
+        # =====================================================================
+        # --- 2-4. SLICE THE STL AND EXTRUDE THE LAYERS ---
+        # =====================================================================
+        from stl_slicer import center_triangles, extrude_contours, read_stl, slice_layers
+
+        print(f"Reading and slicing STL file: {STL_FILE_PATH}")
+        triangles = center_triangles(read_stl(STL_FILE_PATH))
+        contours = slice_layers(triangles, NUMBER_OF_DIVISIONS)
+        print(f"Extruding {NUMBER_OF_DIVISIONS} layers of thickness {contours['layer_thickness']:.3f} mm...")
+        Partition_1, layer_solid_ids = extrude_contours(geompy, contours)
+        geompy.addToStudy(Partition_1, 'Partition_1')
+        print("Extrusion complete.")
+    else:
+        # =====================================================================
+        # --- 2. IMPORT AND HEAL STL ---
+        # =====================================================================
+        print(f"Importing and healing STL file: {STL_FILE_PATH}")
     
-    # This is a robust chain of commands to convert an STL to a usable solid
-    imported_stl = geompy.ImportSTL(STL_FILE_PATH, False) # False = do not create sewing
-    shell = geompy.MakeShell([imported_stl])
-    solid = geompy.MakeSolid([shell])
-    solid = geompy.RemoveInternalFaces(solid)
-    part_solid = geompy.RemoveExtraEdges(solid)
-
-    # CRITICAL CHECK: Verify that the solid was created successfully.
-    if part_solid is None:
-        raise RuntimeError("Failed to create a valid solid from the STL. The file is likely damaged or non-manifold. Please repair it in a 3D modeling tool like Meshmixer or Blender.")
+        # This is a robust chain of commands to convert an STL to a usable solid
+        imported_stl = geompy.ImportSTL(STL_FILE_PATH, False) # False = do not create sewing
+        shell = geompy.MakeShell([imported_stl])
+        solid = geompy.MakeSolid([shell])
+        solid = geompy.RemoveInternalFaces(solid)
+        part_solid = geompy.RemoveExtraEdges(solid)
+
+        # CRITICAL CHECK: Verify that the solid was created successfully.
+        if part_solid is None:
+            raise RuntimeError("Failed to create a valid solid from the STL. The file is likely damaged or non-manifold. Please repair it in a 3D modeling tool like Meshmixer or Blender.")
     
-    print("STL successfully converted to a solid.")
-    geompy.addToStudy(part_solid, 'original_healed_solid')
-
-    # =========================================================================
-    # --- 3. CENTER THE GEOMETRY ---
-    # =========================================================================
-    print("Centering the part so its base is at Z=0...")
+        print("STL successfully converted to a solid.")
+        if not BATCH_MODE:
+            geompy.addToStudy(part_solid, 'original_healed_solid')
+
+        # =====================================================================
+        # --- 3. CENTER THE GEOMETRY ---
+        # =====================================================================
+        print("Centering the part so its base is at Z=0...")
     
-    bbox = geompy.BoundingBox(part_solid)
-    center_x = (bbox[0] + bbox[1]) / 2.0
-    center_y = (bbox[2] + bbox[3]) / 2.0
-    z_min = bbox[4] # Use index 4 for Z_min
-
-    # This is the final, positioned part solid that we will work with
-    part_solid_centered = geompy.MakeTranslation(part_solid, -center_x, -center_y, -z_min)
-    geompy.addToStudy(part_solid_centered, 'part_solid_centered')
-    print("Part centered successfully.")
+        bbox = geompy.BoundingBox(part_solid)
+        center_x = (bbox[0] + bbox[1]) / 2.0
+        center_y = (bbox[2] + bbox[3]) / 2.0
+        z_min = bbox[4] # Use index 4 for Z_min
+
+        # This is the final, positioned part solid that we will work with
+        part_solid_centered = geompy.MakeTranslation(part_solid, -center_x, -center_y, -z_min)
+        if not BATCH_MODE:
+            geompy.addToStudy(part_solid_centered, 'part_solid_centered')
+        print("Part centered successfully.")
     
-    # =========================================================================
-    # --- 4. PARTITION THE SOLID INTO LAYERS ---
-    # =========================================================================
-    # Get the dimensions of the newly centered part
-    bbox_centered = geompy.BoundingBox(part_solid_centered)
-    part_z_min = bbox_centered[4] # Should be 0.0
-    part_z_max = bbox_centered[5]
-    layer_thickness = (part_z_max - part_z_min) / NUMBER_OF_DIVISIONS
+        # =====================================================================
+        # --- 4. PARTITION THE SOLID INTO LAYERS ---
+        # =====================================================================
+        # Get the dimensions of the newly centered part
+        bbox_centered = geompy.BoundingBox(part_solid_centered)
+        part_z_min = bbox_centered[4] # Should be 0.0
+        part_z_max = bbox_centered[5]
+        layer_thickness = (part_z_max - part_z_min) / NUMBER_OF_DIVISIONS
     
-    print(f"Partitioning solid into {NUMBER_OF_DIVISIONS} layers of thickness {layer_thickness:.3f} mm...")
-
-    # Create cutting planes
-    cutting_tools = []
-    plane_size = max(bbox_centered[1]-bbox_centered[0], bbox_centered[3]-bbox_centered[2]) * 1.5
-    plane_proto = geompy.MakePlaneLCS(None, plane_size, plane_size)
-
-    for i in range(1, NUMBER_OF_DIVISIONS):
-        z_pos = part_z_min + (i * layer_thickness)
-        plane = geompy.MakeTranslation(plane_proto, 0, 0, z_pos)
-        cutting_tools.append(plane)
-
-    # Perform the partition
-    Partition_1 = geompy.MakePartition([part_solid_centered], cutting_tools, [], [], geompy.ShapeType["SOLID"], 0, [], 0)
+        print(f"Partitioning solid into {NUMBER_OF_DIVISIONS} layers of thickness {layer_thickness:.3f} mm...")
+
+        # Create cutting planes
+        cutting_tools = []
+        plane_heights = []
+        plane_size = max(bbox_centered[1]-bbox_centered[0], bbox_centered[3]-bbox_centered[2]) * 1.5
+        plane_proto = geompy.MakePlaneLCS(None, plane_size, plane_size)
+
+        for i in range(1, NUMBER_OF_DIVISIONS):
+            z_pos = part_z_min + (i * layer_thickness)
+            plane = geompy.MakeTranslation(plane_proto, 0, 0, z_pos)
+            cutting_tools.append(plane)
+            plane_heights.append(z_pos)
+
+        # Perform the partition
+        Partition_1 = geompy.MakePartition([part_solid_centered], cutting_tools, [], [], geompy.ShapeType["SOLID"], 0, [], 0)
     
-    # CRITICAL CHECK: Verify the partition worked
-    if Partition_1 is None:
-        raise RuntimeError("Partition operation failed. The geometry may be too complex, or the STL still contains errors.")
+        # CRITICAL CHECK: Verify the partition worked
+        if Partition_1 is None:
+            raise RuntimeError("Partition operation failed. The geometry may be too complex, or the STL still contains errors.")
 
-    geompy.addToStudy(Partition_1, 'Partition_1')
-    print("Partition complete.")
+        geompy.addToStudy(Partition_1, 'Partition_1')
+        print("Partition complete.")
 
     # =========================================================================
     # --- 5. CREATE VOLUME GROUPS FOR EACH LAYER ---
     # =========================================================================
     print("Creating volume groups for each layer...")
     
-    # Get all the individual solid volumes resulting from the partition
-    all_solids_in_partition = geompy.SubShapeAll(Partition_1, geompy.ShapeType["SOLID"])
-
-    # Sort the solids by their Z-position to ensure correct layer numbering
-    sorted_layers = sorted(
-        all_solids_in_partition,
-        key=lambda s: geompy.PointCoordinates(geompy.MakeCDG(s))[2]
-    )
-
-    # Loop through the sorted solids and create a named group for each
-    for i, layer_shape in enumerate(sorted_layers):
+    if LAYER_METHOD != 'EXTRUDE':
+        # Get all the individual solid volumes resulting from the partition
+        # and their IDs in one call
+        all_solids_in_partition = geompy.SubShapeAll(Partition_1, geompy.ShapeType["SOLID"])
+        all_solid_ids = np.array(geompy.GetSubShapesIDs(Partition_1, all_solids_in_partition))
+
+        # Bucket the solids into layers by the mid-height of their bounding
+        # box against the known cutting planes (a layer may hold several solids)
+        solid_z = np.array([sum(geompy.BoundingBox(s)[4:6]) / 2.0 for s in all_solids_in_partition])
+        layer_index = np.searchsorted(plane_heights, solid_z)
+        layer_solid_ids = [all_solid_ids[layer_index == i].tolist() for i in range(NUMBER_OF_DIVISIONS)]
+
+    # Loop through the layers and create a named group for each
+    for i, solid_ids in enumerate(layer_solid_ids):
         group_name = f"layer_{i + 1}"
         
         # Create an empty group on the Partition_1 object
         layer_group = geompy.CreateGroup(Partition_1, geompy.ShapeType["SOLID"])
         
-        # Get the unique ID of the sub-shape (the layer solid)
-        sub_shape_id = geompy.GetSubShapeID(Partition_1, layer_shape)
-        
-        # Add that ID to the group
-        geompy.UnionIDs(layer_group, [sub_shape_id])
+        # Add the IDs of the layer's solids to the group
+        geompy.UnionIDs(layer_group, solid_ids)
         
         # Add the group to the study tree as a child of Partition_1
         geompy.addToStudyInFather(Partition_1, layer_group, group_name)
-        
-        print(f"Created group: {group_name}")
+        if not BATCH_MODE:
+            print(f"Created group: {group_name}")
+    
+    print(f"Created {len(layer_solid_ids)} layer groups.")
+
+    if BATCH_MODE:
+        # Headless run: the study (Partition_1 and its groups) is the result
+        study_file = result_filename(os.path.abspath(__file__), ".hdf")
+        salome.myStudy.SaveAs(study_file, False, False)
+        print(f"Batch mode: result written to {study_file}")
     
     print("\nAll tasks completed successfully.")
 
@@ -141,6 +186,6 @@ except Exception as e:
 
 finally:
     # This part always runs, even if the script fails
-    if salome.sg.hasDesktop():
+    if not BATCH_MODE and salome.sg.hasDesktop():
         salome.sg.updateObjBrowser()
     print("--- Script finished execution ---")
@@ -9,6 +9,10 @@
 #  4. Load and run the new file inside Salome.
 # =============================================================================
 
+import os
+
+from salome_batch import batch_requested, finalize_code, publish_code, result_filename
+
 # --- CONFIGURATION ---
 # Edit the variables below.
 
@@ -20,9 +24,23 @@ STL_FILE_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run/cut1.stl"
 # The desired number of layers/divisions. Must be 2 or more.
 NUMBER_OF_DIVISIONS = 50
 
+# How the layers are made:
+# 'PARTITION': Salome cuts the healed solid with N-1 planes in one MakePartition
+#              (slow and fragile for 50-500 divisions).
+# 'EXTRUDE':   this generator reads and slices the STL itself (stl_slicer.py)
+#              and writes the layer contours to '<output>_contours.json'. The
+#              Salome script only extrudes and glues the contours. This mode
+#              needs the STL file on the machine that runs this generator.
+SLICING_METHOD = 'PARTITION'  # Options: 'PARTITION', 'EXTRUDE'
+
 # The name of the Salome script file that this script will create.
 OUTPUT_FILENAME = "salome_generated_script.py"
 
+# --- BATCH MODE ---
+# True (or run with --batch): headless run; only the final partition is
+# published, and the study is saved next to the generated script.
+BATCH_MODE = False
+
 # --- MAIN SCRIPT (No need to edit below this line) ---
 
 def generate_script():
@@ -35,10 +53,19 @@ def generate_script():
 
     # Prepare the path for the Salome script
     stl_path_for_salome = STL_FILE_PATH.replace('\\', '/')
+    batch_mode = BATCH_MODE or batch_requested()
+    study_file = result_filename(OUTPUT_FILENAME, ".hdf")
 
     print(f"Generating script file named '{OUTPUT_FILENAME}'...")
     print(f"It will process '{stl_path_for_salome}' with {NUMBER_OF_DIVISIONS} divisions.")
 
+    if SLICING_METHOD == 'EXTRUDE':
+        script_content = generate_extrude_script(stl_path_for_salome, batch_mode, study_file)
+        if script_content is None:
+            return
+        write_script(script_content)
+        return
+
     # 2. Build the content of the new script file using the requested logic.
     # This follows the steps from your example: import, heal, partition.
     
@@ -61,6 +88,8 @@ import SALOMEDS
 
 geompy = geomBuilder.New()
 
+{publish_code(batch_mode)}
+
 # --- GEOMETRY PROCESSING ---
 
 # 1. Import STL and convert to a healed solid
@@ -99,17 +128,78 @@ print("Partition complete.")
 
 # --- ADD OBJECTS TO STUDY ---
 # (No groups will be created, as requested)
-geompy.addToStudy(cut1_stl_1, 'imported_stl')
-geompy.addToStudy(final_solid, 'final_solid')
+publish(cut1_stl_1, 'imported_stl')
+publish(final_solid, 'final_solid')
 geompy.addToStudy(Partition_1, 'Partition_1')
 
-if salome.sg.hasDesktop():
-  salome.sg.updateObjBrowser()
+{finalize_code(study_file)}
 
 print("\\nSalome script finished execution.")
 """
 
     # 3. Write the content to the new file
+    write_script(script_content)
+
+
+def generate_extrude_script(stl_path_for_salome, batch_mode, study_file):
+    """Slices the STL and returns a Salome script that extrudes the layer contours."""
+    # Imported here so the 'PARTITION' mode still runs without NumPy (e.g. online).
+    from stl_slicer import read_stl, slice_layers, write_contours
+
+    print(f"Slicing '{STL_FILE_PATH}' into {NUMBER_OF_DIVISIONS} layers...")
+    try:
+        triangles = read_stl(STL_FILE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"\nERROR: Could not read the STL file. {e}")
+        return None
+    contours = slice_layers(triangles, NUMBER_OF_DIVISIONS)
+    contours_filename = os.path.abspath(os.path.splitext(OUTPUT_FILENAME)[0] + "_contours.json").replace('\\', '/')
+    write_contours(contours, contours_filename)
+    print(f"Contours of {len(triangles)} triangles written to '{contours_filename}'.")
+    slicer_dir = os.path.dirname(os.path.abspath(__file__)).replace('\\', '/')
+
+    return f"""#!/usr/bin/env python
+#
+# This file was generated automatically.
+# It builds the layers of '{stl_path_for_salome}' by extruding the
+# contours precomputed by stl_slicer.py (no partition needed).
+#
+import sys
+import salome
+
+salome.salome_init()
+import salome_notebook
+notebook = salome_notebook.NoteBook()
+
+import GEOM
+from salome.geom import geomBuilder
+import SALOMEDS
+
+sys.path.insert(0, r"{slicer_dir}")
+from stl_slicer import extrude_contours, load_contours
+
+geompy = geomBuilder.New()
+
+{publish_code(batch_mode)}
+
+# --- GEOMETRY PROCESSING ---
+print("Extruding {NUMBER_OF_DIVISIONS} layers from the precomputed contours...")
+contours = load_contours(r"{contours_filename}")
+Partition_1, layer_solid_ids = extrude_contours(geompy, contours)
+print(f"Layers built: {{sum(len(ids) for ids in layer_solid_ids)}} solids.")
+
+# --- ADD OBJECTS TO STUDY ---
+# (No groups will be created, as requested)
+geompy.addToStudy(Partition_1, 'Partition_1')
+
+{finalize_code(study_file)}
+
+print("\\nSalome script finished execution.")
+"""
+
+
+def write_script(script_content):
+    """Writes the generated Salome script to OUTPUT_FILENAME."""
     try:
         with open(OUTPUT_FILENAME, "w") as f:
             f.write(script_content)
@@ -0,0 +1,256 @@
+# ==============================================================================
+#      STL Reader and Z-Slicer for Layered Geometries
+# ==============================================================================
+#
+# Partitioning an STL solid with N-1 cutting planes in ONE geompy.MakePartition
+# is the slowest (and least reliable) step of the geometry scripts once N
+# reaches 50-500 divisions.
+#
+# This module slices the STL outside of Salome instead, with NumPy only:
+#
+#   1. read_stl() reads binary or ASCII STL files into an (n, 3, 3) array.
+#   2. slice_layers() cuts every layer at its mid-height in one sweep. The
+#      triangles are sorted by their lowest z once; for each plane a
+#      searchsorted() on that index gives the triangles that start below it,
+#      and a vectorised test keeps those that also end above it. Their
+#      crossing edges are intersected all at once and chained into closed
+#      loops. Each loop gets a nesting depth (even = outer boundary, odd =
+#      hole) and the index of the loop it lies in.
+#   3. write_contours() stores the loops as JSON, and extrude_contours()
+#      (run inside Salome) turns each layer's loops into faces, extrudes them
+#      by the layer thickness and glues the stacked prisms, which is much
+#      cheaper than a partition.
+#
+# The extruded layers are prismatic: the side walls are a staircase of the
+# mid-height sections, as in the real layer-by-layer build.
+#
+# --- HOW TO USE (offline check) ---
+#   Set the configuration below and run:  python stl_slicer.py
+#   It prints the number of loops and the cross-section area of every layer,
+#   e.g. to compare against a known shape (a box or a cylinder).
+#
+# ==============================================================================
+
+import json
+import os
+import re
+
+import numpy as np
+
+# --- CONFIGURATION (offline check) ---
+STL_FILE_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run/cut1.stl"
+NUMBER_OF_DIVISIONS = 50
+CONTOURS_FILENAME = "stl_contours.json"
+
+_FLOAT = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_VERTEX = re.compile(rf"vertex\s+({_FLOAT})\s+({_FLOAT})\s+({_FLOAT})")
+
+
+def read_stl(path):
+    """Reads a binary or ASCII STL file and returns its triangles as an (n, 3, 3) array."""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    # A binary file is exactly 84 + 50 * n bytes (even if its header starts with 'solid').
+    if len(data) >= 84:
+        count = int(np.frombuffer(data, dtype='<u4', count=1, offset=80)[0])
+        if len(data) == 84 + 50 * count:
+            record = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+            return np.frombuffer(data, dtype=record, count=count, offset=84)['vertices'].astype(float)
+
+    vertices = _VERTEX.findall(data.decode('ascii', errors='replace'))
+    if not vertices or len(vertices) % 3:
+        raise ValueError(f"'{path}' is neither a binary nor an ASCII STL file.")
+    return np.array(vertices, dtype=float).reshape(-1, 3, 3)
+
+
+def center_triangles(triangles):
+    """Moves the part so it is centred in X/Y and its base lies at Z=0."""
+    lower, upper = triangles.reshape(-1, 3).min(axis=0), triangles.reshape(-1, 3).max(axis=0)
+    offset = np.array([(lower[0] + upper[0]) / 2.0, (lower[1] + upper[1]) / 2.0, lower[2]])
+    return triangles - offset
+
+
+def _chain_segments(segments, tolerance):
+    """Chains (m, 2, 2) line segments into closed loops of (x, y) points."""
+    keys = np.round(segments / tolerance).astype(np.int64)
+    neighbours = {}
+    for s, (start, end) in enumerate(keys):
+        neighbours.setdefault(tuple(start), []).append(s)
+        neighbours.setdefault(tuple(end), []).append(s)
+
+    used = np.zeros(len(segments), dtype=bool)
+    loops = []
+    for first in range(len(segments)):
+        if used[first]:
+            continue
+        used[first] = True
+        points = [segments[first][0]]
+        start_key, key = tuple(keys[first][0]), tuple(keys[first][1])
+        while key != start_key:
+            following = next((s for s in neighbours[key] if not used[s]), None)
+            if following is None:
+                break  # open chain (the STL has a hole here): close it as it is
+            used[following] = True
+            end = 1 if tuple(keys[following][0]) == key else 0
+            points.append(segments[following][1 - end])
+            key = tuple(keys[following][end])
+        if len(points) >= 3:
+            loops.append(np.array(points))
+    return loops
+
+
+def _polygon_area(points):
+    """Signed area of a closed (x, y) polygon (shoelace formula)."""
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def _contains(points, x, y):
+    """Even-odd test: is (x, y) inside the closed polygon `points`?"""
+    xa, ya = points[:, 0], points[:, 1]
+    xb, yb = np.roll(xa, -1), np.roll(ya, -1)
+    crosses = (ya > y) != (yb > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = xa + (y - ya) * (xb - xa) / (yb - ya)
+    return bool(np.count_nonzero(crosses & (x < x_cross)) % 2)
+
+
+def _nest_loops(loops):
+    """Returns (depth, parent) of every loop; parent is the innermost loop containing it."""
+    areas = [abs(_polygon_area(loop)) for loop in loops]
+    nesting = []
+    for i, loop in enumerate(loops):
+        x, y = loop[0]
+        containers = [j for j in range(len(loops)) if j != i and areas[j] > areas[i] and _contains(loops[j], x, y)]
+        parent = min(containers, key=lambda j: areas[j]) if containers else None
+        nesting.append((len(containers), parent))
+    return nesting
+
+
+def slice_triangles(triangles, z_levels, tolerance=1e-7):
+    """
+    Cuts the triangles at every height of `z_levels` and returns, per level,
+    a list of loop dicts {'points': (k, 2) array, 'depth': int, 'parent': int or None}.
+    """
+    z = triangles[:, :, 2]
+    z_low, z_high = z.min(axis=1), z.max(axis=1)
+
+    # Sorted z-interval index: triangles ordered by their lowest vertex
+    order = np.argsort(z_low, kind='stable')
+    z_low_sorted = z_low[order]
+
+    sections = []
+    for level in z_levels:
+        candidates = order[:np.searchsorted(z_low_sorted, level, side='right')]
+        active = candidates[z_high[candidates] > level]
+        tri = triangles[active]
+
+        # A vertex on the plane counts as above it, so every active
+        # triangle has exactly two crossing edges.
+        above = tri[:, :, 2] >= level
+        crossing = above.sum(axis=1) % 3 != 0
+        tri, above = tri[crossing], above[crossing]
+
+        points = np.empty((len(tri), 3, 2))
+        edge_crosses = np.empty((len(tri), 3), dtype=bool)
+        for e, (p, q) in enumerate(((0, 1), (1, 2), (2, 0))):
+            edge_crosses[:, e] = above[:, p] != above[:, q]
+            dz = tri[:, q, 2] - tri[:, p, 2]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                w = np.where(edge_crosses[:, e], (level - tri[:, p, 2]) / dz, 0.0)
+            points[:, e] = tri[:, p, :2] + w[:, None] * (tri[:, q, :2] - tri[:, p, :2])
+        pick = np.argsort(~edge_crosses, axis=1, kind='stable')[:, :2]
+        segments = np.take_along_axis(points, pick[:, :, None], axis=1)
+
+        loops = _chain_segments(segments, tolerance)
+        sections.append([{'points': loop, 'depth': depth, 'parent': parent}
+                         for loop, (depth, parent) in zip(loops, _nest_loops(loops))])
+    return sections
+
+
+def slice_layers(triangles, number_of_divisions):
+    """
+    Splits the part height into `number_of_divisions` equal layers and slices
+    each one at mid-height. Returns the contour dict written by write_contours().
+    """
+    z = triangles[:, :, 2]
+    z_min, z_max = float(z.min()), float(z.max())
+    thickness = (z_max - z_min) / number_of_divisions
+    bottoms = z_min + thickness * np.arange(number_of_divisions)
+    sections = slice_triangles(triangles, bottoms + thickness / 2.0)
+
+    return {
+        'z_min': z_min,
+        'z_max': z_max,
+        'layer_thickness': thickness,
+        'layers': [{'layer': i + 1,
+                    'z_bottom': float(bottom),
+                    'z_top': float(bottom + thickness),
+                    'loops': [{'points': loop['points'].tolist(), 'depth': loop['depth'], 'parent': loop['parent']}
+                              for loop in section]}
+                   for i, (bottom, section) in enumerate(zip(bottoms, sections))],
+    }
+
+
+def section_area(layer):
+    """Net cross-section area of one layer of a contour dict (holes subtracted)."""
+    return sum(abs(_polygon_area(np.array(loop['points']))) * (1 if loop['depth'] % 2 == 0 else -1)
+               for loop in layer['loops'])
+
+
+def write_contours(contours, filename):
+    """Writes the contour dict as JSON."""
+    with open(filename, 'w') as f:
+        json.dump(contours, f)
+
+
+def load_contours(filename):
+    """Reads a contour dict written by write_contours()."""
+    with open(filename) as f:
+        return json.load(f)
+
+
+def extrude_contours(geompy, contours, glue_tolerance=1e-5):
+    """
+    Builds the layered solid inside Salome: every outer loop (with its holes)
+    becomes a face, which is extruded by the layer thickness. The prisms are
+    glued into one shape so neighbouring layers share their faces.
+
+    Returns (shape, layer_solid_ids) where layer_solid_ids[i] lists the IDs
+    of the solids of layer i+1 in `shape`.
+    """
+    vz = geompy.MakeVectorDXDYDZ(0, 0, 1)
+    prisms = []
+    for layer in contours['layers']:
+        z_bottom = layer['z_bottom']
+        wires = [geompy.MakePolyline([geompy.MakeVertex(x, y, z_bottom) for x, y in loop['points']], True)
+                 for loop in layer['loops']]
+        for i, loop in enumerate(layer['loops']):
+            if loop['depth'] % 2:
+                continue  # holes are added to their outer loop
+            holes = [wires[j] for j, other in enumerate(layer['loops']) if other['parent'] == i and other['depth'] % 2]
+            face = geompy.MakeFaceWires([wires[i]] + holes, 1)
+            prisms.append(geompy.MakePrismVecH(face, vz, layer['z_top'] - z_bottom))
+
+    shape = geompy.MakeGlueFaces(geompy.MakeCompound(prisms), glue_tolerance)
+
+    # Bucket the solids into layers by the mid-height of their bounding box
+    solids = geompy.SubShapeAll(shape, geompy.ShapeType["SOLID"])
+    solid_ids = np.array(geompy.GetSubShapesIDs(shape, solids))
+    solid_z = np.array([sum(geompy.BoundingBox(solid)[4:6]) / 2.0 for solid in solids])
+    layer_index = np.searchsorted([layer['z_top'] for layer in contours['layers'][:-1]], solid_z)
+    layer_solid_ids = [solid_ids[layer_index == i].tolist() for i in range(len(contours['layers']))]
+    return shape, layer_solid_ids
+
+
+if __name__ == "__main__":
+    print(f"Reading STL: {STL_FILE_PATH}")
+    triangles = read_stl(STL_FILE_PATH)
+    print(f"  {len(triangles)} triangles")
+    contours = slice_layers(triangles, NUMBER_OF_DIVISIONS)
+    for layer in contours['layers']:
+        print(f"  layer {layer['layer']}: z = {layer['z_bottom']:.4f} .. {layer['z_top']:.4f}, "
+              f"{len(layer['loops'])} loops, area = {section_area(layer):.4f}")
+    write_contours(contours, CONTOURS_FILENAME)
+    print(f"Contours written to: {os.path.abspath(CONTOURS_FILENAME)}")
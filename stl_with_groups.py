@@ -8,6 +8,8 @@
 #  3. Load and run the new file inside Salome. The groups will now appear.
 # =============================================================================
 
+from salome_batch import batch_requested, finalize_code, publish_code, result_filename
+
 # --- CONFIGURATION ---
 # Edit the variables below.
 
@@ -20,6 +22,11 @@ NUMBER_OF_DIVISIONS = 6
 # The name of the Salome script file that this script will create.
 OUTPUT_FILENAME = "salome_generated_script.py"
 
+# --- BATCH MODE ---
+# True (or run with --batch): headless run; only the final partition and its
+# groups are published, and the study is saved next to the generated script.
+BATCH_MODE = False
+
 # --- MAIN SCRIPT (No need to edit below this line) ---
 
 def generate_script():
@@ -28,6 +35,8 @@ def generate_script():
     print("--- Salome STL Partition & Grouping Script Generator (v5 - Final) ---")
     
     stl_path_for_salome = STL_FILE_PATH.replace('\\', '/')
+    batch_mode = BATCH_MODE or batch_requested()
+    study_file = result_filename(OUTPUT_FILENAME, ".hdf")
 
     print(f"Generating script file named '{OUTPUT_FILENAME}'...")
 
@@ -53,6 +62,8 @@ import SALOMEDS
 
 geompy = geomBuilder.New()
 
+{publish_code(batch_mode)}
+
 # --- GEOMETRY PROCESSING ---
 
 # 1. Import STL and convert to a healed solid
@@ -118,10 +129,9 @@ for i, layer_shape in enumerate(sorted_layer_shapes):
 print("Group creation complete.")
 
 # --- ADD OTHER OBJECTS TO STUDY ---
-geompy.addToStudy(final_solid, 'final_solid')
+publish(final_solid, 'final_solid')
 
-if salome.sg.hasDesktop():
-  salome.sg.updateObjBrowser()
+{finalize_code(study_file)}
 
 print("\\nSalome script finished execution.")
 """
@@ -0,0 +1,301 @@
+# ==============================================================================
+#      Layered Hex (Voxel) Mesher: STL -> MED without GEOM/SMESH
+# ==============================================================================
+#
+# For element-birth simulations the mesh only has to follow the layers, not
+# the exact CAD surface. The Salome workflow (STL -> healed solid ->
+# partition -> GMSH tets -> groups) takes minutes to hours; this script builds
+# a layer-aligned hexahedral mesh directly from the STL with NumPy:
+#
+#   1. The part is centred in X/Y with its base at Z=0 (as in
+#      stl_centered_and_layer_groups.py).
+#   2. A grid of columns (VOXEL_SIZE in X/Y) is laid over the part. In Z the
+#      grid follows the layers: ELEMENTS_PER_LAYER cells per layer, plus the
+#      substrate cells below Z=0.
+#   3. Inside test by ray parity: a vertical ray is cast through every column
+#      centre, all its triangle crossings are found at once (vectorised
+#      barycentric test) and a cell centre is inside when an odd number of
+#      crossings lies below it.
+#   4. The MED file is written with h5py and has the groups the .comm
+#      generators expect:
+#        layer{i}            HEXA8, cells of layer i
+#        substrate           HEXA8, the base plate (if SUBSTRATE_THICKNESS > 0)
+#        bottom, bottoms     QUAD4, faces on the lowest plane (fixed temperature)
+#        tops                QUAD4, free faces pointing up
+#        sides               QUAD4, all other free faces
+#
+# --- HOW TO USE ---
+# 1. Set the configuration below and run:  python voxel_mesher.py
+# 2. Point the .comm generators at the written MED file (Mesh_1.med).
+#
+# ==============================================================================
+
+import os
+
+import h5py
+import numpy as np
+
+from stl_slicer import center_triangles, read_stl
+
+# --- CONFIGURATION ---
+STL_FILE_PATH = "C:/Users/DELL/Downloads/v2024/salome_meca/lpbf_run/cut1.stl"
+NUMBER_OF_LAYERS = 10
+ELEMENTS_PER_LAYER = 1       # hex elements through the thickness of one layer
+VOXEL_SIZE = 1.0             # mm, element size in X and Y
+
+# Base plate below the part (set SUBSTRATE_THICKNESS = 0 for no substrate)
+SUBSTRATE_THICKNESS = 5.0    # mm
+SUBSTRATE_DIVISIONS = 2      # hex elements through the substrate thickness
+SUBSTRATE_MARGIN = 2.0       # mm, plate overhang around the part in X and Y
+
+MESH_NAME = "Mesh_1"
+OUTPUT_FILENAME = "Mesh_1.med"
+
+# MED numbers the nodes of a volume element with the first face oriented the
+# other way round from Code_Aster/VTK: MED HE8 = Aster (1, 4, 3, 2, 5, 8, 7, 6).
+_ASTER_TO_MED_HE8 = [0, 3, 2, 1, 4, 7, 6, 5]
+_MED_GEOMETRY = {'HE8': 308, 'QU4': 204}
+_NAME_LENGTH = 80
+
+
+def column_crossings(triangles, x_centres, y_centres, spacing, chunk=4096):
+    """
+    Casts a vertical ray through every column centre (regular grid with the
+    given spacing) and returns (column index, z) of all crossings with the
+    triangles. Column (i, j) has the index i * len(y_centres) + j.
+    """
+    x0, y0, h = x_centres[0], y_centres[0], spacing
+    ny = len(y_centres)
+    columns, z_hits = [], []
+
+    for start in range(0, len(triangles), chunk):
+        tri = triangles[start:start + chunk]
+        # Column index ranges covered by each triangle's bounding box
+        i_lo = np.maximum(np.ceil((tri[:, :, 0].min(axis=1) - x0) / h), 0).astype(np.int64)
+        i_hi = np.minimum(np.floor((tri[:, :, 0].max(axis=1) - x0) / h), len(x_centres) - 1).astype(np.int64)
+        j_lo = np.maximum(np.ceil((tri[:, :, 1].min(axis=1) - y0) / h), 0).astype(np.int64)
+        j_hi = np.minimum(np.floor((tri[:, :, 1].max(axis=1) - y0) / h), ny - 1).astype(np.int64)
+        ni, nj = np.maximum(i_hi - i_lo + 1, 0), np.maximum(j_hi - j_lo + 1, 0)
+        counts = ni * nj
+        if not counts.sum():
+            continue
+
+        # One row per (triangle, candidate column) pair
+        t = np.repeat(np.arange(len(tri)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        i = i_lo[t] + offset // nj[t]
+        j = j_lo[t] + offset % nj[t]
+        px, py = x_centres[i], y_centres[j]
+
+        a, b, c = tri[t, 0], tri[t, 1], tri[t, 2]
+        area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u = ((b[:, 0] - px) * (c[:, 1] - py) - (b[:, 1] - py) * (c[:, 0] - px)) / area
+            v = ((c[:, 0] - px) * (a[:, 1] - py) - (c[:, 1] - py) * (a[:, 0] - px)) / area
+        w = 1.0 - u - v
+        hit = (area != 0) & (u >= 0) & (v >= 0) & (w >= 0)
+        columns.append((i * ny + j)[hit])
+        z_hits.append(u[hit] * a[hit, 2] + v[hit] * b[hit, 2] + w[hit] * c[hit, 2])
+
+    if not columns:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(columns), np.concatenate(z_hits)
+
+
+def voxelize(triangles, x_centres, y_centres, z_centres, spacing):
+    """Returns the (nx, ny, nz) boolean array of cell centres inside the part."""
+    nx, ny = len(x_centres), len(y_centres)
+    inside = np.zeros((nx, ny, len(z_centres)), dtype=bool)
+    columns, z_hits = column_crossings(triangles, x_centres, y_centres, spacing)
+
+    order = np.lexsort((z_hits, columns))
+    columns, z_hits = columns[order], z_hits[order]
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    ends = np.r_[starts[1:], len(columns)]
+    for s, e in zip(starts, ends):
+        below = np.searchsorted(z_hits[s:e], z_centres)
+        inside[columns[s] // ny, columns[s] % ny] = below % 2 == 1
+    return inside
+
+
+def build_layered_mesh(triangles, number_of_layers, elements_per_layer, voxel_size,
+                       substrate_thickness=0.0, substrate_divisions=1, substrate_margin=0.0):
+    """
+    Builds the hex mesh of the (centred) part. Returns a dict with the node
+    coordinates, the HEXA8 and QUAD4 connectivities (0-based, Aster order)
+    and the group name(s) of every element.
+    """
+    lower, upper = triangles.reshape(-1, 3).min(axis=0), triangles.reshape(-1, 3).max(axis=0)
+    margin = substrate_margin if substrate_thickness > 0 else 0.0
+
+    # --- Layer-aligned grid ---
+    nx = max(int(np.ceil((upper[0] - lower[0] + 2 * margin) / voxel_size)), 1)
+    ny = max(int(np.ceil((upper[1] - lower[1] + 2 * margin) / voxel_size)), 1)
+    x_nodes = (lower[0] + upper[0]) / 2.0 + voxel_size * (np.arange(nx + 1) - nx / 2.0)
+    y_nodes = (lower[1] + upper[1]) / 2.0 + voxel_size * (np.arange(ny + 1) - ny / 2.0)
+    n_sub = substrate_divisions if substrate_thickness > 0 else 0
+    part_cells = number_of_layers * elements_per_layer
+    z_nodes = np.concatenate([np.linspace(-substrate_thickness, 0.0, n_sub + 1)[:-1] if n_sub else [],
+                              np.linspace(lower[2], upper[2], part_cells + 1)])
+
+    # --- Which cells are solid? ---
+    # Column centres are nudged off the grid lines so rays never run exactly
+    # along a triangle edge of axis-aligned parts.
+    nudge = voxel_size * 1e-6 * np.sqrt(2.0)
+    x_centres = (x_nodes[:-1] + x_nodes[1:]) / 2.0 + nudge
+    y_centres = (y_nodes[:-1] + y_nodes[1:]) / 2.0 + nudge * np.sqrt(3.0)
+    z_centres = (z_nodes[:-1] + z_nodes[1:]) / 2.0
+    solid = np.zeros((nx, ny, n_sub + part_cells), dtype=bool)
+    solid[:, :, :n_sub] = True
+    solid[:, :, n_sub:] = voxelize(triangles, x_centres, y_centres, z_centres[n_sub:], voxel_size)
+
+    # Group of every cell: 'substrate' or 'layer{i}'
+    cell_layer = np.zeros(solid.shape[2], dtype=np.int64)
+    cell_layer[n_sub:] = np.arange(part_cells) // elements_per_layer + 1
+
+    # --- Nodes and hexahedra ---
+    def node_id(i, j, k):
+        return (i * (ny + 1) + j) * len(z_nodes) + k
+
+    i, j, k = np.nonzero(solid)
+    hexa = np.stack([node_id(i, j, k), node_id(i + 1, j, k), node_id(i + 1, j + 1, k), node_id(i, j + 1, k),
+                     node_id(i, j, k + 1), node_id(i + 1, j, k + 1), node_id(i + 1, j + 1, k + 1), node_id(i, j + 1, k + 1)], axis=1)
+    hexa_groups = [('substrate',) if layer == 0 else (f'layer{layer}',) for layer in cell_layer[k]]
+
+    # --- Boundary faces (outward normal, counter-clockwise seen from outside) ---
+    padded = np.pad(solid, 1)
+    quads, quad_groups = [], []
+    for axis in range(3):
+        for direction in (-1, 1):
+            neighbour = np.roll(padded, -direction, axis=axis)[1:-1, 1:-1, 1:-1]
+            fi, fj, fk = np.nonzero(solid & ~neighbour)
+            if axis == 0:
+                x = fi + (direction > 0)
+                corners = [(x, fj, fk), (x, fj + 1, fk), (x, fj + 1, fk + 1), (x, fj, fk + 1)]
+            elif axis == 1:
+                y = fj + (direction > 0)
+                corners = [(fi, y, fk), (fi, y, fk + 1), (fi + 1, y, fk + 1), (fi + 1, y, fk)]
+            else:
+                z = fk + (direction > 0)
+                corners = [(fi, fj, z), (fi + 1, fj, z), (fi + 1, fj + 1, z), (fi, fj + 1, z)]
+            quad = np.stack([node_id(*c) for c in corners], axis=1)
+            if direction < 0:
+                quad = quad[:, ::-1]
+            quads.append(quad)
+            if axis == 2 and direction < 0:
+                quad_groups += [('bottom', 'bottoms') if kk == 0 else ('sides',) for kk in fk]
+            elif axis == 2:
+                quad_groups += [('tops',)] * len(fk)
+            else:
+                quad_groups += [('sides',)] * len(fk)
+    quads = np.concatenate(quads) if quads else np.empty((0, 4), dtype=np.int64)
+
+    # --- Keep only the nodes that are used ---
+    used, inverse = np.unique(np.concatenate([hexa.ravel(), quads.ravel()]), return_inverse=True)
+    hexa = inverse[:hexa.size].reshape(hexa.shape)
+    quads = inverse[hexa.size:].reshape(quads.shape)
+    gi, rest = np.divmod(used, (ny + 1) * len(z_nodes))
+    gj, gk = np.divmod(rest, len(z_nodes))
+    nodes = np.stack([x_nodes[gi], y_nodes[gj], z_nodes[gk]], axis=1)
+
+    return {'nodes': nodes, 'hexa': hexa, 'hexa_groups': hexa_groups, 'quads': quads, 'quad_groups': quad_groups}
+
+
+def _assign_families(groups, sign):
+    """Numbers the distinct group combinations: returns (family per element, {family: groups})."""
+    numbers = {}
+    families = np.empty(len(groups), dtype=np.int32)
+    for e, combination in enumerate(groups):
+        families[e] = numbers.setdefault(combination, sign * (len(numbers) + 1))
+    return families, {number: combination for combination, number in numbers.items()}
+
+
+def write_med(filename, mesh_name, mesh):
+    """Writes the mesh dict of build_layered_mesh() as a MED (HDF5) file."""
+    hexa_families, hexa_family_groups = _assign_families(mesh['hexa_groups'], -1)
+    quad_families, quad_family_groups = _assign_families(mesh['quad_groups'], -1)
+    # Face families are numbered after the volume families
+    shift = len(hexa_family_groups)
+    quad_families = quad_families - shift
+    quad_family_groups = {number - shift: g for number, g in quad_family_groups.items()}
+
+    with h5py.File(filename, 'w') as f:
+        info = f.create_group("INFOS_GENERALES")
+        info.attrs.create("MAJ", 4)
+        info.attrs.create("MIN", 0)
+        info.attrs.create("REL", 0)
+
+        med_mesh = f.create_group(f"ENS_MAA/{mesh_name}")
+        med_mesh.attrs.create("DIM", 3)
+        med_mesh.attrs.create("ESP", 3)
+        med_mesh.attrs.create("REP", 0)
+        med_mesh.attrs.create("UNT", np.bytes_(""))
+        med_mesh.attrs.create("UNI", np.bytes_(""))
+        med_mesh.attrs.create("SRT", 1)
+        med_mesh.attrs.create("NOM", np.bytes_("".join(axis.ljust(16) for axis in "XYZ")))
+        med_mesh.attrs.create("DES", np.bytes_("Layered hex mesh written by voxel_mesher.py"))
+        med_mesh.attrs.create("TYP", 0)
+
+        step = med_mesh.create_group("-0000000000000000001-0000000000000000001")
+        step.attrs.create("NDT", -1)
+        step.attrs.create("NOR", -1)
+        step.attrs.create("PDT", -1.0)
+
+        nodes = step.create_group("NOE")
+        nodes.attrs.create("CGT", 1)
+        nodes.attrs.create("CGS", 1)
+        nodes.attrs.create("PFL", np.bytes_("MED_NO_PROFILE_INTERNAL"))
+        for name, data in (("COO", mesh['nodes'].ravel(order='F')), ("FAM", np.zeros(len(mesh['nodes']), dtype=np.int32))):
+            dataset = nodes.create_dataset(name, data=data)
+            dataset.attrs.create("CGT", 1)
+            dataset.attrs.create("NBR", len(mesh['nodes']))
+
+        cells = step.create_group("MAI")
+        cells.attrs.create("CGT", 1)
+        for med_type, connectivity, families in (("HE8", mesh['hexa'][:, _ASTER_TO_MED_HE8], hexa_families),
+                                                 ("QU4", mesh['quads'], quad_families)):
+            if not len(connectivity):
+                continue
+            cell_type = cells.create_group(med_type)
+            cell_type.attrs.create("CGT", 1)
+            cell_type.attrs.create("CGS", 1)
+            cell_type.attrs.create("GEO", _MED_GEOMETRY[med_type])
+            cell_type.attrs.create("PFL", np.bytes_("MED_NO_PROFILE_INTERNAL"))
+            for name, data in (("NOD", (connectivity + 1).ravel(order='F').astype(np.int32)), ("FAM", families)):
+                dataset = cell_type.create_dataset(name, data=data)
+                dataset.attrs.create("CGT", 1)
+                dataset.attrs.create("NBR", len(connectivity))
+
+        med_families = f.create_group(f"FAS/{mesh_name}")
+        med_families.create_group("FAMILLE_ZERO").attrs.create("NUM", 0)
+        elements = med_families.create_group("ELEME")
+        for number, group_names in {**hexa_family_groups, **quad_family_groups}.items():
+            family = elements.create_group(f"FAM_{number}_{'_'.join(group_names)}"[:_NAME_LENGTH - 16])
+            family.attrs.create("NUM", number)
+            gro = family.create_group("GRO")
+            gro.attrs.create("NBR", len(group_names))
+            names = gro.create_dataset("NOM", (len(group_names),), dtype=f"{_NAME_LENGTH}int8")
+            for n, group_name in enumerate(group_names):
+                names[n] = np.frombuffer(group_name.ljust(_NAME_LENGTH, "\0").encode('ascii'), dtype=np.int8)
+
+
+def group_summary(mesh):
+    """Returns {group name: element count} of a mesh dict."""
+    summary = {}
+    for groups in mesh['hexa_groups'] + mesh['quad_groups']:
+        for name in groups:
+            summary[name] = summary.get(name, 0) + 1
+    return summary
+
+
+if __name__ == "__main__":
+    print(f"Reading STL: {STL_FILE_PATH}")
+    triangles = center_triangles(read_stl(STL_FILE_PATH))
+    print(f"Voxelising {len(triangles)} triangles into {NUMBER_OF_LAYERS} layers...")
+    mesh = build_layered_mesh(triangles, NUMBER_OF_LAYERS, ELEMENTS_PER_LAYER, VOXEL_SIZE,
+                              SUBSTRATE_THICKNESS, SUBSTRATE_DIVISIONS, SUBSTRATE_MARGIN)
+    write_med(OUTPUT_FILENAME, MESH_NAME, mesh)
+    print(f"Mesh: {len(mesh['nodes'])} nodes, {len(mesh['hexa'])} HEXA8, {len(mesh['quads'])} QUAD4")
+    for name, count in group_summary(mesh).items():
+        print(f"  group {name}: {count} elements")
+    print(f"MED file written to: {os.path.abspath(OUTPUT_FILENAME)}")